@@ -0,0 +1,719 @@
+#!/usr/bin/env python3
+"""
+Hikari Insta Downloader - Engine Adapters
+Copyright (C) 2025 Gary19gts
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+Adapters that drive yt-dlp, instaloader and gallery-dl.
+Each engine is called in-process through its Python API when it is importable,
+and through its command line program otherwise.
+"""
+
+import glob
+import importlib
+import logging
+import os
+import subprocess
+import threading
+import time
+
+from engine_registry import default_registry
+from metrics import default_metrics
+from transfer import MediaItem
+from url_classifier import COLLECTIONS, HASHTAG, PROFILE, TAGGED, parse_instagram_url
+from progress import (TRANSFER_START, TRANSFER_END, ProgressThrottle, TimeoutPolicy,
+                      announced_path, fraction_for, find_output_path, format_stats,
+                      parse_gallerydl_line, parse_ytdlp_line, stats_from_counts,
+                      stream_command)
+
+# Extensions of the photo entries yt-dlp extracts from carousels
+IMAGE_EXTENSIONS = ("jpg", "jpeg", "png", "webp", "heic")
+
+
+class DownloadError(Exception):
+    """Raised when an engine fails to download a URL"""
+
+
+class DownloadCancelled(DownloadError):
+    """Raised when a download is stopped through its cancel event
+
+    files lists the paths the engine had started writing, whose partial
+    files may be left behind.
+    """
+
+    def __init__(self, message, files=()):
+        super().__init__(message)
+        self.files = list(files)
+
+
+class EngineAdapter:
+    """Base class for a download engine
+
+    Engine objects are expensive to build, so in-process instances are kept
+    per worker thread and output folder and reused for every later job.
+    When a media session is given, resolve_media() turns a post into
+    MediaItems so the files can be fetched over the session's pooled
+    connections instead of by the engine. With a SessionManager that holds a
+    login, every engine runs authenticated with the same cookies. Every
+    download is watched by an AdaptiveTimeout built from timeouts.
+    """
+
+    name = None
+    module_name = None
+    # Collection kinds (see url_classifier.COLLECTIONS) the engine can download
+    collections = frozenset()
+    # True if the in-process engine keeps its configuration in process-wide state
+    shared_config = False
+
+    def __init__(self, prefer_in_process=True, logger=None, media_session=None, sessions=None, timeouts=None):
+        self.prefer_in_process = prefer_in_process
+        self.media_session = media_session
+        self.sessions = sessions
+        self.timeouts = timeouts or TimeoutPolicy()
+        self.logger = logger or logging.getLogger(__name__)
+        self._module = None
+        self._import_failed = False
+        self._import_lock = threading.Lock()
+        self._local = threading.local()
+
+    def load_module(self):
+        """Import the engine's Python package once, returning None if missing"""
+        if self._module is None and not self._import_failed:
+            with self._import_lock:
+                if self._module is None and not self._import_failed:
+                    try:
+                        self._module = importlib.import_module(self.module_name)
+                    except ImportError:
+                        self._import_failed = True
+        return self._module
+
+    def in_process_available(self):
+        """Return True if the engine can run inside this process"""
+        return self.prefer_in_process and self.load_module() is not None
+
+    def instance(self, output_dir):
+        """Return this thread's engine object for output_dir, creating it once"""
+        instances = getattr(self._local, "instances", None)
+        version = self.sessions.version if self.sessions else 0
+        if instances is None or self._local.session_version != version:
+            # New login: rebuild the engine objects with the new cookies
+            instances = self._local.instances = {}
+            self._local.session_version = version
+        if output_dir not in instances:
+            started = time.monotonic()
+            instances[output_dir] = self.create_instance(output_dir)
+            default_metrics.phase("engine_startup", time.monotonic() - started, engine=self.name)
+        return instances[output_dir]
+
+    def download(self, url, output_dir, progress, cancel=None, isolated=False):
+        """Download url into output_dir, preferring the in-process API
+
+        progress is called as progress(fraction, message, stats) where stats
+        is a TransferStats while bytes are moving and fraction may be None
+        when the total size is unknown. Returns the files the engine wrote,
+        as far as the engine reports them. Setting the threading.Event
+        cancel stops the download with DownloadCancelled: engine processes
+        are terminated, in-process engines stop at their next progress
+        report. A download that stalls or crawls fails with a timeout. With
+        isolated, an engine with shared_config runs its program instead, so
+        it does not hold up the other jobs' output folders.
+        """
+        progress(0.2, f"Preparing {self.name} download...")
+
+        # Engine hooks run on this thread and look up the current job here
+        self._local.progress = progress
+        self._local.throttle = ProgressThrottle()
+        self._local.files = []
+        self._local.announced = []
+        self._local.cancel = cancel
+        self._local.deadline = self.timeouts.start()
+        try:
+            if self.in_process_available() and not (isolated and self.shared_config):
+                progress(TRANSFER_START, f"Downloading with {self.name}...")
+                try:
+                    self.download_in_process(url, output_dir)
+                except DownloadError:
+                    # Engines may turn the exception from a hook into their own error
+                    self.check_cancelled()
+                    raise
+                except Exception as e:
+                    self.check_cancelled()
+                    raise DownloadError(f"{self.name} failed: {str(e)}") from e
+            else:
+                cmd = [self.executable()] + self.command(url, output_dir)[1:]
+                progress(TRANSFER_START, f"Downloading with {self.name}...")
+                self.run_command(cmd, output_dir)
+            files = self._local.files
+        finally:
+            self._local.progress = None
+            self._local.files = None
+            self._local.cancel = None
+            self._local.deadline = None
+
+        progress(TRANSFER_END, f"Finishing {self.name} download...")
+        # Engines may report a file more than once, or a temporary name
+        return [path for path in dict.fromkeys(files) if path and os.path.isfile(path)]
+
+    def resolve_media(self, url, output_dir):
+        """Resolve url into MediaItems, or return None if the engine must download it
+
+        Only engines running in-process can resolve; the files are then
+        fetched by the caller over media_session.
+        """
+        if self.media_session is None or not self.in_process_available():
+            return None
+        try:
+            return self.resolve(url, output_dir) or None
+        except DownloadError:
+            raise
+        except Exception as e:
+            raise DownloadError(f"{self.name} failed: {str(e)}") from e
+
+    def keep_resolved(self, url, info):
+        """Keep an extraction of url made by resolve() for the download that follows on this thread"""
+        self._local.resolved = (url, info)
+
+    def take_resolved(self, url):
+        """Return the extraction kept for url on this thread, or None; it is only used once"""
+        resolved = getattr(self._local, "resolved", None)
+        self._local.resolved = None
+        if resolved is not None and resolved[0] == url:
+            return resolved[1]
+        return None
+
+    def forget_resolved(self):
+        """Drop an extraction kept on this thread that no download used"""
+        self._local.resolved = None
+
+    def check_cancelled(self):
+        """Raise DownloadCancelled if the current job was cancelled"""
+        cancel = getattr(self._local, "cancel", None)
+        if cancel is not None and cancel.is_set():
+            files = (getattr(self._local, "files", None) or []) + (getattr(self._local, "announced", None) or [])
+            raise DownloadCancelled(f"{self.name} download cancelled", files)
+
+    def announce(self, path):
+        """Remember a file the engine started writing, for cleanup if it is cancelled"""
+        announced = getattr(self._local, "announced", None)
+        if announced is not None and path and path not in announced:
+            announced.append(path)
+
+    def add_file(self, path):
+        """Remember a file written by the engine for the current job"""
+        self.check_cancelled()
+        files = getattr(self._local, "files", None)
+        if files is not None and path:
+            files.append(path)
+
+    def report_transfer(self, stats, final=False):
+        """Forward transfer statistics from an engine to the current job"""
+        # Raising from an engine hook is how an in-process download is stopped
+        self.check_cancelled()
+        deadline = getattr(self._local, "deadline", None)
+        if deadline is not None:
+            deadline.activity(stats)
+            if deadline.expired():
+                raise DownloadError(f"{self.name} timed out: {deadline.reason}")
+        progress = getattr(self._local, "progress", None)
+        if progress is None or not self._local.throttle.ready(final):
+            return
+        progress(fraction_for(stats), format_stats(self.name, stats), stats)
+
+    def parse_progress(self, line):
+        """Return TransferStats for a line of engine output, or None"""
+        return None
+
+    def logged_in(self):
+        """Return True if a stored login should be passed to the engine"""
+        return self.sessions is not None and self.sessions.logged_in
+
+    def executable(self):
+        """Return the engine executable path, raising DownloadError if missing"""
+        info = default_registry.get(self.name)
+        if not info.path or not info.available:
+            raise DownloadError(f"{self.name} is not installed. Please run: pip install {self.name}")
+        return info.path
+
+    def run_command(self, cmd, output_dir):
+        """Run an engine command, streaming its output into progress updates"""
+        path_lines = []
+        started = time.monotonic()
+        answered = []
+
+        def on_line(line):
+            if not answered:
+                # The first line of output marks the end of interpreter and engine startup
+                answered.append(True)
+                default_metrics.phase("engine_startup", time.monotonic() - started, engine=self.name)
+            stats = self.parse_progress(line)
+            if stats is None:
+                # Files are announced before they exist, so resolve them at the end
+                if output_dir in line:
+                    path_lines.append(line)
+                    self.announce(announced_path(line, output_dir))
+                return False
+            self.report_transfer(stats)
+            return True
+
+        cancel = getattr(self._local, "cancel", None)
+        deadline = getattr(self._local, "deadline", None)
+        try:
+            returncode, tail = stream_command(cmd, on_line, timeout=None, cancel=cancel, deadline=deadline)
+        except subprocess.TimeoutExpired:
+            raise DownloadError(f"{self.name} timed out: {deadline.reason}")
+        self.check_cancelled()
+        if returncode != 0:
+            error_msg = tail.text() or "Unknown error occurred"
+            raise DownloadError(f"{self.name} failed: {error_msg}")
+        for line in path_lines:
+            self.add_file(find_output_path(line, output_dir))
+
+    def resolve(self, url, output_dir):
+        """Return MediaItems for url, or None if the engine must download it itself"""
+        return None
+
+    def expand(self, parsed, output_dir, known):
+        """Return an iterator over the post URLs of a collection, or None
+
+        Posts come newest first and the iterator stops at the first post
+        for which known(key) is true, so an incremental sync only pages
+        through what is new. None means the engine downloads the whole
+        collection as one job instead.
+        """
+        return None
+
+    def create_instance(self, output_dir):
+        raise NotImplementedError
+
+    def download_in_process(self, url, output_dir):
+        raise NotImplementedError
+
+    def command(self, url, output_dir):
+        raise NotImplementedError
+
+
+class YtDlpAdapter(EngineAdapter):
+    """yt-dlp through yt_dlp.YoutubeDL"""
+
+    name = "yt-dlp"
+    module_name = "yt_dlp"
+
+    def output_template(self, output_dir):
+        return f"{output_dir}/%(uploader)s_%(title)s.%(ext)s"
+
+    def create_instance(self, output_dir):
+        options = {
+            "outtmpl": self.output_template(output_dir),
+            "writeinfojson": True,
+            "writethumbnail": True,
+            "no_warnings": True,
+            "quiet": True,
+            "noprogress": True,
+            # Keep .part files and resume them on the next attempt
+            "continuedl": True,
+            "nopart": False,
+            "progress_hooks": [self.progress_hook],
+            "postprocessor_hooks": [self.postprocessor_hook]
+        }
+        if self.logged_in():
+            options["cookiefile"] = self.sessions.cookies_txt()
+        return self.load_module().YoutubeDL(options)
+
+    def progress_hook(self, status):
+        """yt-dlp progress hook, called on the downloading thread"""
+        if status.get("status") not in ("downloading", "finished"):
+            return
+        if status["status"] == "downloading":
+            self.announce(status.get("filename"))
+        stats = stats_from_counts(
+            status.get("downloaded_bytes"),
+            status.get("total_bytes") or status.get("total_bytes_estimate"),
+            status.get("speed"),
+            status.get("eta")
+        )
+        self.report_transfer(stats, final=status["status"] == "finished")
+        if status["status"] == "finished":
+            self.add_file(status.get("filename"))
+
+    def postprocessor_hook(self, status):
+        """Record the final file after yt-dlp merges or converts it"""
+        if status.get("status") == "finished":
+            self.add_file(status.get("info_dict", {}).get("filepath"))
+
+    def parse_progress(self, line):
+        return parse_ytdlp_line(line)
+
+    def resolve(self, url, output_dir):
+        ydl = self.instance(output_dir)
+        info = ydl.extract_info(url, download=False)
+        items = []
+        for entry in info.get("entries") or [info]:
+            # Formats that need merging or a non-HTTP protocol stay with yt-dlp,
+            # which then downloads from this extraction instead of repeating it
+            if (not entry or entry.get("requested_formats") or not entry.get("url")
+                    or entry.get("protocol", "https") not in ("http", "https")):
+                self.keep_resolved(url, info)
+                return None
+            items.append(MediaItem(
+                entry["url"], ydl.prepare_filename(entry), entry.get("http_headers"),
+                # Photos have an image extension, or neither a video nor an audio codec
+                "image" if (entry.get("ext") in IMAGE_EXTENSIONS
+                            or entry.get("vcodec") == entry.get("acodec") == "none") else "video",
+                # Only an exact size, the transfer checks the file against it
+                entry.get("filesize"),
+                entry.get("width"), entry.get("height")
+            ))
+        return items
+
+    def download_in_process(self, url, output_dir):
+        info = self.take_resolved(url)
+        if info is not None:
+            self.instance(output_dir).process_ie_result(info, download=True)
+            return
+        retcode = self.instance(output_dir).download([url])
+        if retcode:
+            raise DownloadError(f"yt-dlp failed with exit code {retcode}")
+
+    def command(self, url, output_dir):
+        cmd = [
+            "yt-dlp",
+            "--output", self.output_template(output_dir),
+            "--write-info-json",
+            "--write-thumbnail",
+            "--no-warnings",
+            "--newline",
+            "--continue",
+            "--part"
+        ]
+        if self.logged_in():
+            cmd += ["--cookies", self.sessions.cookies_txt()]
+        return cmd + [url]
+
+
+class InstaloaderAdapter(EngineAdapter):
+    """instaloader through instaloader.Instaloader"""
+
+    name = "instaloader"
+    module_name = "instaloader"
+    collections = frozenset((PROFILE, TAGGED, HASHTAG))
+
+    def shortcode(self, url):
+        """Extract the post shortcode from URL"""
+        parsed = parse_instagram_url(url)
+        if parsed is None or not parsed.shortcode:
+            raise DownloadError("Could not extract content ID from URL")
+        return parsed.shortcode
+
+    def create_instance(self, output_dir):
+        # instaloader has no resume support; it writes to a temporary file
+        # and skips files that are already complete on the next attempt
+        options = {"dirname_pattern": output_dir, "save_metadata": False, "quiet": True}
+        if self.timeouts.stall:
+            # A request that hangs fails instead of holding the worker, it
+            # cannot be stopped from outside like an engine process
+            options["request_timeout"] = self.timeouts.stall
+        loader = self.load_module().Instaloader(**options)
+        self.watch_writes(loader.context)
+        if self.logged_in():
+            loader.load_session_from_file(self.sessions.username or "", self.sessions.instaloader_session_file())
+            if not self.sessions.username:
+                # Imported browser cookies do not say whose they are
+                self.sessions.update({}, loader.test_login())
+                loader.context.username = self.sessions.username
+        return loader
+
+    def watch_writes(self, context):
+        """Report every chunk instaloader writes, so timeouts and cancelling work mid-file"""
+        write_raw = context.write_raw
+
+        def watched_write_raw(resp, filename):
+            self.announce(filename)
+            if hasattr(resp, "raw"):
+                resp.raw = ProgressReader(self, resp.raw, resp.headers.get("Content-Length"))
+            write_raw(resp, filename)
+
+        context.write_raw = watched_write_raw
+
+    def save_session(self, output_dir):
+        """Store the cookies instaloader refreshed during the last job"""
+        loader = self.instance(output_dir)
+        if self.logged_in() and hasattr(loader, "save_session"):
+            try:
+                self.sessions.update(loader.save_session())
+            except Exception as e:
+                self.logger.error(f"Could not save the Instagram session: {str(e)}")
+
+    def login(self, username, password, two_factor_code=None):
+        """Log in with instaloader and store the session for every engine
+
+        two_factor_code is called without arguments to ask for the code when
+        the account uses two-factor authentication.
+        """
+        module = self.load_module()
+        if module is None:
+            raise DownloadError("Logging in requires instaloader. Please run: pip install instaloader")
+        loader = module.Instaloader(quiet=True)
+        try:
+            loader.login(username, password)
+        except module.TwoFactorAuthRequiredException:
+            if two_factor_code is None:
+                raise DownloadError("This account needs a two-factor authentication code")
+            loader.two_factor_login(two_factor_code())
+        self.sessions.update(loader.save_session(), username)
+
+    def posts(self, parsed, output_dir):
+        """Lazily paginated posts of a profile, tagged feed or hashtag"""
+        module = self.load_module()
+        context = self.instance(output_dir).context
+        if parsed.kind == HASHTAG:
+            hashtag = module.Hashtag.from_name(context, parsed.username)
+            # Newer instaloader versions only page hashtags through get_posts_resumable
+            if hasattr(hashtag, "get_posts_resumable"):
+                return hashtag.get_posts_resumable()
+            return hashtag.get_posts()
+        profile = module.Profile.from_username(context, parsed.username)
+        if parsed.kind == TAGGED:
+            return profile.get_tagged_posts()
+        return profile.get_posts()
+
+    def expand(self, parsed, output_dir, known):
+        if parsed.kind not in self.collections or not self.in_process_available():
+            return None
+        return self._new_posts(parsed, output_dir, known)
+
+    def _new_posts(self, parsed, output_dir, known):
+        for post in self.posts(parsed, output_dir):
+            url = f"https://www.instagram.com/p/{post.shortcode}/"
+            if known(parse_instagram_url(url).key):
+                # Pinned posts sit on top of the feed regardless of their date
+                if getattr(post, "is_pinned", False):
+                    continue
+                return
+            yield url
+
+    def resolve(self, url, output_dir):
+        parsed = parse_instagram_url(url)
+        if parsed is not None and parsed.is_collection:
+            return None
+        shortcode = self.shortcode(url)
+        loader = self.instance(output_dir)
+        post = self.load_module().Post.from_shortcode(loader.context, shortcode)
+        self.save_session(output_dir)
+        # Same names instaloader would use: <prefix>.jpg, or <prefix>_<n>.jpg per carousel item
+        prefix = os.path.join(output_dir, loader.format_filename(post, target=shortcode))
+        if post.typename == "GraphSidecar":
+            nodes = [(node.video_url if node.is_video else node.display_url, node.is_video, f"_{index}")
+                     for index, node in enumerate(post.get_sidecar_nodes(), 1)]
+        else:
+            nodes = [(post.video_url if post.is_video else post.url, post.is_video, "")]
+        # Carousel nodes carry no dimensions, the post's apply to all of them
+        width, height = _post_dimensions(post)
+        return [MediaItem(media_url, f"{prefix}{suffix}.{'mp4' if is_video else 'jpg'}", None,
+                          "video" if is_video else "image", None, width, height)
+                for media_url, is_video, suffix in nodes]
+
+    def download_in_process(self, url, output_dir):
+        parsed = parse_instagram_url(url)
+        try:
+            if parsed is not None and parsed.is_collection:
+                # Like --fast-update: stop at the first post that is already on disk
+                for post in self.posts(parsed, output_dir):
+                    if not self.download_post(post, output_dir) and not getattr(post, "is_pinned", False):
+                        break
+                return
+            shortcode = self.shortcode(url)
+            post = self.load_module().Post.from_shortcode(self.instance(output_dir).context, shortcode)
+            self.download_post(post, output_dir)
+        finally:
+            self.save_session(output_dir)
+
+    def download_post(self, post, output_dir):
+        """Download one post, returning False if it was already complete"""
+        loader = self.instance(output_dir)
+        downloaded = loader.download_post(post, target=post.shortcode)
+        # instaloader names every file of a post after the same prefix
+        prefix = os.path.join(output_dir, loader.format_filename(post, target=post.shortcode))
+        for path in glob.glob(glob.escape(prefix) + "*"):
+            self.add_file(path)
+        return downloaded
+
+    def command(self, url, output_dir):
+        cmd = [
+            "instaloader",
+            "--dirname-pattern", output_dir,
+            "--no-metadata-json"
+        ]
+        if self.logged_in() and self.sessions.username:
+            cmd += ["--login", self.sessions.username, "--sessionfile", self.sessions.instaloader_session_file()]
+        parsed = parse_instagram_url(url)
+        if parsed is not None and parsed.kind == HASHTAG:
+            return cmd + ["--fast-update", "--", f"#{parsed.username}"]
+        if parsed is not None and parsed.kind == TAGGED:
+            return cmd + ["--fast-update", "--no-profile-pic", "--tagged", "--no-posts", "--", parsed.username]
+        if parsed is not None and parsed.kind == PROFILE:
+            return cmd + ["--fast-update", "--no-profile-pic", "--", parsed.username]
+        return cmd + ["--", f"-{self.shortcode(url)}"]
+
+
+class GalleryDlAdapter(EngineAdapter):
+    """gallery-dl through gallery_dl.job.DownloadJob
+
+    gallery-dl keeps its configuration in module globals, so jobs for one
+    output folder run concurrently while a job for another folder waits
+    until the current ones are finished before switching "base-directory".
+    """
+
+    name = "gallery-dl"
+    module_name = "gallery_dl"
+    collections = COLLECTIONS
+    shared_config = True
+
+    def __init__(self, prefer_in_process=True, logger=None, media_session=None, sessions=None, timeouts=None):
+        super().__init__(prefer_in_process, logger, media_session, sessions, timeouts)
+        self._session_version = None
+        self._config_cond = threading.Condition()
+        self._config_loaded = False
+        self._current_dir = None
+        self._active = 0
+
+    def load_module(self):
+        module = super().load_module()
+        if module is not None and not self._config_loaded:
+            with self._config_cond:
+                if not self._config_loaded:
+                    importlib.import_module("gallery_dl.job")
+                    # Pick up the user's gallery-dl configuration like the CLI does
+                    module.config.load()
+                    # Report progress for every chunk, the adapter throttles it
+                    module.config.set(("downloader",), "progress", 0.0)
+                    # Resume interrupted files from their .part file
+                    module.config.set(("downloader",), "part", True)
+                    # Feed extractors stop at the first file already on disk
+                    for subcategory in ("posts", "reels", "tagged", "tag"):
+                        module.config.set(("extractor", "instagram", subcategory), "skip", "abort:1")
+                    self._config_loaded = True
+        return module
+
+    def download_in_process(self, url, output_dir):
+        module = self.load_module()
+        with self._config_cond:
+            while self._active and self._current_dir != output_dir:
+                self._config_cond.wait()
+            if self._current_dir != output_dir:
+                module.config.set((), "base-directory", output_dir)
+                self._current_dir = output_dir
+            if self.sessions is not None and self._session_version != self.sessions.version:
+                # Running jobs keep the cookies their extractor started with
+                module.config.set(("extractor", "instagram"), "cookies",
+                                  self.sessions.cookies() if self.sessions.logged_in else None)
+                self._session_version = self.sessions.version
+            self._active += 1
+        try:
+            job = module.job.DownloadJob(url)
+            job.out = GalleryDlProgressOutput(self)
+            status = job.run()
+        finally:
+            with self._config_cond:
+                self._active -= 1
+                self._config_cond.notify_all()
+        if status:
+            raise DownloadError(f"gallery-dl failed with exit status {status}")
+
+    def command(self, url, output_dir):
+        cmd = [
+            "gallery-dl",
+            "--destination", output_dir,
+            "--option", "output.mode=terminal",
+            "--option", "downloader.progress=0",
+            "--option", "downloader.part=true"
+        ]
+        if self.logged_in():
+            cmd += ["--cookies", self.sessions.cookies_txt()]
+        parsed = parse_instagram_url(url)
+        if parsed is not None and parsed.is_collection:
+            # Stop at the first file already on disk
+            cmd += ["--abort", "1"]
+        return cmd + [url]
+
+    def parse_progress(self, line):
+        return parse_gallerydl_line(line)
+
+
+class GalleryDlProgressOutput:
+    """Stand-in for gallery-dl's output object that forwards byte progress"""
+
+    def __init__(self, adapter):
+        self.adapter = adapter
+
+    def start(self, path):
+        self.adapter.announce(path)
+
+    def skip(self, path):
+        self.adapter.add_file(path)
+
+    def success(self, path, *args):
+        self.adapter.add_file(path)
+
+    def progress(self, bytes_total, bytes_downloaded, bytes_per_second):
+        stats = stats_from_counts(bytes_downloaded, bytes_total, bytes_per_second)
+        self.adapter.report_transfer(stats, final=bool(bytes_total) and bytes_downloaded >= bytes_total)
+
+
+class ProgressReader:
+    """Stand-in for a response's raw stream that reports each chunk an engine reads"""
+
+    def __init__(self, adapter, raw, total=None):
+        self.adapter = adapter
+        self.raw = raw
+        self.total = int(total) if total else None
+        self.downloaded = 0
+        self.started = time.monotonic()
+
+    def read(self, *args, **kwargs):
+        data = self.raw.read(*args, **kwargs)
+        self.downloaded += len(data)
+        elapsed = time.monotonic() - self.started
+        stats = stats_from_counts(self.downloaded, self.total, self.downloaded / elapsed if elapsed > 0 else None)
+        self.adapter.report_transfer(stats, final=not data)
+        return data
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+
+ADAPTERS = {
+    "instaloader": InstaloaderAdapter,
+    "yt-dlp": YtDlpAdapter,
+    "gallery-dl": GalleryDlAdapter,
+}
+
+
+def _post_dimensions(post):
+    """Return (width, height) of an instaloader Post, or (None, None)
+
+    instaloader has no public attribute for them, so the post's raw node is
+    read defensively; a library update that changes it only loses the size.
+    """
+    node = getattr(post, "_node", None)
+    dimensions = node.get("dimensions") if isinstance(node, dict) else None
+    if not isinstance(dimensions, dict):
+        return None, None
+    return dimensions.get("width"), dimensions.get("height")
+
+
+def create_adapters(prefer_in_process=True, logger=None, media_session=None, sessions=None, timeouts=None):
+    """Create one adapter per engine, keyed by engine name, sharing media_session, sessions and timeouts"""
+    return {name: cls(prefer_in_process, logger, media_session, sessions, timeouts)
+            for name, cls in ADAPTERS.items()}
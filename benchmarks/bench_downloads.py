@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Hikari Insta Downloader - Download Benchmark
+Copyright (C) 2025 Gary19gts
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+Runs an N-URL workload through the download queue against the local fake
+Instagram server and reports throughput, job latency, CPU time and peak
+memory. Works offline; Linux and macOS only (uses the resource module).
+
+Two modes:
+  engines  the real adapters run stub yt-dlp / instaloader / gallery-dl
+           executables (stub_engine.py) put first on PATH
+  native   the posts are resolved from the fake API and every file goes
+           through the transfer stage and the pooled MediaSession
+
+Run from the repository root: python benchmarks/bench_downloads.py --urls 200
+"""
+
+import argparse
+import copy
+import json
+import logging
+import math
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+from fake_instagram import add_arguments
+from stub_engine import SERVER_ENV
+
+ENGINES = ["instaloader", "yt-dlp", "gallery-dl"]
+
+
+def start_server(args):
+    """Start fake_instagram.py in its own process so its CPU is not counted"""
+    cmd = [sys.executable, os.path.join(BENCH_DIR, "fake_instagram.py"), "--port", "0",
+           "--latency", str(args.latency), "--bandwidth", str(args.bandwidth),
+           "--rate-limit-ratio", str(args.rate_limit_ratio), "--retry-after", str(args.retry_after),
+           "--media-per-post", str(args.media_per_post), "--image-size", str(args.image_size),
+           "--video-size", str(args.video_size), "--video-ratio", str(args.video_ratio),
+           "--seed", str(args.seed)]
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline().strip()
+    if not line.startswith("listening "):
+        process.kill()
+        raise RuntimeError("fake Instagram server did not start")
+    return process, line.split(" ", 1)[1]
+
+
+def install_stub_engines(bin_dir):
+    """Write yt-dlp, instaloader and gallery-dl wrappers around stub_engine.py"""
+    os.makedirs(bin_dir, exist_ok=True)
+    stub = os.path.join(BENCH_DIR, "stub_engine.py")
+    for engine in ENGINES:
+        path = os.path.join(bin_dir, engine)
+        with open(path, "w") as f:
+            f.write(f'#!/bin/sh\nexec "{sys.executable}" "{stub}" {engine} "$@"\n')
+        os.chmod(path, 0o755)
+
+
+class FakeResolver:
+    """Resolves posts from the fake API in place of an in-process engine"""
+
+    def __init__(self, base_url, media_session):
+        self.base_url = base_url
+        self.media_session = media_session
+
+    def resolve(self, url, engine, output_dir, progress=None):
+        from transfer import MediaItem, TransferError
+        from rate_limit import parse_retry_after
+        from url_classifier import parse_instagram_url
+
+        shortcode = parse_instagram_url(url).shortcode
+        try:
+            with urllib.request.urlopen(f"{self.base_url}/api/posts/{shortcode}", timeout=30) as response:
+                post = json.load(response)
+        except urllib.error.HTTPError as e:
+            raise TransferError(f"HTTP {e.code} while resolving {url}", e.code,
+                                parse_retry_after(e.headers.get("Retry-After")))
+
+        os.makedirs(output_dir, exist_ok=True)
+        items = []
+        for index, media in enumerate(post["media"]):
+            extension = "mp4" if media["kind"] == "video" else "jpg"
+            path = os.path.join(output_dir, f"{post['owner']}_{shortcode}_{index}.{extension}")
+            items.append(MediaItem(media["url"], path, None, media["kind"], media["size"],
+                                   sha256=media.get("sha256")))
+        return items
+
+    def download(self, url, engine, output_dir, progress=None, cancel=None):
+        raise RuntimeError("every post is resolved in native mode")
+
+
+def bench_config(args):
+    """config.json tuned for the benchmark: no pacing beyond --engine-rate, short retries"""
+    with open(os.path.join(REPO_ROOT, "config.json")) as f:
+        config = copy.deepcopy(json.load(f))
+    config.setdefault("default_settings", {})["in_process_engines"] = False
+    config.setdefault("network", {})["native_fetch"] = args.mode == "native"
+    queue = config.setdefault("queue", {})
+    queue["max_workers"] = args.workers
+    queue["engine_limits"] = {engine: args.workers for engine in ENGINES}
+    queue["transfer_workers"] = args.transfer_workers
+    queue["retry_base_delay"] = args.retry_delay
+    rate_limits = config.setdefault("rate_limits", {})
+    rate_limits["engine_rate"] = args.engine_rate
+    rate_limits["engine_burst"] = args.workers
+    rate_limits["host_rate"] = args.host_rate
+    rate_limits["host_burst"] = args.transfer_workers
+    config["session"] = {}
+    return config
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(math.ceil(percent / 100 * len(ordered)) - 1, 0)]
+
+
+def cpu_seconds(usage):
+    return usage.ru_utime + usage.ru_stime
+
+
+def peak_rss_mib(usage):
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return usage.ru_maxrss * scale / 1024 / 1024
+
+
+def folder_bytes(folder):
+    total = 0
+    for dirpath, _, files in os.walk(folder):
+        for name in files:
+            if not name.startswith(".hikari"):
+                total += os.path.getsize(os.path.join(dirpath, name))
+    return total
+
+
+def run_workload(args, base_url, workdir):
+    """Download args.urls posts and return the measurements"""
+    from downloader import Downloader
+    from job_queue import DownloadQueue, DONE, FAILED
+    from transfer import MediaSession
+
+    config = bench_config(args)
+    if args.mode == "engines":
+        downloader = Downloader(config)
+    else:
+        downloader = FakeResolver(base_url, MediaSession.from_config(config))
+    output_dir = os.path.join(workdir, "Downloads")
+    download_queue = DownloadQueue.from_config(downloader, config, skip_downloaded=False)
+
+    self_before = resource.getrusage(resource.RUSAGE_SELF)
+    children_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    start = time.perf_counter()
+    download_queue.start()
+    jobs = [download_queue.submit(f"https://www.instagram.com/p/BENCH{i:06d}/", args.engine, output_dir)
+            for i in range(args.urls)]
+    download_queue.shutdown(wait=True)
+    elapsed = time.perf_counter() - start
+    self_after = resource.getrusage(resource.RUSAGE_SELF)
+    children_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+    latencies = [job.finished_at - job.created_at for job in jobs if job.state == DONE]
+    downloaded = folder_bytes(output_dir)
+    failures = [job for job in jobs if job.state == FAILED]
+    return {
+        "mode": args.mode,
+        "engine": args.engine,
+        "urls": args.urls,
+        "done": len(latencies),
+        "failed": len(failures),
+        "retries": sum(max(job.attempts - 1, 0) for job in jobs),
+        "seconds": elapsed,
+        "urls_per_second": args.urls / elapsed,
+        "mib_per_second": downloaded / 1024 / 1024 / elapsed,
+        "downloaded_mib": downloaded / 1024 / 1024,
+        "latency_p50": percentile(latencies, 50),
+        "latency_p99": percentile(latencies, 99),
+        "cpu_seconds": cpu_seconds(self_after) - cpu_seconds(self_before),
+        "engine_cpu_seconds": cpu_seconds(children_after) - cpu_seconds(children_before),
+        "peak_rss_mib": peak_rss_mib(self_after),
+        "engine_peak_rss_mib": peak_rss_mib(children_after),
+        "first_error": failures[0].error if failures else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Download benchmark against a fake Instagram server")
+    parser.add_argument("--urls", type=int, default=200, help="number of posts to download")
+    parser.add_argument("--mode", choices=["engines", "native"], default="engines",
+                        help="stub engine executables or the native transfer stage")
+    parser.add_argument("--engine", choices=ENGINES + ["auto"], default="instaloader",
+                        help="engine to emulate, or auto to let the strategy route each post")
+    parser.add_argument("--workers", type=int, default=4, help="parallel download jobs")
+    parser.add_argument("--transfer-workers", type=int, default=6, help="parallel file transfers")
+    parser.add_argument("--engine-rate", type=float, default=100.0, help="engine starts per second")
+    parser.add_argument("--host-rate", type=float, default=500.0, help="CDN requests per second")
+    parser.add_argument("--retry-delay", type=float, default=0.5, help="base delay before a retry")
+    parser.add_argument("--json", metavar="FILE", help="also write the results as JSON")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="hikari-bench-")
+    server, base_url = start_server(args)
+    try:
+        bin_dir = os.path.join(workdir, "bin")
+        install_stub_engines(bin_dir)
+        os.environ["PATH"] = bin_dir + os.pathsep + os.environ.get("PATH", "")
+        os.environ[SERVER_ENV] = base_url
+        # Session files and logs stay in the scratch folder
+        os.chdir(workdir)
+
+        results = run_workload(args, base_url, workdir)
+        with urllib.request.urlopen(f"{base_url}/__stats", timeout=10) as response:
+            results["server"] = json.load(response)
+    finally:
+        server.terminate()
+        server.wait()
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"📊 {results['urls']} posts with {results['engine']} ({results['mode']}) "
+          f"in {results['seconds']:.2f}s")
+    print(f"   Throughput: {results['urls_per_second']:.1f} posts/s, "
+          f"{results['mib_per_second']:.1f} MiB/s ({results['downloaded_mib']:.1f} MiB)")
+    print(f"   Latency: p50 {results['latency_p50'] * 1000:.0f} ms, p99 {results['latency_p99'] * 1000:.0f} ms")
+    if args.mode == "engines":
+        print(f"   CPU: {results['cpu_seconds']:.2f}s app, {results['engine_cpu_seconds']:.2f}s engines")
+        print(f"   Peak RSS: {results['peak_rss_mib']:.1f} MiB app, "
+              f"{results['engine_peak_rss_mib']:.1f} MiB largest engine process")
+    else:
+        print(f"   CPU: {results['cpu_seconds']:.2f}s")
+        print(f"   Peak RSS: {results['peak_rss_mib']:.1f} MiB")
+    print(f"   Retries: {results['retries']}, 429s served: {results['server']['rate_limited']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if results["failed"]:
+        print(f"❌ {results['failed']} download(s) failed, first error: {results['first_error']}")
+        return 1
+    print(f"✅ All {results['done']} downloads completed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
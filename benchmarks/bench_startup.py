@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Hikari Insta Downloader - Startup Benchmark
+Copyright (C) 2025 Gary19gts
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+Measures cold import time of the command line and the GUI, and the time
+until the main window has drawn its first frame. Fails if a heavy package
+is imported at startup or a step is over budget.
+Run from the repository root: python benchmarks/bench_startup.py
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Packages that must only be imported when they are first needed
+HEAVY_MODULES = ["requests", "PIL", "yt_dlp", "instaloader", "gallery_dl", "webbrowser"]
+
+# Runs in a fresh interpreter and prints a JSON result
+_IMPORT_PROBE = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+_FRAME_PROBE = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+import main
+app = main.HikariDownloader()
+app.root.update()
+elapsed = time.perf_counter() - start
+app.download_queue.shutdown(wait=False)
+app.root.destroy()
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def run_probe(code, workdir):
+    """Run code in a new interpreter and return its JSON result, or None on failure"""
+    result = subprocess.run([sys.executable, "-c", code], cwd=workdir,
+                            capture_output=True, text=True, timeout=120)
+    if result.returncode != 0:
+        print(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "probe failed")
+        return None
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def measure(name, code, workdir, runs, budget, allowed=()):
+    """Run a probe several times and report the median; returns False on failure
+
+    Heavy modules in allowed are pulled in by a dependency and not reported.
+    """
+    results = []
+    for _ in range(runs):
+        result = run_probe(code, workdir)
+        if result is None:
+            print(f"❌ {name}: probe failed")
+            return False
+        results.append(result)
+
+    median = statistics.median(r["seconds"] for r in results)
+    loaded = sorted(set().union(*(r["loaded"] for r in results)) - set(allowed))
+    print(f"📊 {name}: {median * 1000:.0f} ms median of {runs} runs (budget {budget * 1000:.0f} ms)")
+
+    ok = True
+    if loaded:
+        print(f"❌ {name} imported {', '.join(loaded)} at startup")
+        ok = False
+    if median > budget:
+        print(f"❌ {name} over budget")
+        ok = False
+    return ok
+
+
+def has_display():
+    if sys.platform in ("win32", "darwin"):
+        return True
+    return bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per measurement")
+    parser.add_argument("--cli-budget", type=float, default=0.3,
+                        help="maximum seconds to import the command line")
+    parser.add_argument("--gui-budget", type=float, default=1.0,
+                        help="maximum seconds to import the GUI module")
+    parser.add_argument("--frame-budget", type=float, default=2.0,
+                        help="maximum seconds until the first frame is drawn")
+    args = parser.parse_args()
+
+    # Run in a scratch folder so the log file and Downloads folder stay out of the repo
+    workdir = tempfile.mkdtemp(prefix="hikari-startup-")
+    try:
+        shutil.copy(os.path.join(REPO_ROOT, "config.json"), workdir)
+        ok = measure("CLI import", _IMPORT_PROBE.format(root=REPO_ROOT, module="downloader",
+                                                        heavy=HEAVY_MODULES),
+                     workdir, args.runs, args.cli_budget)
+
+        if importlib.util.find_spec("customtkinter") is None:
+            print("⏭️ customtkinter not installed, skipping GUI measurements")
+        else:
+            # Whatever customtkinter imports by itself is out of our hands
+            baseline = run_probe(_IMPORT_PROBE.format(root=REPO_ROOT, module="customtkinter",
+                                                      heavy=HEAVY_MODULES), workdir)
+            allowed = baseline["loaded"] if baseline else ()
+            ok &= measure("GUI import", _IMPORT_PROBE.format(root=REPO_ROOT, module="main",
+                                                             heavy=HEAVY_MODULES),
+                          workdir, args.runs, args.gui_budget, allowed)
+            if has_display():
+                ok &= measure("First frame", _FRAME_PROBE.format(root=REPO_ROOT, heavy=HEAVY_MODULES),
+                              workdir, args.runs, args.frame_budget, allowed)
+            else:
+                print("⏭️ No display, skipping the first frame measurement")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if not ok:
+        return 1
+    print("✅ Startup within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
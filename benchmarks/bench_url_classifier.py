@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Hikari Insta Downloader - URL Classifier Benchmark
+Copyright (C) 2025 Gary19gts
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+Validates and de-duplicates a synthetic URL list and fails if it is too slow.
+Run from the repository root: python benchmarks/bench_url_classifier.py
+"""
+
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from url_classifier import unique_urls
+
+TEMPLATES = [
+    "https://www.instagram.com/p/{code}/",
+    "https://instagram.com/reel/{code}?igsh={junk}",
+    "https://www.instagram.com/{user}/p/{code}/?img_index=2",
+    "https://www.instagram.com/stories/{user}/{story}/?utm_source=ig_story_item_share",
+    "https://m.instagram.com/tv/{code}/embed/",
+    "https://example.com/not/instagram/{code}",
+]
+
+
+def make_urls(count, duplicate_ratio, seed=1):
+    """Build a reproducible list of URLs with some duplicates and junk"""
+    rng = random.Random(seed)
+    alphabet = string.ascii_letters + string.digits + "_-"
+    urls = []
+    for _ in range(count):
+        if urls and rng.random() < duplicate_ratio:
+            urls.append(rng.choice(urls))
+            continue
+        urls.append(rng.choice(TEMPLATES).format(
+            code="".join(rng.choice(alphabet) for _ in range(11)),
+            junk="".join(rng.choice(alphabet) for _ in range(16)),
+            user="user_" + str(rng.randrange(10 ** 6)),
+            story=rng.randrange(10 ** 18, 10 ** 19),
+        ))
+    return urls
+
+
+def main():
+    parser = argparse.ArgumentParser(description="URL classifier benchmark")
+    parser.add_argument("--count", type=int, default=300000, help="number of URLs")
+    parser.add_argument("--duplicates", type=float, default=0.2, help="share of repeated URLs")
+    parser.add_argument("--budget", type=float, default=3.0,
+                        help="maximum seconds allowed for validating and de-duplicating")
+    args = parser.parse_args()
+
+    urls = make_urls(args.count, args.duplicates)
+    start = time.perf_counter()
+    valid = invalid = 0
+    for _, parsed in unique_urls(urls):
+        if parsed is None:
+            invalid += 1
+        else:
+            valid += 1
+    elapsed = time.perf_counter() - start
+
+    print(f"📊 {args.count} URLs in {elapsed:.3f}s "
+          f"({args.count / elapsed:,.0f} URLs/s): {valid} unique, {invalid} invalid")
+    if elapsed > args.budget:
+        print(f"❌ Over budget ({args.budget:.2f}s)")
+        return 1
+    print(f"✅ Within budget ({args.budget:.2f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Hikari Insta Downloader - Fake Instagram Server
+Copyright (C) 2025 Gary19gts
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+Local stand-in for the Instagram API and CDN used by the benchmarks.
+Serves synthetic post JSON and media blobs with configurable latency,
+bandwidth and injected 429 answers, fully offline:
+
+    GET /api/posts/<shortcode>   post JSON listing its media
+    GET /media/<name>            media blob, Range requests supported
+    GET /__stats                 request counters as JSON
+
+Run directly it prints "listening <base url>" and serves until killed.
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_POST_PATH = re.compile(r'^/api/posts/([A-Za-z0-9_-]+)/?$')
+_MEDIA_PATH = re.compile(r'^/media/([A-Za-z0-9_-]+)_(\d+)\.(jpg|mp4)$')
+_RANGE = re.compile(r'^bytes=(\d+)-$')
+
+CHUNK_SIZE = 64 * 1024
+
+
+def media_bytes(name, size):
+    """Deterministic content for a media file, so downloads can be verified"""
+    seed = hashlib.sha256(name.encode()).digest()
+    return (seed * (size // len(seed) + 1))[:size]
+
+
+class FakeInstagram:
+    """Synthetic posts and the behaviour of the fake server
+
+    Every post has media_per_post files. Posts whose shortcode hashes into
+    the video_ratio share start with a video of video_size bytes, all other
+    files are images of image_size bytes. A rate_limit_ratio share of all
+    requests is answered with 429 and a Retry-After header.
+    """
+
+    def __init__(self, latency=0.0, bandwidth=None, rate_limit_ratio=0.0, retry_after=1,
+                 media_per_post=3, image_size=200 * 1024, video_size=2 * 1024 * 1024,
+                 video_ratio=0.2, seed=1):
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.rate_limit_ratio = rate_limit_ratio
+        self.retry_after = retry_after
+        self.media_per_post = media_per_post
+        self.image_size = image_size
+        self.video_size = video_size
+        self.video_ratio = video_ratio
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {"posts": 0, "media": 0, "bytes": 0, "rate_limited": 0, "not_found": 0}
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.stats[name] += amount
+
+    def should_rate_limit(self):
+        if not self.rate_limit_ratio:
+            return False
+        with self._lock:
+            return self._random.random() < self.rate_limit_ratio
+
+    def has_video(self, shortcode):
+        digest = hashlib.sha256(shortcode.encode()).digest()
+        return digest[0] / 256 < self.video_ratio
+
+    def media(self, shortcode, index):
+        """Return (kind, size) of one media file of a post"""
+        if index == 0 and self.has_video(shortcode):
+            return "video", self.video_size
+        return "image", self.image_size
+
+    def post(self, shortcode, base_url):
+        items = []
+        for index in range(self.media_per_post):
+            kind, size = self.media(shortcode, index)
+            extension = "mp4" if kind == "video" else "jpg"
+            items.append({
+                "url": f"{base_url}/media/{shortcode}_{index}.{extension}",
+                "kind": kind,
+                "size": size,
+                "sha256": hashlib.sha256(media_bytes(f"{shortcode}_{index}", size)).hexdigest(),
+            })
+        return {"shortcode": shortcode, "owner": "bench_user", "media": items}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    fake = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        fake = self.fake
+        if self.path == "/__stats":
+            return self._send_json(200, fake.stats)
+
+        if fake.latency:
+            time.sleep(fake.latency)
+        if fake.should_rate_limit():
+            fake.count("rate_limited")
+            body = b"Please wait a few minutes before you try again."
+            self.send_response(429)
+            self.send_header("Retry-After", str(fake.retry_after))
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        match = _POST_PATH.match(self.path)
+        if match:
+            fake.count("posts")
+            base_url = f"http://{self.headers.get('Host')}"
+            return self._send_json(200, fake.post(match.group(1), base_url))
+
+        match = _MEDIA_PATH.match(self.path)
+        if match and int(match.group(2)) < fake.media_per_post:
+            fake.count("media")
+            return self._send_media(match.group(1), int(match.group(2)))
+
+        fake.count("not_found")
+        self._send_json(404, {"error": "not found"})
+
+    def _send_json(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_media(self, shortcode, index):
+        fake = self.fake
+        kind, size = fake.media(shortcode, index)
+        body = media_bytes(f"{shortcode}_{index}", size)
+        etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+
+        offset = 0
+        range_match = _RANGE.match(self.headers.get("Range", ""))
+        # A stale If-Range gets the whole file, like a CDN serving a changed object
+        if range_match and self.headers.get("If-Range", etag) == etag:
+            offset = int(range_match.group(1))
+            if offset >= size:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {offset}-{size - 1}/{size}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", "video/mp4" if kind == "video" else "image/jpeg")
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(size - offset))
+        self.end_headers()
+
+        # Pace each connection to the configured bandwidth
+        start = time.monotonic()
+        sent = 0
+        for position in range(offset, size, CHUNK_SIZE):
+            chunk = body[position:position + CHUNK_SIZE]
+            try:
+                self.wfile.write(chunk)
+            except (BrokenPipeError, ConnectionResetError):
+                return
+            sent += len(chunk)
+            if fake.bandwidth:
+                ahead = sent / fake.bandwidth - (time.monotonic() - start)
+                if ahead > 0:
+                    time.sleep(ahead)
+        fake.count("bytes", sent)
+
+
+class FakeInstagramServer:
+    """Runs a FakeInstagram on a local port in background threads"""
+
+    def __init__(self, fake=None, host="127.0.0.1", port=0):
+        handler = type("Handler", (_Handler,), {"fake": fake or FakeInstagram()})
+        self.fake = handler.fake
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="fake-instagram", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def add_arguments(parser):
+    """Add the fake server options to an argument parser"""
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds before each response")
+    parser.add_argument("--bandwidth", type=float, default=0,
+                        help="bytes per second per connection (0 = unlimited)")
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0,
+                        help="share of requests answered with 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with 429")
+    parser.add_argument("--media-per-post", type=int, default=3, help="files per post")
+    parser.add_argument("--image-size", type=int, default=200 * 1024, help="bytes per image")
+    parser.add_argument("--video-size", type=int, default=2 * 1024 * 1024, help="bytes per video")
+    parser.add_argument("--video-ratio", type=float, default=0.2, help="share of posts with a video")
+    parser.add_argument("--seed", type=int, default=1, help="seed for 429 injection")
+
+
+def fake_from_args(args):
+    return FakeInstagram(
+        latency=args.latency,
+        bandwidth=args.bandwidth or None,
+        rate_limit_ratio=args.rate_limit_ratio,
+        retry_after=args.retry_after,
+        media_per_post=args.media_per_post,
+        image_size=args.image_size,
+        video_size=args.video_size,
+        video_ratio=args.video_ratio,
+        seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Instagram API and CDN for benchmarks")
+    parser.add_argument("--port", type=int, default=0, help="port to listen on (0 = any free port)")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    server = FakeInstagramServer(fake_from_args(args), port=args.port)
+    print(f"listening {server.base_url}", flush=True)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
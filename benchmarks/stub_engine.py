@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Hikari Insta Downloader - Stub Download Engine
+Copyright (C) 2025 Gary19gts
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+Stands in for the yt-dlp, instaloader and gallery-dl executables in the
+benchmarks. Accepts the command lines the adapters build, downloads the
+post from the fake server named by HIKARI_FAKE_INSTAGRAM and prints
+progress and file names the way the real engine does:
+
+    python stub_engine.py yt-dlp --output DIR/%(title)s.%(ext)s ... URL
+"""
+
+import json
+import os
+import re
+import sys
+import time
+import urllib.error
+import urllib.request
+
+SERVER_ENV = "HIKARI_FAKE_INSTAGRAM"
+
+_SHORTCODE = re.compile(r'/(?:p|tv|reels?)/([A-Za-z0-9_-]+)')
+
+CHUNK_SIZE = 64 * 1024
+
+
+def option(args, name):
+    """Return the value following name in args, or None"""
+    try:
+        return args[args.index(name) + 1]
+    except (ValueError, IndexError):
+        return None
+
+
+def parse_command(engine, args):
+    """Return (shortcode, output_dir) from an engine command line"""
+    if engine == "instaloader":
+        target = args[-1]
+        shortcode = target[1:] if target.startswith("-") else None
+        return shortcode, option(args, "--dirname-pattern")
+
+    match = _SHORTCODE.search(args[-1])
+    if engine == "yt-dlp":
+        output_dir = os.path.dirname(option(args, "--output") or "")
+    else:
+        output_dir = option(args, "--destination")
+    return match.group(1) if match else None, output_dir
+
+
+def fail(engine, message):
+    prefix = {"yt-dlp": "ERROR: ", "instaloader": "", "gallery-dl": "[gallery-dl][error] "}[engine]
+    print(f"{prefix}{message}", flush=True)
+    return 1
+
+
+def format_mib(size):
+    return f"{size / 1024 / 1024:.2f}MiB"
+
+
+def report_progress(engine, done, total, elapsed):
+    """Print a progress line in the engine's own format"""
+    speed = done / elapsed if elapsed > 0 else 0
+    if engine == "yt-dlp":
+        eta = int((total - done) / speed) if speed else 0
+        print(f"[download] {done * 100 / total:5.1f}% of {format_mib(total)} at "
+              f"{format_mib(speed)}/s ETA {eta // 60:02d}:{eta % 60:02d}", flush=True)
+    elif engine == "gallery-dl":
+        print(f"{done * 100 // total:3d}% {done / 1000000:7.1f}MB {speed / 1000:7.0f}kB/s ", flush=True)
+
+
+def download(engine, url, path, total):
+    """Fetch url into path via a .part file, printing progress; returns None or an error message"""
+    part = path + ".part"
+    try:
+        with urllib.request.urlopen(url, timeout=30) as response, open(part, "wb") as f:
+            start = time.monotonic()
+            done = 0
+            last_report = 0.0
+            while True:
+                chunk = response.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                f.write(chunk)
+                done += len(chunk)
+                now = time.monotonic()
+                if now - last_report >= 0.1 or done == total:
+                    report_progress(engine, done, total, now - start)
+                    last_report = now
+    except urllib.error.HTTPError as e:
+        return f"HTTP Error {e.code}: {e.reason}"
+    except (urllib.error.URLError, OSError) as e:
+        return f"Unable to download {url}: {e}"
+    os.replace(part, path)
+    return None
+
+
+def main(argv):
+    if len(argv) < 2:
+        print("usage: stub_engine.py ENGINE [ARGS...]", file=sys.stderr)
+        return 2
+    engine, args = argv[0], argv[1:]
+    if "--version" in args:
+        print(f"{engine} 0.0 (benchmark stub)")
+        return 0
+
+    server = os.environ.get(SERVER_ENV)
+    if not server:
+        return fail(engine, f"{SERVER_ENV} is not set")
+    shortcode, output_dir = parse_command(engine, args)
+    if not shortcode or not output_dir:
+        return fail(engine, f"Unsupported command line: {' '.join(args)}")
+
+    try:
+        with urllib.request.urlopen(f"{server}/api/posts/{shortcode}", timeout=30) as response:
+            post = json.load(response)
+    except urllib.error.HTTPError as e:
+        return fail(engine, f"HTTP Error {e.code}: {e.reason}")
+    except (urllib.error.URLError, OSError) as e:
+        return fail(engine, f"Unable to reach Instagram: {e}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    for index, item in enumerate(post["media"]):
+        extension = "mp4" if item["kind"] == "video" else "jpg"
+        path = os.path.join(output_dir, f"{post['owner']}_{shortcode}_{index}.{extension}")
+        if engine == "yt-dlp":
+            print(f"[download] Destination: {path}", flush=True)
+        error = download(engine, item["url"], path, item["size"])
+        if error:
+            return fail(engine, error)
+        if engine != "yt-dlp":
+            # instaloader and gallery-dl name each finished file
+            print(path, flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
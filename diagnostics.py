@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Hikari Insta Downloader - Diagnostics
+Copyright (C) 2025 Gary19gts
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+System checks shared by the diagnostics window and the command line. Every
+check runs on its own thread and results are reported as they come in.
+"""
+
+import os
+import platform
+import shutil
+import socket
+import ssl
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from engine_registry import default_registry
+from metrics import default_metrics
+from progress import format_bytes
+
+OK = "ok"
+WARNING = "warning"
+ERROR = "error"
+INFO = "info"
+
+_ICONS = {OK: "✅", WARNING: "⚠️", ERROR: "❌", INFO: "ℹ️"}
+
+DiagnosticResult = namedtuple("DiagnosticResult", "section status message")
+
+DEPENDENCIES = ["yt-dlp", "instaloader", "gallery-dl", "requests", "pillow"]
+HOSTS = ["www.instagram.com", "scontent.cdninstagram.com"]
+
+DEFAULT_TIMEOUT = 5
+# Below this much free space the output folder check warns
+LOW_FREE_SPACE = 1024 ** 3
+DISK_SAMPLE_SIZE = 32 * 1024 * 1024
+THROUGHPUT_SAMPLE_SECONDS = 5
+THROUGHPUT_SAMPLE_BYTES = 20 * 1024 * 1024
+
+
+def format_result(result):
+    """One line of diagnostics output, e.g. "✅ [Network] DNS ..." """
+    return f"{_ICONS[result.status]} [{result.section}] {result.message}"
+
+
+def check_system():
+    return [
+        DiagnosticResult("System", INFO, f"Python {sys.version.split()[0]} ({sys.executable})"),
+        DiagnosticResult("System", INFO, f"{platform.system()} {platform.release()} {platform.machine()}"),
+    ]
+
+
+def check_dependency(name):
+    info = default_registry.get(name)
+    if info.available:
+        mode = "in-process" if info.in_process else "command line"
+        return DiagnosticResult("Dependencies", OK, f"{name}: {info.version or 'version unknown'} ({mode})")
+    if info.path:
+        return DiagnosticResult("Dependencies", ERROR, f"{name}: found at {info.path} but not working properly")
+    return DiagnosticResult("Dependencies", ERROR, f"{name}: not installed")
+
+
+def check_output_folder(output_dir):
+    if not os.path.isdir(output_dir):
+        return DiagnosticResult("Storage", ERROR, f"Output folder does not exist: {output_dir}")
+    if not os.access(output_dir, os.W_OK):
+        return DiagnosticResult("Storage", ERROR, f"Output folder is not writable: {output_dir}")
+    usage = shutil.disk_usage(output_dir)
+    status = WARNING if usage.free < LOW_FREE_SPACE else OK
+    return DiagnosticResult("Storage", status, f"{output_dir}: {format_bytes(usage.free)} free "
+                                               f"of {format_bytes(usage.total)}")
+
+
+def check_disk_speed(output_dir, size=DISK_SAMPLE_SIZE):
+    """Time writing and syncing a scratch file in the output folder"""
+    if not os.path.isdir(output_dir) or not os.access(output_dir, os.W_OK):
+        return DiagnosticResult("Storage", INFO, "Write speed not measured, output folder unavailable")
+    block = os.urandom(1024 * 1024)
+    fd, path = tempfile.mkstemp(prefix=".hikari-speed-", dir=output_dir)
+    try:
+        start = time.perf_counter()
+        with os.fdopen(fd, "wb") as f:
+            for _ in range(size // len(block)):
+                f.write(block)
+            f.flush()
+            os.fsync(f.fileno())
+        elapsed = time.perf_counter() - start
+    except OSError as e:
+        return DiagnosticResult("Storage", ERROR, f"Cannot write to the output folder: {e}")
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    speed = size / elapsed
+    status = WARNING if speed < 10 * 1024 * 1024 else OK
+    return DiagnosticResult("Storage", status, f"Write speed: {format_bytes(speed)}/s")
+
+
+def check_dns(host, timeout=DEFAULT_TIMEOUT):
+    # getaddrinfo has no timeout of its own, so it runs on a helper thread
+    result = {}
+
+    def resolve():
+        try:
+            result["addresses"] = socket.getaddrinfo(host, 443, proto=socket.IPPROTO_TCP)
+        except OSError as e:
+            result["error"] = e
+
+    start = time.perf_counter()
+    thread = threading.Thread(target=resolve, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    elapsed = time.perf_counter() - start
+    if thread.is_alive():
+        return DiagnosticResult("Network", ERROR, f"DNS {host}: no answer after {timeout}s")
+    if "error" in result:
+        return DiagnosticResult("Network", ERROR, f"DNS {host}: {result['error']}")
+    addresses = sorted({info[4][0] for info in result["addresses"]})
+    return DiagnosticResult("Network", OK if elapsed < 1 else WARNING,
+                            f"DNS {host}: {elapsed * 1000:.0f} ms ({', '.join(addresses[:2])})")
+
+
+def check_tls(host, timeout=DEFAULT_TIMEOUT):
+    """Time the TCP connect and the TLS handshake separately"""
+    context = ssl.create_default_context()
+    try:
+        start = time.perf_counter()
+        sock = socket.create_connection((host, 443), timeout=timeout)
+        connected = time.perf_counter()
+        with context.wrap_socket(sock, server_hostname=host) as tls:
+            handshake = time.perf_counter() - connected
+            version = tls.version()
+    except (OSError, ssl.SSLError) as e:
+        return DiagnosticResult("Network", ERROR, f"TLS {host}: {e}")
+    connect = connected - start
+    status = OK if connect + handshake < 1 else WARNING
+    return DiagnosticResult("Network", status, f"TLS {host}: connect {connect * 1000:.0f} ms, "
+                                               f"handshake {handshake * 1000:.0f} ms ({version})")
+
+
+def check_instagram(timeout=DEFAULT_TIMEOUT):
+    request = urllib.request.Request("https://www.instagram.com/", headers={"User-Agent": "Mozilla/5.0"})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except (urllib.error.URLError, OSError) as e:
+        return DiagnosticResult("Network", ERROR, f"Cannot reach Instagram: {getattr(e, 'reason', e)}")
+    if status == 200:
+        return DiagnosticResult("Network", OK, "Instagram is accessible")
+    if status == 429:
+        return DiagnosticResult("Network", WARNING, "Instagram is rate limiting this connection (HTTP 429)")
+    return DiagnosticResult("Network", WARNING, f"Instagram returned status code: {status}")
+
+
+def check_throughput(sample_url=None, timeout=DEFAULT_TIMEOUT):
+    """Sample download speed from sample_url, or report what past transfers achieved"""
+    if not sample_url:
+        seconds = default_metrics.histogram("transfer").sum
+        transferred = default_metrics.counter("bytes", fetch="native")
+        if seconds and transferred:
+            return DiagnosticResult("Network", INFO, f"Observed CDN throughput: "
+                                                     f"{format_bytes(transferred / seconds)}/s per post")
+        return DiagnosticResult("Network", INFO, "CDN throughput not measured yet, "
+                                                 "set network.sample_url to test it")
+    received = 0
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(sample_url, timeout=timeout) as response:
+            while received < THROUGHPUT_SAMPLE_BYTES and time.perf_counter() - start < THROUGHPUT_SAMPLE_SECONDS:
+                chunk = response.read(64 * 1024)
+                if not chunk:
+                    break
+                received += len(chunk)
+    except (urllib.error.URLError, OSError) as e:
+        return DiagnosticResult("Network", ERROR, f"CDN sample download failed: {getattr(e, 'reason', e)}")
+    elapsed = time.perf_counter() - start
+    return DiagnosticResult("Network", OK, f"CDN throughput: {format_bytes(received / elapsed)}/s "
+                                           f"({format_bytes(received)} in {elapsed:.1f}s)")
+
+
+def checks(output_dir, config=None):
+    """Return the diagnostic checks as zero-argument callables"""
+    network = (config or {}).get("network", {})
+    timeout = min(network.get("timeout", DEFAULT_TIMEOUT), DEFAULT_TIMEOUT)
+    tasks = [check_system]
+    tasks += [lambda name=name: check_dependency(name) for name in DEPENDENCIES]
+    tasks += [lambda: check_output_folder(output_dir), lambda: check_disk_speed(output_dir)]
+    for host in HOSTS:
+        tasks += [lambda host=host: check_dns(host, timeout), lambda host=host: check_tls(host, timeout)]
+    tasks += [lambda: check_instagram(timeout), lambda: check_throughput(network.get("sample_url"), timeout)]
+    return tasks
+
+
+def run_diagnostics(output_dir, on_result, config=None):
+    """Run every check in parallel, calling on_result(result) as each one finishes
+
+    on_result is called from worker threads. Returns all results once the
+    last check is done.
+    """
+    tasks = checks(output_dir, config)
+    results = []
+    with ThreadPoolExecutor(max_workers=len(tasks), thread_name_prefix="hikari-diagnostics") as pool:
+        futures = [pool.submit(task) for task in tasks]
+        for future in as_completed(futures):
+            try:
+                outcome = future.result()
+            except Exception as e:
+                outcome = DiagnosticResult("Diagnostics", ERROR, f"Check failed: {e}")
+            for result in outcome if isinstance(outcome, list) else [outcome]:
+                results.append(result)
+                on_result(result)
+    return results
+
+
+def start_diagnostics(output_dir, on_result, on_done=None, config=None):
+    """Run the diagnostics on a daemon thread, calling on_done(results) at the end"""
+    def run():
+        results = run_diagnostics(output_dir, on_result, config)
+        if on_done:
+            on_done(results)
+
+    thread = threading.Thread(target=run, name="hikari-diagnostics", daemon=True)
+    thread.start()
+    return thread
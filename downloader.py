@@ -0,0 +1,560 @@
+#!/usr/bin/env python3
+"""
+Hikari Insta Downloader - Download Engine
+Copyright (C) 2025 Gary19gts
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+Headless download engine shared by the GUI and the command line.
+Nothing in this module touches Tk, so it can run on machines without a display.
+"""
+
+import argparse
+import getpass
+import itertools
+import json
+import logging
+import os
+import queue
+import shutil
+import sys
+import threading
+import time
+
+from adapters import DownloadCancelled, DownloadError, create_adapters
+from metrics import default_metrics
+from output_writer import default_writer
+from progress import TimeoutPolicy
+from sessions import SessionManager
+from strategy import AUTO, EngineStrategy
+from transfer import MediaSession
+from url_classifier import parse_instagram_url, unique_urls
+
+ENGINES = ["instaloader", "yt-dlp", "gallery-dl"]
+DEFAULT_ENGINE = "instaloader"
+
+# Staging folders of race mode, inside the output folder so the winner's files only need renaming
+RACE_PREFIX = ".hikari-race-"
+
+_race_roots = itertools.count(1)
+
+
+def load_config(path='config.json'):
+    """Load configuration from config.json"""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except json.JSONDecodeError:
+        return {}
+
+
+def is_valid_instagram_url(url):
+    """Check if URL is a valid Instagram URL"""
+    return parse_instagram_url(url) is not None
+
+
+class RaceRunner:
+    """A thread a worker keeps for racing one engine
+
+    The thread and its staging folder stay the same from race to race, so
+    the engine instance cached for them is reused like the worker's own.
+    """
+
+    def __init__(self, name):
+        self._tasks = queue.Queue()
+        threading.Thread(target=self._loop, name=name, daemon=True).start()
+
+    def submit(self, function, *args):
+        self._tasks.put((function, args))
+
+    def _loop(self):
+        while True:
+            function, args = self._tasks.get()
+            function(*args)
+
+
+def read_urls(lines):
+    """Yield URLs from an iterable of lines, skipping blanks and # comments"""
+    for line in lines:
+        url = line.strip()
+        if url and not url.startswith("#"):
+            yield url
+
+
+class Downloader:
+    """Runs downloads with the selected engine without any GUI dependency
+
+    config_path is where config was loaded from; the login session and the
+    engine statistics are kept in the same folder.
+    """
+
+    def __init__(self, config=None, logger=None, config_path='config.json'):
+        self.config = config if config is not None else {}
+        self.logger = logger or logging.getLogger(__name__)
+        in_process = self.config.get("default_settings", {}).get("in_process_engines", True)
+        # Job events, and the Prometheus endpoint or snapshot file if configured
+        default_metrics.configure(self.config)
+        # fsync policy and free space threshold for everything written
+        default_writer.configure(self.config)
+        # One pooled HTTP session for the media of every job
+        self.media_session = None
+        if self.config.get("network", {}).get("native_fetch", True):
+            self.media_session = MediaSession.from_config(self.config)
+        # One Instagram login for every engine, stored next to config.json
+        config_dir = os.path.dirname(os.path.abspath(config_path))
+        self.sessions = SessionManager.from_config(self.config, config_dir, logger=self.logger)
+        # Stuck engines are stopped based on their progress, not a fixed limit
+        timeouts = TimeoutPolicy.from_config(self.config)
+        self.adapters = create_adapters(in_process, self.logger, self.media_session, self.sessions, timeouts)
+        # Which engines to try for a URL, learned from earlier outcomes
+        self.strategy = EngineStrategy.from_config(self.adapters, self.config, self.logger, config_dir)
+        self._local = threading.local()
+
+    def default_engine(self):
+        """Return the engine configured as default"""
+        return self.config.get("default_settings", {}).get("default_engine", DEFAULT_ENGINE)
+
+    def login(self, username, password, two_factor_code=None):
+        """Log in to Instagram once; every engine then uses the stored session"""
+        self.adapters["instaloader"].login(username, password, two_factor_code)
+
+    def plan(self, url, engine):
+        """Return the engines to try for url, best first, see EngineStrategy.plan
+
+        engine is one of ENGINES or "auto".
+        """
+        if engine not in ENGINES and engine != AUTO:
+            raise DownloadError(f"Unknown download engine: {engine}")
+        parsed = parse_instagram_url(url)
+        kind = parsed.kind if parsed is not None else None
+        engines = self.strategy.plan(kind, engine)
+        if not engines:
+            supported = [name for name in ENGINES if self.strategy.supports(name, kind)]
+            raise DownloadError(f"{engine} does not support {parsed.label} links, use {' or '.join(supported)}")
+        return engines
+
+    def expand(self, url, engine, output_dir, known):
+        """Iterate the new post URLs of a profile, tagged feed or hashtag
+
+        Returns None for single posts, and for collections the engines
+        download as one job, see EngineAdapter.expand.
+        """
+        parsed = parse_instagram_url(url)
+        if parsed is None or not parsed.is_collection:
+            return None
+        for name in self.plan(url, engine):
+            self._prepare(url, name, output_dir)
+            posts = self.adapters[name].expand(parsed, output_dir, known)
+            if posts is not None:
+                return posts
+        return None
+
+    def resolve(self, url, engine, output_dir, progress=None):
+        """Resolve a URL into MediaItems for the transfer stage
+
+        Tries the engines of the plan in order. Returns None when an engine
+        has to download the URL itself, see EngineAdapter.resolve_media; a
+        following download() on this thread then skips the engines that
+        failed to resolve.
+        """
+        progress = progress or (lambda fraction, message, stats=None: None)
+        failed = set()
+        self._local.failed = (url, failed)
+        error = None
+        for name in self.plan(url, engine):
+            progress(0.1, f"Resolving media with {name}...")
+            started = time.monotonic()
+            try:
+                items = self.adapters[name].resolve_media(self._prepare(url, name, output_dir), output_dir)
+            except Exception as e:
+                self._record(name, url, "failed", time.monotonic() - started)
+                self.logger.warning(f"{name} could not resolve {url}: {str(e)}")
+                failed.add(name)
+                error = e
+                continue
+            if items is not None:
+                self._record(name, url, "ok", time.monotonic() - started)
+            return items
+        raise error
+
+    def download(self, url, engine, output_dir, progress=None, cancel=None):
+        """Download a single URL and return the files written
+
+        Engines are tried in the order of plan(); the next one starts when
+        one fails, unless the strategy mode is "single". In race mode the
+        first two engines run at the same time, see _race(). progress is an
+        optional callable taking (fraction, message, stats), see
+        EngineAdapter.download, and setting the threading.Event cancel
+        stops the download with DownloadCancelled.
+        """
+        try:
+            return self._download(url, engine, output_dir, progress, cancel)
+        finally:
+            # An extraction kept by resolve() belongs to this URL only, drop it if unused
+            for adapter in self.adapters.values():
+                adapter.forget_resolved()
+
+    def _download(self, url, engine, output_dir, progress=None, cancel=None):
+        progress = progress or (lambda fraction, message, stats=None: None)
+        engines = self.plan(url, engine)
+        previous = getattr(self._local, "failed", None)
+        self._local.failed = None
+        if previous is not None and previous[0] == url:
+            engines = [name for name in engines if name not in previous[1]] or engines
+
+        progress(0.1, "Preparing download...")
+        errors = []
+        parsed = parse_instagram_url(url)
+        # Collections run for a long time and write into the output folder directly
+        if self.strategy.race and len(engines) > 1 and not (parsed is not None and parsed.is_collection):
+            # The engines race on threads of their own, which do not see this thread's extraction
+            for adapter in self.adapters.values():
+                adapter.forget_resolved()
+            files, race_errors = self._race(url, engines[:2], output_dir, progress, cancel)
+            if files is not None:
+                progress(1.0, "Download completed successfully!")
+                return files
+            errors += race_errors
+            engines = engines[2:]
+
+        for name in engines:
+            if errors:
+                progress(0.1, f"{errors[-1][0]} failed, trying {name}...")
+            try:
+                files = self._attempt(name, url, output_dir, progress, cancel)
+            except DownloadCancelled:
+                raise
+            except Exception as e:
+                self.logger.warning(f"{name} failed for {url}: {str(e)}")
+                errors.append((name, e))
+                continue
+            progress(1.0, "Download completed successfully!")
+            return files
+
+        name, error = errors[-1]
+        if len(errors) == 1:
+            raise error
+        tried = ", ".join(name for name, error in errors)
+        raise DownloadError(f"Every engine failed ({tried}), last error: {str(error)}") from error
+
+    def _attempt(self, name, url, output_dir, progress, cancel=None, isolated=False):
+        """Download url with one engine, recording the outcome for the strategy"""
+        started = time.monotonic()
+        try:
+            files = self.adapters[name].download(self._prepare(url, name, output_dir), output_dir, progress, cancel,
+                                                 isolated)
+        except DownloadCancelled:
+            self._record(name, url, "cancelled", time.monotonic() - started)
+            raise
+        except Exception:
+            self._record(name, url, "failed", time.monotonic() - started)
+            raise
+        self._record(name, url, "ok", time.monotonic() - started)
+        return files
+
+    def _race(self, url, engines, output_dir, progress, cancel=None):
+        """Run engines at the same time, keep the first download that succeeds
+
+        Every engine runs on a RaceRunner of this worker and writes into its
+        own folder under the worker's staging root inside output_dir. The
+        losers are cancelled and waited for before their folders are removed,
+        and the winner's files are moved into output_dir. Returns (files, [])
+        for a winner and (None, [(engine, error), ...]) when every engine
+        failed.
+        """
+        root = getattr(self._local, "race_root", None)
+        if root is None:
+            root = self._local.race_root = f"{RACE_PREFIX}{next(_race_roots)}"
+            self._local.racers = {}
+        results = queue.Queue()
+        cancels = {name: threading.Event() for name in engines}
+        staging = {name: os.path.join(output_dir, root, name) for name in engines}
+        for folder in staging.values():
+            # Left over if the app was killed in the middle of a race
+            shutil.rmtree(folder, ignore_errors=True)
+        furthest = [0.0]
+
+        def race_progress(fraction, message, stats=None):
+            # Show how far the leading engine got
+            if fraction is not None:
+                furthest[0] = max(furthest[0], fraction)
+            progress(furthest[0], message, stats)
+
+        def run(name):
+            files, error = None, None
+            try:
+                # gallery-dl's in-process configuration is global, it races as a program
+                files = self._attempt(name, url, staging[name], race_progress, cancels[name], isolated=True)
+            except Exception as e:
+                error = e
+            results.put((name, files, error))
+
+        progress(0.1, f"Racing {' and '.join(engines)}...")
+        for name in engines:
+            if name not in self._local.racers:
+                self._local.racers[name] = RaceRunner(f"hikari-race-{name}")
+            self._local.racers[name].submit(run, name)
+
+        winner = None
+        errors = []
+        for _ in engines:
+            while True:
+                try:
+                    name, files, error = results.get(timeout=0.2)
+                    break
+                except queue.Empty:
+                    if cancel is not None and cancel.is_set():
+                        for event in cancels.values():
+                            event.set()
+            if error is None and winner is None:
+                winner = (name, files)
+                self.logger.info(f"{name} won the race for {url}")
+                for other, event in cancels.items():
+                    if other != name:
+                        event.set()
+            elif winner is None:
+                errors.append((name, error))
+
+        # Every engine has stopped, nothing writes into the staging folders any more
+        for name, folder in staging.items():
+            if winner is None or name != winner[0]:
+                shutil.rmtree(folder, ignore_errors=True)
+        try:
+            files = self._promote(staging[winner[0]], winner[1], output_dir) if winner is not None else None
+        finally:
+            try:
+                os.rmdir(os.path.join(output_dir, root))
+            except OSError:
+                pass
+        if files is not None:
+            return files, []
+        if cancel is not None and cancel.is_set():
+            raise DownloadCancelled("Download cancelled")
+        return None, errors
+
+    def _promote(self, staging, files, output_dir):
+        """Move everything a race winner wrote into output_dir, returning the new paths of files"""
+        moved = {}
+        for directory, _, names in os.walk(staging):
+            for filename in names:
+                source = os.path.join(directory, filename)
+                target = os.path.join(output_dir, os.path.relpath(source, staging))
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                default_writer.finalize(source, target)
+                moved[os.path.normpath(source)] = target
+        shutil.rmtree(staging, ignore_errors=True)
+        return [moved.get(os.path.normpath(path), path) for path in files]
+
+    def _record(self, engine, url, outcome, seconds):
+        parsed = parse_instagram_url(url)
+        default_metrics.inc("engine_attempts", engine=engine, outcome=outcome)
+        if outcome != "cancelled":
+            self.strategy.record(engine, parsed.kind if parsed is not None else None, outcome == "ok", seconds)
+
+    def _prepare(self, url, engine, output_dir):
+        """Check the engine, create output_dir and return the canonical URL"""
+        if engine not in ENGINES:
+            raise DownloadError(f"Unknown download engine: {engine}")
+
+        if not os.path.exists(output_dir):
+            os.makedirs(output_dir, exist_ok=True)
+
+        # Engines get the canonical URL, without tracking parameters
+        parsed = parse_instagram_url(url)
+        if parsed is None:
+            return url
+        if parsed.is_collection and parsed.kind not in self.adapters[engine].collections:
+            supported = [name for name in ENGINES if parsed.kind in self.adapters[name].collections]
+            raise DownloadError(f"{engine} does not support {parsed.label} links, use {' or '.join(supported)}")
+        return parsed.canonical
+
+
+def run_diagnose(config, output_dir):
+    """Print diagnostics as each check finishes; exit code 1 if any check failed"""
+    from diagnostics import ERROR, format_result, run_diagnostics
+
+    print("🩺 Running diagnostics...")
+    results = run_diagnostics(output_dir, lambda result: print(format_result(result), flush=True), config)
+    errors = sum(1 for result in results if result.status == ERROR)
+    print(f"\n🩺 {len(results)} checks, {errors} failed")
+    return 1 if errors else 0
+
+
+def build_arg_parser():
+    """Build the command line parser for headless use"""
+    parser = argparse.ArgumentParser(
+        prog="main.py",
+        description="Hikari Insta Downloader - headless batch mode"
+    )
+    parser.add_argument("--batch", metavar="FILE",
+                        help="text file with one Instagram URL per line ('-' reads stdin)")
+    parser.add_argument("--engine", choices=ENGINES + [AUTO],
+                        help="download engine, or auto to choose per link (default: from config.json)")
+    parser.add_argument("--output", metavar="DIR",
+                        help="output folder (default: ./Downloads)")
+    parser.add_argument("--workers", type=int, metavar="N",
+                        help="number of parallel downloads (default: from config.json)")
+    parser.add_argument("--redownload", action="store_true",
+                        help="download items again even if the ledger lists them")
+    parser.add_argument("--resume", action="store_true",
+                        help="first retry unfinished jobs left in the output folder by an earlier run")
+    parser.add_argument("--duplicates", action="store_true",
+                        help="list files in the output folder that have identical content")
+    parser.add_argument("--diagnose", action="store_true",
+                        help="check engines, network and the output folder, then exit")
+    parser.add_argument("--login", metavar="USER",
+                        help="log in to Instagram (asks for the password) and keep the session")
+    parser.add_argument("--import-cookies", metavar="FILE",
+                        help="use the Instagram login from a browser cookies.txt export")
+    parser.add_argument("--logout", action="store_true",
+                        help="forget the stored Instagram session")
+    parser.add_argument("--config", default="config.json",
+                        help="path to config.json")
+    return parser
+
+
+def main(argv=None):
+    """Command line entry point, returns the process exit code"""
+    args = build_arg_parser().parse_args(argv)
+    session_commands = args.login or args.import_cookies or args.logout
+    if not args.batch and not args.resume and not session_commands and not args.duplicates and not args.diagnose:
+        print("❌ Nothing to do: pass --batch FILE or --resume")
+        return 2
+
+    config = load_config(args.config)
+    if args.diagnose:
+        return run_diagnose(config, args.output or os.path.join(os.getcwd(), "Downloads"))
+    log_level = config.get("default_settings", {}).get("log_level", "INFO")
+    logging.basicConfig(
+        level=getattr(logging, log_level),
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('hikari_downloader.log'),
+            logging.StreamHandler()
+        ]
+    )
+
+    downloader = Downloader(config, config_path=args.config)
+
+    if args.logout:
+        downloader.sessions.clear()
+        print("👋 Instagram session removed")
+    if args.import_cookies:
+        try:
+            downloader.sessions.import_cookies_file(args.import_cookies)
+        except Exception as e:
+            print(f"❌ Cannot import {args.import_cookies}: {e}")
+            return 2
+        print(f"🔑 Imported Instagram session from {args.import_cookies}")
+    if args.login:
+        password = getpass.getpass(f"Instagram password for {args.login}: ")
+        try:
+            downloader.login(args.login, password, lambda: input("Two-factor code: ").strip())
+        except Exception as e:
+            print(f"❌ Login failed: {e}")
+            return 1
+        print(f"🔑 Logged in as {args.login}")
+
+    output_dir = args.output or os.path.join(os.getcwd(), "Downloads")
+    if args.duplicates:
+        from ledger import open_ledger
+        from progress import format_bytes
+        groups = open_ledger(output_dir).duplicates()
+        for sha256, size, paths in groups:
+            print(f"🔁 {sha256[:16]} ({format_bytes(size or 0)}):")
+            for path in paths:
+                print(f"   {path}")
+        print(f"📦 {len(groups)} piece(s) of content found under more than one name")
+
+    if not args.batch and not args.resume:
+        return 0
+
+    engine = args.engine or downloader.default_engine()
+
+    if not args.batch:
+        source = None
+    elif args.batch == "-":
+        source = sys.stdin
+    else:
+        try:
+            source = open(args.batch, 'r', encoding='utf-8')
+        except OSError as e:
+            print(f"❌ Cannot read {args.batch}: {e}")
+            return 2
+
+    from job_queue import DownloadQueue, DEFAULT_MAX_WORKERS, DONE, FAILED, PAUSED, QUEUED, RUNNING, SKIPPED
+
+    def report(job):
+        if job.state == DONE:
+            print(f"✅ {job.url}")
+        elif job.state == SKIPPED:
+            print(f"⏭️  {job.url}: already downloaded")
+        elif job.state == FAILED:
+            print(f"❌ {job.url}: {job.error}")
+
+    max_workers = args.workers or config.get("queue", {}).get("max_workers", DEFAULT_MAX_WORKERS)
+    # Keep only a few jobs waiting per worker so huge inputs stream through
+    download_queue = DownloadQueue.from_config(
+        downloader, config,
+        max_workers=max_workers,
+        max_pending=max_workers * 4,
+        on_update=report,
+        skip_downloaded=not args.redownload and config.get("default_settings", {}).get("skip_downloaded", True)
+    )
+    download_queue.start()
+
+    invalid = 0
+    interrupted = False
+    try:
+        if args.resume:
+            resumed = download_queue.resume_unfinished(output_dir)
+            print(f"🔁 Resuming {resumed} unfinished download(s)")
+        for url, parsed in unique_urls(read_urls(source) if source else ()):
+            if parsed is None:
+                invalid += 1
+                print(f"❌ {url}: Not a valid Instagram URL")
+                continue
+            try:
+                download_queue.submit_all(url, engine, output_dir)
+            except Exception as e:
+                invalid += 1
+                print(f"❌ {url}: {e}")
+        download_queue.shutdown(wait=True)
+    except KeyboardInterrupt:
+        # Engines are stopped and their partial files kept for --resume
+        interrupted = True
+        print("\n⏸️  Interrupted, stopping downloads...")
+        download_queue.close()
+    finally:
+        if source and source is not sys.stdin:
+            source.close()
+
+    counts = download_queue.counts()
+    succeeded = counts[DONE]
+    failed = counts[FAILED] + invalid
+
+    if interrupted:
+        unfinished = counts[PAUSED] + counts[QUEUED] + counts[RUNNING]
+        print(f"\n⏸️  Batch interrupted: {succeeded} downloaded, {unfinished} unfinished, run with --resume to continue")
+        return 130
+    print(f"\n📦 Batch finished: {succeeded} downloaded, {counts[SKIPPED]} skipped, {failed} failed")
+    for line in default_metrics.summary_lines():
+        print(f"⏱️  {line}")
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
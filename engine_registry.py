@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Hikari Insta Downloader - Engine Registry
+Copyright (C) 2025 Gary19gts
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+Probes download engines and Python packages once and caches the result.
+Used by launch.py, the download adapters and the diagnostics window.
+"""
+
+import importlib.util
+import os
+import shutil
+import subprocess
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from importlib import metadata as importlib_metadata
+except ImportError:  # Python 3.7
+    importlib_metadata = None
+
+ENGINE_NAMES = ["yt-dlp", "instaloader", "gallery-dl"]
+
+# name -> (import name, distribution name, executable name or None)
+KNOWN_TOOLS = {
+    "yt-dlp": ("yt_dlp", "yt-dlp", "yt-dlp"),
+    "instaloader": ("instaloader", "instaloader", "instaloader"),
+    "gallery-dl": ("gallery_dl", "gallery-dl", "gallery-dl"),
+    "requests": ("requests", "requests", None),
+    "pillow": ("PIL", "Pillow", None),
+    "customtkinter": ("customtkinter", "customtkinter", None),
+}
+
+EngineInfo = namedtuple("EngineInfo", "name available version path in_process")
+
+# Seconds between checks of the files behind a cached entry
+DEFAULT_RECHECK_INTERVAL = 30
+
+
+class EngineRegistry:
+    """Cache of engine availability, versions and executable paths
+
+    An entry stays valid until PATH changes, the executable or the package
+    is replaced on disk (mtime change), or invalidate() is called, e.g.
+    after updating the libraries. get() runs for every queued job, so the
+    files are looked up again at most every recheck_interval seconds.
+    """
+
+    def __init__(self, timeout=5, recheck_interval=DEFAULT_RECHECK_INTERVAL):
+        self.timeout = timeout
+        self.recheck_interval = recheck_interval
+        self._cache = {}
+        self._checked = {}
+        self._lock = threading.Lock()
+        self._probe_locks = {}
+
+    def get(self, name):
+        """Return the EngineInfo for name, probing only when the cache is stale"""
+        now = time.monotonic()
+        search_path = os.environ.get("PATH", "")
+        with self._lock:
+            cached = self._cache.get(name)
+            if cached and cached[0][0] == search_path and now - self._checked.get(name, 0) < self.recheck_interval:
+                return cached[1]
+
+        fingerprint = self._fingerprint(name)
+        with self._lock:
+            cached = self._cache.get(name)
+            if cached and cached[0] == fingerprint:
+                self._checked[name] = now
+                return cached[1]
+            probe_lock = self._probe_locks.setdefault(name, threading.Lock())
+
+        # Concurrent callers wait for a single probe instead of spawning their own
+        with probe_lock:
+            with self._lock:
+                cached = self._cache.get(name)
+                if cached and cached[0] == fingerprint:
+                    return cached[1]
+            info = self._probe(name, fingerprint)
+            with self._lock:
+                self._cache[name] = (fingerprint, info)
+                self._checked[name] = now
+            return info
+
+    def probe_all(self, names=None):
+        """Probe several engines in parallel and return {name: EngineInfo}"""
+        names = list(names or ENGINE_NAMES)
+        with ThreadPoolExecutor(max_workers=len(names) or 1) as pool:
+            return dict(zip(names, pool.map(self.get, names)))
+
+    def probe_in_background(self, names=None, callback=None):
+        """Warm the cache on a daemon thread, calling callback(results) when done"""
+        def run():
+            results = self.probe_all(names)
+            if callback:
+                callback(results)
+
+        thread = threading.Thread(target=run, name="hikari-engine-probe", daemon=True)
+        thread.start()
+        return thread
+
+    def invalidate(self, name=None):
+        """Forget cached results for one engine, or for all of them"""
+        with self._lock:
+            if name is None:
+                self._cache.clear()
+                self._checked.clear()
+            else:
+                self._cache.pop(name, None)
+                self._checked.pop(name, None)
+
+    def _fingerprint(self, name):
+        import_name, _, executable = KNOWN_TOOLS.get(name, (None, None, name))
+        path = shutil.which(executable) if executable else None
+        return (
+            os.environ.get("PATH", ""),
+            path,
+            _mtime(path),
+            _mtime(_module_origin(import_name)),
+        )
+
+    def _probe(self, name, fingerprint):
+        import_name, dist_name, executable = KNOWN_TOOLS.get(name, (None, None, name))
+        path = fingerprint[1]
+        in_process = _module_origin(import_name) is not None
+        version = None
+
+        # Installed package metadata answers without spawning a process
+        if dist_name and importlib_metadata is not None:
+            try:
+                version = importlib_metadata.version(dist_name)
+            except importlib_metadata.PackageNotFoundError:
+                pass
+
+        if version is None and path:
+            try:
+                result = subprocess.run([path, "--version"], capture_output=True,
+                                        text=True, timeout=self.timeout)
+                if result.returncode == 0:
+                    output = (result.stdout or result.stderr).strip()
+                    version = output.splitlines()[0] if output else "unknown"
+            except (subprocess.TimeoutExpired, OSError):
+                pass
+
+        available = version is not None or in_process
+        return EngineInfo(name, available, version, path, in_process)
+
+
+def _module_origin(import_name):
+    """Return the file a module would be imported from, without importing it"""
+    if not import_name:
+        return None
+    try:
+        spec = importlib.util.find_spec(import_name)
+    except (ImportError, ValueError):
+        return None
+    return spec.origin if spec else None
+
+
+def _mtime(path):
+    if not path:
+        return None
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+# Shared registry for the whole process
+default_registry = EngineRegistry()
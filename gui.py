@@ -0,0 +1,1269 @@
+#!/usr/bin/env python3
+"""
+Hikari Insta Downloader - Desktop Application
+Copyright (C) 2025 Gary19gts
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+Version: 1.2
+Date: October 2025
+Made by: Gary19gts
+
+A modern Instagram content downloader with Apple-style interface.
+Started through main.py, which runs the command line without importing it
+"""
+
+import sys
+import threading
+from collections import deque
+import os
+import subprocess
+import logging
+from datetime import datetime
+
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+import customtkinter as ctk
+
+# Configure CustomTkinter
+ctk.set_appearance_mode("light")
+ctk.set_default_color_theme("blue")
+
+from downloader import Downloader, load_config, is_valid_instagram_url
+from url_classifier import parse_instagram_url, summarize_urls
+from job_queue import DownloadQueue, QUEUED, RUNNING, DONE, FAILED, SKIPPED, PAUSED, CANCELLED
+from engine_registry import default_registry
+from metrics import default_metrics
+from output_writer import default_writer, free_bytes
+from progress import format_bytes
+from ledger import LEDGER_FILENAME, open_ledger
+from thumbnails import ThumbnailCache
+from ui_events import UIEventQueue
+
+# Widget refresh interval for worker updates (20 redraws per second)
+UI_REFRESH_MS = 50
+
+# URL detection waits this long after the last keystroke or paste
+URL_DEBOUNCE_MS = 300
+
+# Inputs longer than this are classified on a background thread
+BULK_INPUT_CHARS = 2000
+
+# Largest size a thumbnail is shown at in the detection strip
+PREVIEW_DISPLAY_SIZE = 160
+
+# Refresh interval of the live metrics in the diagnostics window
+METRICS_REFRESH_MS = 1000
+
+# Unfinished jobs shown with their own controls; the rest are counted below the list
+JOB_LIST_ROWS = 30
+
+class HikariDownloader:
+    def __init__(self):
+        self.root = ctk.CTk()
+        self.root.title("Hikari Insta Downloader - Made by Gary19gts")
+        self.root.geometry("1000x720")
+        self.root.minsize(800, 600)
+        
+        # Set window icon
+        self.set_window_icon()
+        
+        # Load configuration
+        self.config = self.load_config()
+        
+        # Create Downloads folder if it doesn't exist
+        downloads_folder = os.path.join(os.getcwd(), "Downloads")
+        if not os.path.exists(downloads_folder):
+            os.makedirs(downloads_folder, exist_ok=True)
+        
+        # Variables
+        self.output_folder = tk.StringVar(value=downloads_folder)
+        self.url_var = tk.StringVar()
+        self.engine_var = tk.StringVar(value=self.config.get("default_settings", {}).get("default_engine", "instaloader"))
+        self.progress_var = tk.DoubleVar()
+        self.status_var = tk.StringVar(value="Ready")
+        
+        # Setup logging
+        self.setup_logging()
+        
+        # Headless download engine shared with the command line
+        self.downloader = Downloader(self.config, self.logger)
+        
+        # Initialize UI
+        self.setup_ui()
+        
+        # Worker threads hand widget updates to the main loop through this queue
+        self.ui_events = UIEventQueue(self.logger)
+        self.ui_events.attach(self.root, UI_REFRESH_MS)
+        self.failed_jobs = deque()
+        
+        # Thumbnails are fetched and decoded on worker threads, see update_preview
+        self.thumbnails = ThumbnailCache.from_config(self.config, self.downloader.media_session, self.logger)
+        self.preview_shortcode = None
+        
+        # Download queue, new URLs are accepted while earlier ones download
+        self.download_queue = DownloadQueue.from_config(self.downloader, self.config, on_update=self.on_job_update)
+        
+        # Stop the engines before the window goes away, so none are left running
+        self.closing = False
+        self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+        
+        # Tk runs idle callbacks after the pending redraws, so everything not
+        # needed for the first frame starts once the window is on screen
+        self.root.after_idle(self.on_first_frame)
+        
+        # Bind URL change event
+        self.detect_after_id = None
+        self.detect_generation = 0
+        self.detected_text = ""
+        self.detected_summary = None
+        self.detection_state = None
+        self.url_var.trace('w', self.on_url_change)
+        
+    def load_config(self):
+        """Load configuration from config.json"""
+        return load_config()
+    
+    def set_window_icon(self):
+        """Set window icon with multiple fallback methods"""
+        icon_files = ["hikari_icon.ico", "favicon.ico", "icon.ico", "hikari_icon_32x32.png", "icon_32x32.png", "hikari_icon.png", "icon.png"]
+        
+        for icon_file in icon_files:
+            if os.path.exists(icon_file):
+                try:
+                    # Method 1: Direct iconbitmap (works with .ico files)
+                    if icon_file.endswith('.ico'):
+                        self.root.iconbitmap(icon_file)
+                        print(f"✅ Icon set successfully: {icon_file}")
+                        return
+                    
+                    # Method 2: Using PhotoImage for PNG files
+                    elif icon_file.endswith('.png'):
+                        from PIL import Image, ImageTk
+                        img = Image.open(icon_file)
+                        img = img.resize((32, 32), Image.Resampling.LANCZOS)
+                        photo = ImageTk.PhotoImage(img)
+                        self.root.iconphoto(True, photo)
+                        # Keep a reference to prevent garbage collection
+                        self.root._icon_photo = photo
+                        print(f"✅ Icon set successfully: {icon_file}")
+                        return
+                        
+                except Exception as e:
+                    print(f"⚠️ Could not set icon {icon_file}: {e}")
+                    continue
+        
+        print("⚠️ No suitable icon file found or all methods failed")
+    
+    def setup_logging(self):
+        """Setup logging for diagnostics"""
+        log_level = self.config.get("default_settings", {}).get("log_level", "INFO")
+        logging.basicConfig(
+            level=getattr(logging, log_level),
+            format='%(asctime)s - %(levelname)s - %(message)s',
+            handlers=[
+                logging.FileHandler('hikari_downloader.log'),
+                logging.StreamHandler()
+            ]
+        )
+        self.logger = logging.getLogger(__name__)
+        
+    def setup_ui(self):
+        """Setup the main user interface"""
+        # Set white background for root window
+        self.root.configure(fg_color="white")
+        
+        # Main container with white background
+        main_frame = ctk.CTkFrame(self.root, corner_radius=0, fg_color="white")
+        main_frame.pack(fill="both", expand=True, padx=20, pady=20)
+        
+        # Create two columns with white background
+        left_column = ctk.CTkFrame(main_frame, corner_radius=15, fg_color="white", border_width=1, border_color="#E5E5E5")
+        left_column.pack(side="left", fill="both", expand=True, padx=(0, 10))
+        
+        right_column = ctk.CTkFrame(main_frame, corner_radius=15, fg_color="white", border_width=1, border_color="#E5E5E5")
+        right_column.pack(side="right", fill="both", expand=True, padx=(10, 0))
+        
+        self.setup_left_column(left_column)
+        
+        # Support and app info are filled in after the first frame
+        self.right_column = right_column
+        
+    def on_first_frame(self):
+        """Finish startup once the main window has been drawn"""
+        self.setup_right_column(self.right_column)
+        self.download_queue.start()
+        
+        # Warm the engine cache so the first download does not wait for probes
+        default_registry.probe_in_background(callback=self.on_engines_probed)
+        
+        # Offer to continue downloads an earlier session did not finish
+        threading.Thread(target=self.check_unfinished, args=(self.output_folder.get(),), daemon=True).start()
+        
+    def on_engines_probed(self, results):
+        """Warn in the status line when no download engine is installed"""
+        if not any(info.available for info in results.values()):
+            self.ui_events.call(self.status_var.set,
+                                "⚠️ No download engines found - install yt-dlp, instaloader or gallery-dl")
+        
+    def setup_left_column(self, parent):
+        """Setup left column with controls"""
+        # Title
+        title_label = ctk.CTkLabel(
+            parent, 
+            text="📷 Hikari Insta Downloader",
+            font=ctk.CTkFont(size=24, weight="bold")
+        )
+        title_label.pack(pady=(20, 10))
+        
+        # Disclaimer
+        disclaimer_frame = ctk.CTkFrame(parent, corner_radius=10, fg_color=("#FFE6E6", "#4A1A1A"))
+        disclaimer_frame.pack(fill="x", padx=20, pady=(0, 20))
+        
+        disclaimer_text = ctk.CTkLabel(
+            disclaimer_frame,
+            text="⚠️ DISCLAIMER: Only download your own content or content you have permission to download.",
+            font=ctk.CTkFont(size=12),
+            text_color=("#CC0000", "#FF6666"),
+            wraplength=300
+        )
+        disclaimer_text.pack(pady=15, padx=15)
+        
+        # URL Input
+        url_frame = ctk.CTkFrame(parent, corner_radius=10, fg_color="white", border_width=1, border_color="#E5E5E5")
+        url_frame.pack(fill="x", padx=20, pady=(0, 10))
+        
+        url_label = ctk.CTkLabel(url_frame, text="Instagram URL:", font=ctk.CTkFont(size=14, weight="bold"))
+        url_label.pack(anchor="w", padx=15, pady=(15, 5))
+        
+        self.url_entry = ctk.CTkEntry(
+            url_frame,
+            textvariable=self.url_var,
+            placeholder_text="Paste Instagram URL here...",
+            height=40,
+            corner_radius=8
+        )
+        self.url_entry.pack(fill="x", padx=15, pady=(0, 15))
+        
+        # Content Detection Strip (new)
+        self.detection_strip = ctk.CTkFrame(parent, corner_radius=8, fg_color=("#F5F5F5", "#2B2B2B"), border_width=1, border_color=("#CCCCCC", "#555555"))
+        self.detection_strip.pack(fill="x", padx=20, pady=(0, 15))
+        
+        self.detection_label = ctk.CTkLabel(
+            self.detection_strip,
+            text="⏳ Waiting for URL...",
+            font=ctk.CTkFont(size=12, weight="bold"),
+            text_color=("#666666", "#AAAAAA")
+        )
+        self.detection_label.pack(pady=12)
+        
+        # Packed below the label once a thumbnail has loaded
+        self.preview_image_label = ctk.CTkLabel(self.detection_strip, text="")
+        
+        # Engine Selection
+        engine_frame = ctk.CTkFrame(parent, corner_radius=10, fg_color="white", border_width=1, border_color="#E5E5E5")
+        engine_frame.pack(fill="x", padx=20, pady=(0, 15))
+        
+        engine_title_frame = ctk.CTkFrame(engine_frame, fg_color="transparent")
+        engine_title_frame.pack(fill="x", padx=15, pady=(15, 5))
+        
+        engine_label = ctk.CTkLabel(engine_title_frame, text="Download Engine:", font=ctk.CTkFont(size=14, weight="bold"))
+        engine_label.pack(side="left")
+        
+        info_button = ctk.CTkButton(
+            engine_title_frame,
+            text="i",
+            width=25,
+            height=25,
+            corner_radius=12,
+            font=ctk.CTkFont(size=12, weight="bold"),
+            command=self.show_engine_info
+        )
+        info_button.pack(side="right")
+        
+        self.engine_combo = ctk.CTkComboBox(
+            engine_frame,
+            values=["auto", "instaloader", "yt-dlp", "gallery-dl"],
+            variable=self.engine_var,
+            height=35,
+            corner_radius=8
+        )
+        self.engine_combo.pack(fill="x", padx=15, pady=(0, 10))
+        
+        # Engine guidance
+        guidance_frame = ctk.CTkFrame(engine_frame, corner_radius=8, fg_color=("#F0F8FF", "#1E3A5F"))
+        guidance_frame.pack(fill="x", padx=15, pady=(0, 15))
+        
+        guidance_text = ctk.CTkLabel(
+            guidance_frame,
+            text="💡 Quick Guide:\n✨ auto: Picks the engine per link and falls back on failure\n📸 Instaloader: Best for photos and image posts\n🎥 yt-dlp: Best for videos and reels",
+            font=ctk.CTkFont(size=11),
+            text_color=("#0066CC", "#4A9EFF"),
+            justify="left"
+        )
+        guidance_text.pack(pady=10, padx=15)
+        
+        # Output Folder
+        folder_frame = ctk.CTkFrame(parent, corner_radius=10, fg_color="white", border_width=1, border_color="#E5E5E5")
+        folder_frame.pack(fill="x", padx=20, pady=(0, 15))
+        
+        folder_label = ctk.CTkLabel(folder_frame, text="Output Folder:", font=ctk.CTkFont(size=14, weight="bold"))
+        folder_label.pack(anchor="w", padx=15, pady=(15, 5))
+        
+        folder_controls = ctk.CTkFrame(folder_frame, fg_color="transparent")
+        folder_controls.pack(fill="x", padx=15, pady=(0, 15))
+        
+        self.folder_entry = ctk.CTkEntry(
+            folder_controls,
+            textvariable=self.output_folder,
+            height=35,
+            corner_radius=8
+        )
+        self.folder_entry.pack(side="left", fill="x", expand=True, padx=(0, 10))
+        
+        browse_button = ctk.CTkButton(
+            folder_controls,
+            text="Browse",
+            width=80,
+            height=35,
+            corner_radius=8,
+            command=self.browse_folder
+        )
+        browse_button.pack(side="right", padx=(0, 5))
+        
+        open_button = ctk.CTkButton(
+            folder_controls,
+            text="Open",
+            width=60,
+            height=35,
+            corner_radius=8,
+            command=self.open_folder
+        )
+        open_button.pack(side="right", padx=(0, 5))
+        
+        # Download Button
+        self.download_button = ctk.CTkButton(
+            parent,
+            text="Download Content",
+            height=50,
+            corner_radius=12,
+            font=ctk.CTkFont(size=16, weight="bold"),
+            fg_color=("#E4405F", "#C13584"),
+            hover_color=("#C13584", "#A02D72"),
+            command=self.start_download
+        )
+        self.download_button.pack(fill="x", padx=20, pady=(0, 10))
+        
+        # Queue controls
+        queue_controls = ctk.CTkFrame(parent, fg_color="transparent")
+        queue_controls.pack(fill="x", padx=20, pady=(0, 15))
+        
+        self.pause_button = ctk.CTkButton(
+            queue_controls,
+            text="⏸ Pause All",
+            height=32,
+            corner_radius=8,
+            command=self.toggle_pause
+        )
+        self.pause_button.pack(side="left", fill="x", expand=True, padx=(0, 5))
+        
+        cancel_button = ctk.CTkButton(
+            queue_controls,
+            text="✖ Cancel All",
+            height=32,
+            corner_radius=8,
+            fg_color=("#8E8E93", "#636366"),
+            hover_color=("#FF3B30", "#FF453A"),
+            command=self.cancel_downloads
+        )
+        cancel_button.pack(side="left", fill="x", expand=True, padx=(5, 0))
+        
+        # Unfinished jobs, each with its own pause/resume and cancel buttons
+        self.job_list = ctk.CTkScrollableFrame(parent, height=120, corner_radius=10)
+        self.job_list.pack(fill="x", padx=20, pady=(0, 15))
+        self.job_rows = {}
+        self.job_list_more = ctk.CTkLabel(self.job_list, text="", font=ctk.CTkFont(size=11), text_color="gray")
+        
+        # Progress Bar
+        progress_frame = ctk.CTkFrame(parent, corner_radius=10, fg_color="white", border_width=1, border_color="#E5E5E5")
+        progress_frame.pack(fill="x", padx=20, pady=(0, 15))
+        
+        self.progress_bar = ctk.CTkProgressBar(progress_frame, corner_radius=8)
+        self.progress_bar.pack(fill="x", padx=15, pady=15)
+        self.progress_bar.set(0)
+        
+        self.status_label = ctk.CTkLabel(
+            progress_frame,
+            textvariable=self.status_var,
+            font=ctk.CTkFont(size=12)
+        )
+        self.status_label.pack(pady=(0, 15))
+        
+
+        
+    def setup_right_column(self, parent):
+        """Setup right column for support and info"""
+        # Support Development section (larger and more prominent)
+        support_frame = ctk.CTkFrame(parent, corner_radius=15, fg_color="white", border_width=1, border_color="#E5E5E5")
+        support_frame.pack(fill="both", expand=True, padx=20, pady=(20, 15))
+        
+        support_title = ctk.CTkLabel(
+            support_frame,
+            text="☕ Support Development",
+            font=ctk.CTkFont(size=16, weight="bold"),
+            text_color=("#333333", "#CCCCCC")
+        )
+        support_title.pack(pady=(20, 10))
+        
+        support_text = ctk.CTkLabel(
+            support_frame,
+            text="If you find Hikari useful, consider supporting its development!",
+            font=ctk.CTkFont(size=12),
+            text_color="gray",
+            wraplength=280
+        )
+        support_text.pack(pady=(0, 15))
+        
+        kofi_button = ctk.CTkButton(
+            support_frame,
+            text="☕ Buy me a coffee on Ko-fi",
+            height=45,
+            corner_radius=10,
+            fg_color=("#FF5E5B", "#FF7875"),
+            hover_color=("#FF4444", "#FF6666"),
+            font=ctk.CTkFont(size=14, weight="bold"),
+            text_color="white",
+            command=self.open_kofi
+        )
+        kofi_button.pack(fill="x", padx=15, pady=(0, 15))
+        
+        thanks_label = ctk.CTkLabel(
+            support_frame,
+            text="Thank you for your support! 🖤",
+            font=ctk.CTkFont(size=11),
+            text_color="gray"
+        )
+        thanks_label.pack(pady=(0, 20))
+        
+        # Diagnostic Button (moved from left column)
+        diagnostic_button = ctk.CTkButton(
+            parent,
+            text="Run Diagnostics",
+            height=40,
+            corner_radius=10,
+            fg_color=("#34C759", "#30D158"),
+            hover_color=("#28A745", "#28A745"),
+            command=self.run_diagnostics
+        )
+        diagnostic_button.pack(fill="x", padx=20, pady=(0, 15))
+        
+        # App info section at bottom
+        info_frame = ctk.CTkFrame(parent, corner_radius=10, fg_color="transparent")
+        info_frame.pack(fill="x", padx=20, pady=(0, 15))
+        
+        info_text = f"""
+{self.config.get('app_info', {}).get('name', 'Hikari Insta Downloader')}
+Version: {self.config.get('app_info', {}).get('version', '1.0.0')}
+{self.config.get('app_info', {}).get('date', 'October 2025')}
+Made by: {self.config.get('app_info', {}).get('author', 'Gary19gts')}
+        """.strip()
+        
+        info_label = ctk.CTkLabel(
+            info_frame,
+            text=info_text,
+            font=ctk.CTkFont(size=10),
+            text_color="gray",
+            justify="center"
+        )
+        info_label.pack(pady=10)
+        
+        # Bottom buttons frame (centered alignment)
+        bottom_buttons_frame = ctk.CTkFrame(parent, fg_color="transparent")
+        bottom_buttons_frame.pack(padx=20, pady=(0, 20))
+        
+        # Credits button
+        credits_button = ctk.CTkButton(
+            bottom_buttons_frame,
+            text="Credits & Thanks",
+            width=120,
+            height=35,
+            corner_radius=8,
+            command=self.show_credits
+        )
+        credits_button.pack(side="left", padx=(0, 10))
+        
+        # Update button (same color as credits button)
+        update_button = ctk.CTkButton(
+            bottom_buttons_frame,
+            text="Update Libraries",
+            width=120,
+            height=35,
+            corner_radius=8,
+            command=self.update_libraries
+        )
+        update_button.pack(side="left")
+        
+    def on_url_change(self, *args):
+        """Handle URL input changes once typing or pasting has settled"""
+        if self.detect_after_id is not None:
+            self.root.after_cancel(self.detect_after_id)
+        self.detect_after_id = self.root.after(URL_DEBOUNCE_MS, self.detect_urls)
+    
+    def detect_urls(self):
+        """Classify the URL input and update the detection strip"""
+        self.detect_after_id = None
+        text = self.url_var.get()
+        if text == self.detected_text:
+            return
+        self.detected_text = text
+        self.detected_summary = None
+        self.detect_generation += 1
+        generation = self.detect_generation
+        
+        if len(text) <= BULK_INPUT_CHARS:
+            self.show_detection(summarize_urls(text), generation)
+            return
+        
+        # Large pastes are split and counted off the UI thread
+        def classify():
+            self.ui_events.call(self.show_detection, summarize_urls(text), generation)
+        
+        threading.Thread(target=classify, daemon=True).start()
+    
+    def show_detection(self, summary, generation):
+        """Show a classified URL input in the detection strip"""
+        if generation != self.detect_generation:
+            # The input changed while this result was being computed
+            return
+        self.detected_summary = summary
+        
+        if not summary.items:
+            self.clear_preview()
+        elif len(summary.items) == 1 and not summary.invalid:
+            self.update_preview(summary.items[0][0])
+        else:
+            self.update_bulk_preview(summary)
+    
+    def set_detection(self, text, text_color, fg_color, border_color):
+        """Configure the detection strip, skipping the redraw if nothing changed"""
+        state = (text, text_color, fg_color, border_color)
+        if state == self.detection_state:
+            return
+        self.detection_state = state
+        self.detection_label.configure(text=text, text_color=text_color)
+        self.detection_strip.configure(fg_color=fg_color, border_color=border_color)
+    
+    def is_valid_instagram_url(self, url):
+        """Check if URL is a valid Instagram URL"""
+        return is_valid_instagram_url(url)
+    
+    def update_preview(self, url):
+        """Update detection strip with URL information"""
+        # Analyze URL
+        url_info = self.analyze_url(url)
+        
+        # Determine icon and message based on content type
+        if url_info['content'] == 'video' or 'Reel' in url_info['type']:
+            icon = "🎥"
+            content_type = "Video Content"
+        else:
+            icon = "📸"
+            content_type = "Image Content"
+        
+        # Update detection strip with green styling
+        self.set_detection(
+            f"✅ {url_info['type']} detected - {content_type} ready to download",
+            ("#34C759", "#30D158"),
+            ("#E8F5E8", "#1A4A1A"),
+            ("#34C759", "#30D158")
+        )
+        self.request_thumbnail(url)
+    
+    def request_thumbnail(self, url):
+        """Show the thumbnail of a single post, loading it in the background if needed"""
+        parsed = parse_instagram_url(url)
+        if not self.config.get("default_settings", {}).get("show_preview", True) or not parsed or not parsed.shortcode:
+            self.hide_thumbnail()
+            return
+        if parsed.shortcode == self.preview_shortcode:
+            return
+        self.preview_shortcode = parsed.shortcode
+        
+        image = self.thumbnails.cached(parsed.shortcode)
+        if image is not None:
+            self.show_thumbnail(parsed.shortcode, image)
+            return
+        self.preview_image_label.pack_forget()
+        self.thumbnails.request(
+            parsed, self.output_folder.get(),
+            lambda shortcode, image: self.ui_events.call(self.show_thumbnail, shortcode, image)
+        )
+    
+    def show_thumbnail(self, shortcode, image):
+        """Put a loaded thumbnail in the detection strip, unless the URL changed meanwhile"""
+        if shortcode != self.preview_shortcode:
+            return
+        if image is None:
+            self.preview_image_label.pack_forget()
+            return
+        # The cached image is already small, so this only sets the display size
+        scale = min(1.0, PREVIEW_DISPLAY_SIZE / max(image.size))
+        size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        self.preview_image = ctk.CTkImage(light_image=image, dark_image=image, size=size)
+        self.preview_image_label.configure(image=self.preview_image)
+        self.preview_image_label.pack(pady=(0, 12))
+    
+    def hide_thumbnail(self):
+        self.preview_shortcode = None
+        self.preview_image_label.pack_forget()
+    
+    def update_bulk_preview(self, summary):
+        """Update detection strip for several pasted URLs"""
+        text = f"✅ {len(summary.items)} Instagram URLs detected - ready to download"
+        notes = []
+        if summary.invalid:
+            notes.append(f"{summary.invalid} invalid")
+        if summary.duplicates:
+            notes.append(f"{summary.duplicates} duplicates")
+        if notes:
+            text += f" ({', '.join(notes)} ignored)"
+        
+        self.set_detection(
+            text,
+            ("#34C759", "#30D158"),
+            ("#E8F5E8", "#1A4A1A"),
+            ("#34C759", "#30D158")
+        )
+        self.hide_thumbnail()
+    
+    def clear_preview(self):
+        """Clear detection strip"""
+        # Reset strip colors to gray
+        self.set_detection(
+            "⏳ Waiting for URL...",
+            ("#666666", "#AAAAAA"),
+            ("#F5F5F5", "#2B2B2B"),
+            ("#CCCCCC", "#555555")
+        )
+        self.hide_thumbnail()
+    
+    def analyze_url(self, url):
+        """Analyze Instagram URL to determine content type"""
+        parsed = parse_instagram_url(url)
+        if parsed is None:
+            return {'type': 'Instagram Content', 'content': 'unknown'}
+        return {'type': parsed.label, 'content': parsed.content}
+    
+    def open_kofi(self):
+        """Open Ko-fi support page"""
+        try:
+            import webbrowser
+            webbrowser.open("https://ko-fi.com/gary19gts")
+        except Exception as e:
+            self.logger.error(f"Failed to open Ko-fi link: {str(e)}")
+            messagebox.showinfo("Ko-fi Link", "Visit: https://ko-fi.com/gary19gts\n\nThank you for your support!")
+    
+    def update_libraries(self):
+        """Update all libraries automatically"""
+        update_window = ctk.CTkToplevel(self.root)
+        update_window.title("Update Libraries")
+        update_window.geometry("500x400")
+        update_window.transient(self.root)
+        update_window.grab_set()
+        
+        # Main frame
+        main_frame = ctk.CTkFrame(update_window, corner_radius=15)
+        main_frame.pack(fill="both", expand=True, padx=20, pady=20)
+        
+        # Title
+        title_label = ctk.CTkLabel(
+            main_frame,
+            text="🔄 Update Libraries",
+            font=ctk.CTkFont(size=20, weight="bold"),
+            text_color=("#007AFF", "#0A84FF")
+        )
+        title_label.pack(pady=(20, 15))
+        
+        # Progress text area
+        progress_text = ctk.CTkTextbox(main_frame, corner_radius=10, font=ctk.CTkFont(size=11))
+        progress_text.pack(fill="both", expand=True, padx=20, pady=(0, 15))
+        
+        # Progress bar
+        progress_bar = ctk.CTkProgressBar(main_frame, corner_radius=8)
+        progress_bar.pack(fill="x", padx=20, pady=(0, 15))
+        progress_bar.set(0)
+        
+        # Buttons frame
+        buttons_frame = ctk.CTkFrame(main_frame, fg_color="transparent")
+        buttons_frame.pack(fill="x", padx=20, pady=(0, 20))
+        
+        # Start update button
+        start_button = ctk.CTkButton(
+            buttons_frame,
+            text="Start Update",
+            height=40,
+            corner_radius=10,
+            fg_color=("#34C759", "#30D158"),
+            hover_color=("#28A745", "#28A745"),
+            command=lambda: self.start_update_process(progress_text, progress_bar, start_button, close_button)
+        )
+        start_button.pack(side="left", padx=(0, 10))
+        
+        # Close button
+        close_button = ctk.CTkButton(
+            buttons_frame,
+            text="Close",
+            height=40,
+            corner_radius=10,
+            command=update_window.destroy
+        )
+        close_button.pack(side="right")
+        
+        # Initial message
+        initial_message = """📦 Library Update Manager
+
+This will update the following libraries to their latest versions:
+• customtkinter
+• requests
+• yt-dlp
+• instaloader
+• gallery-dl
+• pillow
+
+⚠️ Note: This process may take a few minutes depending on your internet connection.
+
+Click 'Start Update' to begin the process.
+"""
+        progress_text.insert("1.0", initial_message)
+        progress_text.configure(state="disabled")
+    
+    def start_update_process(self, progress_text, progress_bar, start_button, close_button):
+        """Start the library update process in a separate thread"""
+        start_button.configure(state="disabled", text="Updating...")
+        close_button.configure(state="disabled")
+        
+        # Start update in separate thread
+        threading.Thread(
+            target=self.update_libraries_thread,
+            args=(progress_text, progress_bar, start_button, close_button),
+            daemon=True
+        ).start()
+    
+    def update_libraries_thread(self, progress_text, progress_bar, start_button, close_button):
+        """Update libraries in a separate thread"""
+        libraries = [
+            "customtkinter>=5.2.0",
+            "requests>=2.31.0", 
+            "yt-dlp",
+            "instaloader",
+            "gallery-dl",
+            "pillow>=10.0.0"
+        ]
+        
+        total_libs = len(libraries)
+        
+        def append_text(message):
+            progress_text.configure(state="normal")
+            progress_text.insert("end", f"\n{message}")
+            progress_text.see("end")
+            progress_text.configure(state="disabled")
+        
+        # This runs on a worker thread, so widgets are only touched via ui_events
+        def update_progress_text(message):
+            self.ui_events.call(append_text, message)
+        
+        def set_progress(value):
+            self.ui_events.post(("update", "progress"), progress_bar.set, value)
+        
+        try:
+            update_progress_text("🚀 Starting library updates...")
+            
+            for i, library in enumerate(libraries):
+                update_progress_text(f"📦 Updating {library}...")
+                set_progress((i + 0.5) / total_libs)
+                
+                try:
+                    # Run pip install --upgrade
+                    result = subprocess.run(
+                        [sys.executable, "-m", "pip", "install", "--upgrade", library],
+                        capture_output=True,
+                        text=True,
+                        timeout=120
+                    )
+                    
+                    if result.returncode == 0:
+                        update_progress_text(f"✅ {library} updated successfully")
+                    else:
+                        update_progress_text(f"⚠️ {library} update had issues: {result.stderr[:100]}")
+                        
+                except subprocess.TimeoutExpired:
+                    update_progress_text(f"⏰ {library} update timed out")
+                except Exception as e:
+                    update_progress_text(f"❌ {library} update failed: {str(e)[:100]}")
+                
+                set_progress((i + 1) / total_libs)
+            
+            update_progress_text("\n🎉 Library update process completed!")
+            update_progress_text("💡 Restart the application to use the updated libraries.")
+            
+        except Exception as e:
+            update_progress_text(f"\n❌ Update process failed: {str(e)}")
+        
+        finally:
+            # Installed versions and paths may have changed
+            default_registry.invalidate()
+            
+            # Re-enable buttons
+            self.ui_events.call(start_button.configure, state="normal", text="Update Complete")
+            self.ui_events.call(close_button.configure, state="normal")
+
+    
+    def show_credits(self):
+        """Show credits and acknowledgments window"""
+        credits_window = ctk.CTkToplevel(self.root)
+        credits_window.title("Credits & Thanks")
+        credits_window.geometry("600x500")
+        credits_window.transient(self.root)
+        credits_window.grab_set()
+        
+        # Main frame
+        main_frame = ctk.CTkFrame(credits_window, corner_radius=15)
+        main_frame.pack(fill="both", expand=True, padx=20, pady=20)
+        
+        # Title
+        title_label = ctk.CTkLabel(
+            main_frame,
+            text="❤️ Credits & Thanks",
+            font=ctk.CTkFont(size=24, weight="bold"),
+            text_color=("#E4405F", "#C13584")
+        )
+        title_label.pack(pady=(20, 15))
+        
+        # Scrollable text area
+        text_widget = ctk.CTkTextbox(main_frame, corner_radius=10, font=ctk.CTkFont(size=12))
+        text_widget.pack(fill="both", expand=True, padx=20, pady=(0, 20))
+        
+        credits_text = """🎉 HIKARI INSTA DOWNLOADER v1.2
+
+👨‍💻 DEVELOPED BY:
+Gary19gts - Main Developer & UI Designer
+October 2025
+
+🙏 SPECIAL THANKS TO THE AMAZING LIBRARY CREATORS:
+
+📦 DOWNLOAD ENGINES:
+• yt-dlp Team - The most powerful media downloader
+  → Reliable, fast, and constantly updated
+  → GitHub: https://github.com/yt-dlp/yt-dlp
+
+• instaloader Team - Instagram specialized downloader  
+  → Perfect for Instagram content
+  → GitHub: https://github.com/instaloader/instaloader
+
+• gallery-dl Team - Multi-platform media downloader
+  → Supports numerous platforms
+  → GitHub: https://github.com/mikf/gallery-dl
+
+🎨 USER INTERFACE:
+• CustomTkinter by Tom Schimansky
+  → Modern and beautiful GUI framework
+  → GitHub: https://github.com/TomSchimansky/CustomTkinter
+
+• Tkinter - Python's standard GUI library
+  → Foundation of the interface
+
+🖼️ IMAGE PROCESSING:
+• Pillow (PIL) Team
+  → Image processing and thumbnail generation
+  → GitHub: https://github.com/python-pillow/Pillow
+
+🌐 NETWORKING:
+• Requests Library by Kenneth Reitz
+  → HTTP requests made simple
+  → GitHub: https://github.com/psf/requests
+
+🐍 PYTHON COMMUNITY:
+• Python Software Foundation
+  → The amazing Python programming language
+  → Making development accessible and fun
+
+💝 INSPIRATION:
+• Apple Inc. - For the clean design inspiration
+• Instagram - For creating an amazing platform
+• Open Source Community - For making this possible
+
+⚖️ LEGAL NOTICE:
+This application is for educational purposes and personal use only.
+Always respect copyright laws and platform terms of service.
+Only download content you own or have permission to download.
+
+🌟 THANK YOU:
+To everyone who uses, tests, and provides feedback on this application.
+Your support makes development worthwhile!
+
+Made with ❤️ and lots of ☕
+"""
+        
+        text_widget.insert("1.0", credits_text)
+        text_widget.configure(state="disabled")
+        
+        # Close button
+        close_button = ctk.CTkButton(
+            main_frame,
+            text="Close",
+            height=40,
+            corner_radius=10,
+            fg_color=("#E4405F", "#C13584"),
+            hover_color=("#C13584", "#A02D72"),
+            command=credits_window.destroy
+        )
+        close_button.pack(pady=(0, 20))
+    
+    def show_engine_info(self):
+        """Show information about download engines"""
+        engines_config = self.config.get("engines", {})
+        
+        info_text = "Download Engines Information:\n\n"
+        
+        for engine_key, engine_info in engines_config.items():
+            name = engine_info.get("name", engine_key)
+            desc = engine_info.get("description", "")
+            advantages = engine_info.get("advantages", [])
+            recommended = engine_info.get("recommended", False)
+            
+            info_text += f"🔹 {name}"
+            if recommended:
+                info_text += " (Recommended)"
+            info_text += f"\n• {desc}\n"
+            
+            for advantage in advantages:
+                info_text += f"• {advantage}\n"
+            info_text += "\n"
+        
+        info_text += "💡 Tips:\n✨ Use auto to pick the engine per link, with fallback to the others\n📸 Use instaloader for photos and image posts\n🎥 Use yt-dlp for videos and reels\n🌐 Use gallery-dl for multi-platform downloads"
+        
+        info_window = ctk.CTkToplevel(self.root)
+        info_window.title("Engine Information")
+        info_window.geometry("500x450")
+        info_window.transient(self.root)
+        info_window.grab_set()
+        
+        text_widget = ctk.CTkTextbox(info_window, corner_radius=10)
+        text_widget.pack(fill="both", expand=True, padx=20, pady=20)
+        text_widget.insert("1.0", info_text)
+        text_widget.configure(state="disabled")
+        
+    def browse_folder(self):
+        """Browse for output folder"""
+        folder = filedialog.askdirectory(initialdir=self.output_folder.get())
+        if folder:
+            self.output_folder.set(folder)
+            
+    def open_folder(self):
+        """Open output folder in file explorer"""
+        folder = self.output_folder.get()
+        if os.path.exists(folder):
+            if sys.platform == "win32":
+                os.startfile(folder)
+            elif sys.platform == "darwin":
+                subprocess.run(["open", folder])
+            else:
+                subprocess.run(["xdg-open", folder])
+        else:
+            messagebox.showerror("Error", "Folder does not exist!")
+            
+    def start_download(self):
+        """Start the download process"""
+        text = self.url_var.get()
+        if not text.strip():
+            messagebox.showerror("Error", "Please enter an Instagram URL!")
+            return
+        
+        # Check if output folder exists
+        output_dir = self.output_folder.get()
+        if not os.path.exists(output_dir):
+            try:
+                os.makedirs(output_dir, exist_ok=True)
+            except Exception as e:
+                messagebox.showerror("Error", f"Cannot create output folder: {str(e)}")
+                return
+        
+        # Check if output folder is writable
+        if not os.access(output_dir, os.W_OK):
+            messagebox.showerror("Error", "Output folder is not writable! Please choose a different folder.")
+            return
+        
+        # Downloads still queue up, they start once space is freed
+        if not default_writer.has_room(output_dir):
+            messagebox.showwarning("Low Disk Space", f"Only {format_bytes(free_bytes(output_dir))} free in the output folder.\n\nDownloads will wait until {format_bytes(default_writer.min_free_bytes)} are free.")
+            
+        # Classifying, ledger lookups and routing would freeze the window on a long
+        # paste, so they run on a thread; detection is reused unless the input changed
+        summary = self.detected_summary if text == self.detected_text else None
+        threading.Thread(target=self.queue_urls, args=(text, summary, self.engine_var.get(), output_dir),
+                         name="hikari-submit", daemon=True).start()
+    
+    def queue_urls(self, text, summary, engine, output_dir):
+        """Classify pasted text and submit its URLs from a background thread
+
+        summary is the detection result for text, or None to classify it
+        here. Profiles, tagged feeds and hashtags are paged here and queued
+        post by post.
+        """
+        if summary is None:
+            summary = summarize_urls(text)
+        if not summary.items:
+            self.ui_events.call(messagebox.showerror, "Error", "Please enter a valid Instagram URL!\n\nSupported formats:\n• Posts: instagram.com/p/...\n• Reels: instagram.com/reel/...\n• Stories: instagram.com/stories/...\n• Profiles: instagram.com/username/ (or /username/tagged/)\n• Hashtags: instagram.com/explore/tags/...\n• Highlights: instagram.com/stories/highlights/...")
+            return
+        # Clear the field for the next URL, unless something new was typed meanwhile
+        self.ui_events.call(self.clear_submitted, text)
+        for url, parsed in summary.items:
+            if self.closing:
+                return
+            try:
+                self.download_queue.submit_all(url, engine, output_dir)
+            except Exception as e:
+                if self.closing:
+                    return
+                self.logger.error(f"Could not queue {url}: {str(e)}")
+                self.ui_events.call(messagebox.showerror, "Error", f"Could not queue {url}:\n\n{str(e)}")
+    
+    def clear_submitted(self, text):
+        """Empty the URL field if it still holds the submitted text"""
+        if self.url_var.get() == text:
+            self.url_var.set("")
+    
+    def check_unfinished(self, output_dir):
+        """Look for jobs left in the output folder's ledger by an earlier session"""
+        if not os.path.exists(os.path.join(output_dir, LEDGER_FILENAME)):
+            return
+        try:
+            unfinished = open_ledger(output_dir).unfinished_jobs((QUEUED, RUNNING))
+        except Exception as e:
+            self.logger.error(f"Could not read unfinished downloads: {str(e)}")
+            return
+        if unfinished:
+            self.ui_events.call(self.ask_resume, output_dir, len(unfinished))
+    
+    def ask_resume(self, output_dir, count):
+        """Ask whether to resume unfinished downloads found at startup"""
+        if messagebox.askyesno("Resume Downloads", f"{count} download(s) from the last session did not finish.\n\nResume them now?"):
+            threading.Thread(target=self.download_queue.resume_unfinished, args=(output_dir,), daemon=True).start()
+        
+    def on_job_update(self, job):
+        """Called on worker threads whenever a download job changes"""
+        if job.state == FAILED:
+            self.failed_jobs.append(job)
+            self.ui_events.post("failures", self.show_failures)
+        # Only the newest job state is drawn on each refresh tick
+        self.ui_events.post("status", self.show_job_status, job)
+        self.ui_events.post(f"job-{job.id}", self.show_job_row, job)
+    
+    def show_job_row(self, job):
+        """Add, update or remove the job's row in the job list"""
+        row = self.job_rows.get(job.id)
+        if job.finished:
+            if row is not None:
+                row[0].destroy()
+                del self.job_rows[job.id]
+        elif row is None and len(self.job_rows) < JOB_LIST_ROWS:
+            frame = ctk.CTkFrame(self.job_list, fg_color="transparent")
+            frame.pack(fill="x", pady=1)
+            label = ctk.CTkLabel(frame, text="", anchor="w", font=ctk.CTkFont(size=11))
+            label.pack(side="left", fill="x", expand=True)
+            cancel_button = ctk.CTkButton(frame, text="✖", width=28, height=24, corner_radius=6,
+                                          fg_color=("#8E8E93", "#636366"), hover_color=("#FF3B30", "#FF453A"),
+                                          command=lambda: self.run_job_action(self.download_queue.cancel, job))
+            cancel_button.pack(side="right", padx=(4, 0))
+            pause_button = ctk.CTkButton(frame, text="", width=28, height=24, corner_radius=6,
+                                         command=lambda: self.toggle_job(job))
+            pause_button.pack(side="right")
+            row = self.job_rows[job.id] = (frame, label, pause_button)
+        if row is not None and not job.finished:
+            name = job.url.replace("https://www.instagram.com", "")
+            message = job.message if job.state != QUEUED or job.attempts else "Queued"
+            row[1].configure(text=f"{name}  {message}"[:70])
+            row[2].configure(text="▶" if job.state == PAUSED else "⏸")
+        
+        counts = self.download_queue.counts()
+        hidden = counts[QUEUED] + counts[RUNNING] + counts[PAUSED] - len(self.job_rows)
+        if hidden > 0:
+            self.job_list_more.configure(text=f"... and {hidden} more")
+            self.job_list_more.pack(side="bottom", fill="x")
+        else:
+            self.job_list_more.pack_forget()
+    
+    def toggle_job(self, job):
+        """Pause a single job, or resume it"""
+        action = self.download_queue.resume if job.state == PAUSED else self.download_queue.pause
+        self.run_job_action(action, job)
+    
+    def run_job_action(self, action, job):
+        """Pause, resume or cancel a job off the Tk thread, the ledger is updated on the way"""
+        threading.Thread(target=action, args=(job,), daemon=True).start()
+    
+    def show_job_status(self, job):
+        """Reflect download queue progress in the status label and progress bar"""
+        counts = self.download_queue.counts()
+        summary = f"{counts[RUNNING]} running, {counts[QUEUED]} queued"
+        # The queue also pauses and resumes itself when disk space runs low
+        self.pause_button.configure(text="▶ Resume All" if self.download_queue.paused else "⏸ Pause All")
+        
+        if job.state == QUEUED:
+            self.status_var.set(f"{job.message if job.attempts else 'Queued'} ({summary})")
+        elif job.state == RUNNING:
+            self.status_var.set(f"{job.message} ({summary})")
+            self.progress_bar.set(job.progress)
+        elif job.state == FAILED:
+            self.status_var.set(f"Download failed! ({summary})")
+        elif job.state == SKIPPED:
+            self.status_var.set(f"Already downloaded, skipped ({summary})")
+        elif job.state == PAUSED and self.download_queue.low_space:
+            self.status_var.set(f"⚠️ Low disk space, waiting for free space ({counts[PAUSED]} paused, {summary})")
+        elif job.state == PAUSED:
+            self.status_var.set(f"Paused ({counts[PAUSED]} paused, {summary})")
+        elif job.state == CANCELLED:
+            self.status_var.set(f"Download cancelled ({summary})")
+        elif job.state == DONE:
+            if self.download_queue.is_idle():
+                self.status_var.set("Download completed successfully!")
+                self.progress_bar.set(1.0)
+                messagebox.showinfo("Success", f"Download completed successfully!\n\n{counts[DONE]} done, {counts[SKIPPED]} skipped, {counts[FAILED]} failed")
+            else:
+                self.status_var.set(f"Download completed ({summary})")
+    
+    def toggle_pause(self):
+        """Pause the whole download queue, or resume it"""
+        if self.download_queue.paused:
+            self.download_queue.resume_all()
+            self.pause_button.configure(text="⏸ Pause All")
+            self.status_var.set("Resuming downloads...")
+        else:
+            self.download_queue.pause_all()
+            self.pause_button.configure(text="▶ Resume All")
+            self.status_var.set("Pausing downloads...")
+    
+    def cancel_downloads(self):
+        """Cancel every queued, paused and running download"""
+        if self.download_queue.is_idle() and not self.download_queue.counts()[PAUSED]:
+            return
+        if messagebox.askyesno("Cancel Downloads", "Cancel all unfinished downloads?\n\nPartial files will be deleted."):
+            threading.Thread(target=self.download_queue.cancel_all, daemon=True).start()
+            self.status_var.set("Cancelling downloads...")
+    
+    def on_closing(self):
+        """Pause unfinished downloads so the next session can resume them, then quit
+
+        The queue waits for the running engines to stop, which happens on a
+        background thread so the window keeps redrawing meanwhile.
+        """
+        if self.closing:
+            return
+        self.closing = True
+        if self.download_queue.is_idle():
+            self.download_queue.close()
+            self.finish_closing()
+            return
+        self.status_var.set("Stopping downloads...")
+
+        def close():
+            try:
+                self.download_queue.close()
+            finally:
+                self.ui_events.call(self.finish_closing)
+
+        threading.Thread(target=close, name="hikari-close", daemon=True).start()
+    
+    def finish_closing(self):
+        """Destroy the window once the download queue has stopped"""
+        self.thumbnails.shutdown()
+        self.root.destroy()
+    
+    def show_failures(self):
+        """Show one error dialog for all jobs that failed since the last refresh"""
+        failed = []
+        while self.failed_jobs:
+            failed.append(self.failed_jobs.popleft())
+        if not failed:
+            return
+        if len(failed) == 1:
+            messagebox.showerror("Error", f"Download failed: {str(failed[0].error)}")
+            return
+        details = "\n".join(f"• {job.url}: {str(job.error)[:80]}" for job in failed[:5])
+        if len(failed) > 5:
+            details += f"\n... and {len(failed) - 5} more"
+        messagebox.showerror("Error", f"{len(failed)} downloads failed:\n\n{details}")
+            
+    def run_diagnostics(self):
+        """Open the diagnostics window and stream check results into it"""
+        diagnostic_window = ctk.CTkToplevel(self.root)
+        diagnostic_window.title("System Diagnostics")
+        diagnostic_window.geometry("600x650")
+        diagnostic_window.transient(self.root)
+        diagnostic_window.grab_set()
+        
+        text_widget = ctk.CTkTextbox(diagnostic_window, corner_radius=10)
+        text_widget.pack(fill="both", expand=True, padx=20, pady=(20, 10))
+        
+        # Live download metrics, refreshed while the window is open
+        metrics_label = ctk.CTkLabel(diagnostic_window, text="Download Metrics (live)",
+                                     font=ctk.CTkFont(size=13, weight="bold"))
+        metrics_label.pack(anchor="w", padx=20)
+        metrics_widget = ctk.CTkTextbox(diagnostic_window, corner_radius=10, height=160,
+                                        font=ctk.CTkFont(family="Courier", size=12))
+        metrics_widget.pack(fill="x", padx=20, pady=(5, 20))
+        self.refresh_metrics(diagnostic_window, metrics_widget)
+        
+        # Checks run in parallel on worker threads; each line appears as soon as it is known
+        from diagnostics import format_result, start_diagnostics
+        
+        started = datetime.now()
+        self.append_diagnostic(diagnostic_window, text_widget,
+                               f"=== HIKARI DOWNLOADER DIAGNOSTICS ===\n"
+                               f"Timestamp: {started.strftime('%Y-%m-%d %H:%M:%S')}\n")
+        
+        def on_result(result):
+            self.ui_events.call(self.append_diagnostic, diagnostic_window, text_widget, format_result(result))
+        
+        def on_done(results):
+            elapsed = (datetime.now() - started).total_seconds()
+            self.ui_events.call(self.append_diagnostic, diagnostic_window, text_widget,
+                                f"\nFinished {len(results)} checks in {elapsed:.1f}s")
+        
+        start_diagnostics(self.output_folder.get(), on_result, on_done, self.config)
+        
+    def append_diagnostic(self, window, widget, line):
+        """Add a line to the diagnostics window unless it was closed meanwhile"""
+        if not window.winfo_exists():
+            return
+        widget.configure(state="normal")
+        widget.insert("end", line + "\n")
+        widget.configure(state="disabled")
+        
+    def refresh_metrics(self, window, widget):
+        """Show the current metrics aggregates, then schedule the next refresh"""
+        if not window.winfo_exists():
+            return
+        counts = self.download_queue.counts()
+        lines = [f"Queue: {counts[QUEUED]} queued, {counts[RUNNING]} running"]
+        lines.extend(default_metrics.summary_lines())
+        widget.configure(state="normal")
+        widget.delete("1.0", "end")
+        widget.insert("1.0", "\n".join(lines))
+        widget.configure(state="disabled")
+        window.after(METRICS_REFRESH_MS, self.refresh_metrics, window, widget)
+        
+    def run(self):
+        """Start the application"""
+        self.root.mainloop()
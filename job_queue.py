@@ -0,0 +1,808 @@
+#!/usr/bin/env python3
+"""
+Hikari Insta Downloader - Download Queue
+Copyright (C) 2025 Gary19gts
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+Job queue with a bounded worker pool and per-engine concurrency caps
+"""
+
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from ledger import content_key, open_ledger
+from media_store import CONTENT_ADDRESSED, DEFAULT_SHARD_LEVELS, FLAT, SHARDED, open_store, shard_files
+from metrics import default_metrics
+from output_writer import RESUME_FACTOR, default_writer, free_bytes, is_disk_full
+from postprocess import PostProcessor
+from progress import format_bytes, remove_partial_files
+from rate_limit import PERMANENT, RATE_LIMITED, RateLimiter, backoff_delay, classify_error
+from strategy import AUTO
+from transfer import DEFAULT_MAX_PENDING_TRANSFERS, DEFAULT_TRANSFER_WORKERS, TransferScheduler
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+SKIPPED = "skipped"
+PAUSED = "paused"
+CANCELLED = "cancelled"
+
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_RETRY_BASE_DELAY = 5.0
+DEFAULT_RETRY_MAX_DELAY = 600.0
+# Seconds between free space checks while the queue waits for space
+SPACE_CHECK_INTERVAL = 15
+
+_job_ids = itertools.count(1)
+
+
+class DownloadJob:
+    """A single URL waiting for, or going through, a download engine"""
+
+    def __init__(self, url, engine, output_dir, record_id=None, source=None):
+        self.id = next(_job_ids)
+        # Row in the output folder's jobs table, kept until the job is done
+        self.record_id = record_id
+        self.url = url
+        # Engine the job was submitted for; with AUTO the queue picks engine per attempt
+        self.requested = engine
+        self.engine = engine
+        self.output_dir = output_dir
+        # Profile, tagged feed or hashtag URL this post was queued from
+        self.source = source
+        self.state = QUEUED
+        self.progress = 0.0
+        self.message = "Queued"
+        self.error = None
+        # rate_limited, transient or permanent, see rate_limit.classify_error
+        self.failure = None
+        self.attempts = 0
+        self.stats = None
+        self.files = []
+        # Seconds spent in each phase of the current attempt, see metrics.PHASES
+        self.timings = {}
+        self.bytes = 0
+        # Set to stop the running attempt, stop_reason is PAUSED or CANCELLED
+        self.stop = threading.Event()
+        self.stop_reason = None
+        # Files the current attempt is fetching itself, for cleanup on cancel
+        self.partial = []
+        # True once the attempt's files went through post-processing
+        self.processed = False
+        self.queued_at = time.monotonic()
+        self.attempt_started = None
+        self.key = content_key(url)
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def finished(self):
+        return self.state in (DONE, FAILED, SKIPPED, CANCELLED)
+
+    def __repr__(self):
+        return f"<DownloadJob #{self.id} {self.state} {self.engine} {self.url}>"
+
+
+class DownloadQueue:
+    """Runs DownloadJobs on a pool of worker threads
+
+    Jobs are started in submission order, but a job only starts while its
+    engine is below its concurrency limit, so a burst of yt-dlp jobs never
+    starves instaloader or gallery-dl jobs queued behind it.
+
+    With a media session the work is split in two stages: the workers only
+    resolve a post into MediaItems and hand them to a TransferScheduler,
+    then move on to the next post while the files are fetched. Engines that
+    cannot resolve download the whole post on the worker instead.
+
+    Engine requests are paced by an adaptive RateLimiter per engine. Jobs
+    that fail because of rate limits or network trouble go back to the
+    queue after an exponential backoff, up to max_retries times.
+
+    With a PostProcessor, finished files are converted and tidied up in a
+    process pool before the job is recorded as done; the worker and transfer
+    threads only hand them over.
+
+    Jobs can be paused, resumed and cancelled one by one or all at once.
+    Stopping a running job sets its stop event: engine processes are
+    terminated, in-process engines and transfers stop at their next chunk
+    and the worker slot is free again. Paused jobs keep their partial files
+    for resuming, cancelled jobs have them removed.
+
+    A job only starts while the output folder's drive has the writer's
+    minimum free space. Below it, or when a download runs out of space, the
+    whole queue pauses and resumes by itself once enough space is free.
+    """
+
+    def __init__(self, downloader, max_workers=DEFAULT_MAX_WORKERS, engine_limits=None,
+                 max_pending=0, skip_downloaded=True, on_update=None, logger=None,
+                 transfer_workers=DEFAULT_TRANSFER_WORKERS,
+                 max_pending_transfers=DEFAULT_MAX_PENDING_TRANSFERS, limiter=None,
+                 max_retries=DEFAULT_MAX_RETRIES, retry_base_delay=DEFAULT_RETRY_BASE_DELAY,
+                 retry_max_delay=DEFAULT_RETRY_MAX_DELAY, layout=FLAT, metrics=None, postprocessor=None,
+                 shard_levels=DEFAULT_SHARD_LEVELS, writer=None):
+        self.downloader = downloader
+        self.max_workers = max(1, int(max_workers))
+        self.engine_limits = dict(engine_limits or {})
+        self.max_pending = max_pending
+        self.skip_downloaded = skip_downloaded
+        self.on_update = on_update
+        self.logger = logger or logging.getLogger(__name__)
+        self.limiter = limiter or RateLimiter(1.0, 3)
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.layout = layout
+        self.shard_levels = shard_levels
+        self.metrics = metrics or default_metrics
+        self.writer = writer or default_writer
+
+        self._counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0, SKIPPED: 0, PAUSED: 0, CANCELLED: 0}
+        self._pending = {}
+        self._pending_count = 0
+        # (ready_at, job id, job) for jobs waiting to be retried
+        self._delayed = []
+        self._running = {}
+        self._active = 0
+        # Jobs taken by a worker and not finished yet, and paused jobs, by id
+        self._taken = {}
+        self._paused = {}
+        self._paused_all = False
+        # Output folder the queue is paused for until its drive has space again
+        self._low_space = None
+        self._closed = False
+        self._cond = threading.Condition()
+        self._workers = []
+
+        self.transfers = None
+        if getattr(downloader, "media_session", None) is not None:
+            self.transfers = TransferScheduler(downloader.media_session, transfer_workers,
+                                               max_pending_transfers, self.logger)
+        self.postprocessor = postprocessor if postprocessor is not None and postprocessor.enabled else None
+
+    @classmethod
+    def from_config(cls, downloader, config, **kwargs):
+        """Build a queue using the "queue" section of config.json"""
+        queue_config = config.get("queue", {})
+        kwargs.setdefault("max_workers", queue_config.get("max_workers", DEFAULT_MAX_WORKERS))
+        kwargs.setdefault("engine_limits", queue_config.get("engine_limits", {}))
+        kwargs.setdefault("transfer_workers", queue_config.get("transfer_workers", DEFAULT_TRANSFER_WORKERS))
+        kwargs.setdefault("max_pending_transfers",
+                          queue_config.get("max_pending_transfers", DEFAULT_MAX_PENDING_TRANSFERS))
+        kwargs.setdefault("max_retries", queue_config.get("max_retries", DEFAULT_MAX_RETRIES))
+        kwargs.setdefault("retry_base_delay", queue_config.get("retry_base_delay", DEFAULT_RETRY_BASE_DELAY))
+        kwargs.setdefault("retry_max_delay", queue_config.get("retry_max_delay", DEFAULT_RETRY_MAX_DELAY))
+        kwargs.setdefault("limiter", RateLimiter.from_config(config, "engine"))
+        kwargs.setdefault("layout", config.get("storage", {}).get("layout", FLAT))
+        kwargs.setdefault("shard_levels", config.get("storage", {}).get("shard_levels", DEFAULT_SHARD_LEVELS))
+        kwargs.setdefault("skip_downloaded", config.get("default_settings", {}).get("skip_downloaded", True))
+        kwargs.setdefault("postprocessor", PostProcessor.from_config(config, kwargs.get("logger")))
+        return cls(downloader, **kwargs)
+
+    def start(self):
+        """Start the worker threads"""
+        with self._cond:
+            if self._workers:
+                return
+            for i in range(self.max_workers):
+                worker = threading.Thread(target=self._worker_loop, name=f"hikari-worker-{i + 1}", daemon=True)
+                self._workers.append(worker)
+                worker.start()
+        if self.transfers is not None:
+            self.transfers.start()
+
+    def submit(self, url, engine, output_dir, record_id=None, source=None, attempts=0):
+        """Queue a URL for download and return its DownloadJob
+
+        Blocks while max_pending jobs are already waiting, which keeps memory
+        bounded when URLs are streamed in faster than they download. Items
+        already recorded in the output folder's ledger are marked SKIPPED
+        without being queued. Every queued job is also persisted in the
+        ledger so resume_unfinished() can pick it up after a restart.
+        source is the collection URL a post was queued from, its files stay
+        in the output folder whatever the storage layout. attempts counts
+        the starts of an earlier session, so retries stop at max_retries.
+        """
+        job = DownloadJob(url, engine, output_dir, record_id, source)
+        job.attempts = attempts
+        if engine == AUTO:
+            # Also fails early for links no engine supports; the engine is picked again when the job starts
+            job.engine = self.downloader.plan(url, engine)[0]
+        if self.skip_downloaded and job.key and job.key in open_ledger(output_dir):
+            job.state = SKIPPED
+            job.progress = 1.0
+            job.message = "Already downloaded"
+            job.finished_at = job.created_at
+            with self._cond:
+                self._counts[SKIPPED] += 1
+            if record_id is not None:
+                open_ledger(output_dir).remove_job(record_id)
+            self.metrics.inc("jobs", engine=job.engine, state=SKIPPED)
+            self.metrics.event("job", id=job.id, url=url, engine=job.engine, outcome=SKIPPED)
+            self._notify(job)
+            return job
+
+        if job.record_id is None:
+            job.record_id = open_ledger(output_dir).add_job(url, engine, QUEUED, source)
+
+        with self._cond:
+            # close() also wakes submitters waiting for room in the queue
+            while self.max_pending and self._pending_count >= self.max_pending and not self._closed:
+                self._cond.wait()
+            if self._closed:
+                raise RuntimeError("Download queue has been shut down")
+            self._pending.setdefault(engine, deque()).append(job)
+            self._pending_count += 1
+            self._counts[QUEUED] += 1
+            self._cond.notify_all()
+        self._notify(job)
+        return job
+
+    def submit_all(self, url, engine, output_dir):
+        """Queue a URL, or each new post of a profile, tagged feed or hashtag
+
+        Collections are paged lazily on the calling thread, which blocks
+        while the queue is full, so huge profiles stream into the queue.
+        Paging stops at the first post already in the ledger. Returns the
+        number of jobs queued.
+        """
+        ledger = open_ledger(output_dir)
+        known = (lambda key: key in ledger) if self.skip_downloaded else (lambda key: False)
+        posts = self.downloader.expand(url, engine, output_dir, known)
+        if posts is None:
+            self.submit(url, engine, output_dir)
+            return 1
+
+        count = 0
+        for post_url in posts:
+            self.submit(post_url, engine, output_dir, source=url)
+            count += 1
+        self.logger.info(f"Queued {count} new post(s) from {url}")
+        return count
+
+    def resume_unfinished(self, output_dir):
+        """Queue jobs that were queued or running when the last run stopped
+
+        Returns the number of resumed jobs. Engines continue the partial
+        files that the interrupted attempt left behind. Jobs that failed for
+        good, with a permanent error or after max_retries, are not resumed.
+        """
+        rows = open_ledger(output_dir).unfinished_jobs((QUEUED, RUNNING))
+        for record_id, url, engine, attempts, source in rows:
+            self.logger.info(f"Resuming {url} (attempt {attempts + 1})")
+            self.submit(url, engine, output_dir, record_id=record_id, source=source, attempts=attempts)
+        return len(rows)
+
+    def pause(self, job):
+        """Pause a queued or running job until resume() is called
+
+        A running attempt is stopped and its partial files are kept, so the
+        engines continue them when the job is resumed. Returns False if the
+        job had already finished or was paused.
+        """
+        return self._stop(job, PAUSED)
+
+    def cancel(self, job):
+        """Cancel a queued, paused or running job and remove its partial files
+
+        Files the job completed before it was cancelled are kept. Returns
+        False if the job had already finished.
+        """
+        return self._stop(job, CANCELLED)
+
+    def resume(self, job):
+        """Queue a paused job again, ahead of the jobs submitted after it"""
+        with self._cond:
+            if job.state != PAUSED or self._paused.pop(job.id, None) is None:
+                return False
+            job.stop = threading.Event()
+            job.stop_reason = None
+            job.state = QUEUED
+            job.message = "Queued"
+            job.queued_at = time.monotonic()
+            self._pending.setdefault(job.requested, deque()).appendleft(job)
+            self._pending_count += 1
+            self._counts[PAUSED] -= 1
+            self._counts[QUEUED] += 1
+            self._cond.notify_all()
+        self._persist(job, lambda ledger: ledger.update_job(job.record_id, QUEUED))
+        self._notify(job)
+        return True
+
+    @property
+    def paused(self):
+        """True while the whole queue is paused, see pause_all()"""
+        return self._paused_all
+
+    @property
+    def low_space(self):
+        """The output folder the queue is paused for to wait for free space, or None"""
+        return self._low_space
+
+    def pause_all(self):
+        """Pause the running jobs and hold the queued ones until resume_all()"""
+        self._pause_all(None)
+
+    def _pause_all(self, low_space):
+        """Pause everything, returning True if the queue was already waiting for space"""
+        with self._cond:
+            waiting = self._low_space is not None
+            self._paused_all = True
+            self._low_space = low_space
+            running = list(self._taken.values())
+        for job in running:
+            self.pause(job)
+        return waiting
+
+    def resume_all(self):
+        """Resume every paused job and start handing out queued jobs again"""
+        with self._cond:
+            self._paused_all = False
+            self._low_space = None
+            paused = list(self._paused.values())
+            self._cond.notify_all()
+        for job in paused:
+            self.resume(job)
+
+    def cancel_all(self):
+        """Cancel every job that has not finished yet"""
+        with self._cond:
+            jobs = list(self._taken.values()) + list(self._paused.values())
+            jobs += [job for pending in self._pending.values() for job in pending]
+            jobs += [entry[2] for entry in self._delayed]
+        for job in jobs:
+            self.cancel(job)
+
+    def close(self, timeout=10.0):
+        """Pause everything and let the workers exit, for when the app quits
+
+        Engine processes are terminated and partial files kept; the ledger
+        still lists the unfinished jobs, so the next session can resume them.
+        Waits up to timeout seconds for the running attempts to stop.
+        """
+        self.pause_all()
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._low_space = None
+            self._closed = True
+            self._cond.notify_all()
+            while self._taken and time.monotonic() < deadline:
+                self._cond.wait(deadline - time.monotonic())
+        if self.transfers is not None:
+            self.transfers.shutdown(wait=False)
+        if self.postprocessor is not None:
+            self.postprocessor.shutdown(wait=False)
+
+    def counts(self):
+        """Return the number of jobs in each state"""
+        with self._cond:
+            return dict(self._counts)
+
+    def is_idle(self):
+        """Return True when no job is queued or running"""
+        with self._cond:
+            return self._pending_count == 0 and self._active == 0 and not self._delayed
+
+    def join(self, timeout=None):
+        """Wait until every submitted job has finished"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._pending_count or self._active or self._delayed:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def shutdown(self, wait=True):
+        """Stop accepting jobs and let the workers exit once the queue drains"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if wait:
+            for worker in self._workers:
+                worker.join()
+        # Posts resolved by now still get their files
+        if self.transfers is not None:
+            self.transfers.shutdown(wait)
+        if self.postprocessor is not None:
+            self.postprocessor.shutdown(wait)
+
+    def _engine_limit(self, engine):
+        return self.engine_limits.get(engine, self.max_workers)
+
+    def _take_job(self):
+        """Pop the oldest job whose engine has a free slot, or None on shutdown"""
+        with self._cond:
+            while True:
+                # Retries whose backoff has passed go to the front of their engine's line
+                now = time.monotonic()
+                while self._delayed and self._delayed[0][0] <= now:
+                    job = heapq.heappop(self._delayed)[2]
+                    job.queued_at = now
+                    self._pending.setdefault(job.requested, deque()).appendleft(job)
+                    self._pending_count += 1
+
+                candidate = None
+                for engine, pending in self._pending.items():
+                    if pending and engine == AUTO:
+                        engine = self._pick_engine(pending[0])
+                    if not pending or self._running.get(engine, 0) >= self._engine_limit(engine):
+                        continue
+                    if candidate is None or pending[0].id < candidate.id:
+                        candidate = pending[0]
+                if candidate is not None and not self._paused_all:
+                    self._pending[candidate.requested].popleft()
+                    self._pending_count -= 1
+                    self._running[candidate.engine] = self._running.get(candidate.engine, 0) + 1
+                    self._active += 1
+                    self._counts[QUEUED] -= 1
+                    self._counts[RUNNING] += 1
+                    candidate.state = RUNNING
+                    candidate.started_at = time.time()
+                    self._taken[candidate.id] = candidate
+                    self._cond.notify_all()
+                    return candidate
+                # Jobs still fetching may fail and come back for a retry, and
+                # jobs paused for lack of space come back once there is room
+                if (self._closed and not self._pending_count and not self._delayed and not self._active
+                        and not (self._low_space and self._paused)):
+                    return None
+                if self._closed and self._paused_all and self._low_space is None:
+                    return None
+                self._cond.wait(self._delayed[0][0] - now if self._delayed else None)
+
+    def _pick_engine(self, job):
+        """Choose the engine for the next attempt of an AUTO job from the current plan
+
+        Slots and rate limits are per engine, and the strategy's order may
+        have changed while the job waited, so the choice is made when the
+        job is about to start. The earlier choice stays if planning fails.
+        """
+        try:
+            job.engine = self.downloader.plan(job.url, AUTO)[0]
+        except Exception as e:
+            self.logger.warning(f"Could not plan {job.url}, keeping {job.engine}: {str(e)}")
+        return job.engine
+
+    def _worker_loop(self):
+        while True:
+            job = self._take_job()
+            if job is None:
+                return
+            self._notify(job)
+            self._run_job(job)
+
+    def _run_job(self, job):
+        job.timings = {}
+        job.processed = False
+        job.attempt_started = time.monotonic()
+        with self.metrics.trace(job.timings):
+            self.metrics.phase("queue_wait", job.attempt_started - job.queued_at, engine=job.engine)
+            self._run_attempt(job)
+
+    def _run_attempt(self, job):
+        if not self.writer.has_room(job.output_dir):
+            self._pause_for_space(job.output_dir)
+            if job.stop.is_set():
+                self._release_engine(job)
+                self._stopped(job, None)
+                return
+        self._persist(job, lambda ledger: ledger.update_job(job.record_id, RUNNING, attempt=True))
+
+        def progress(fraction, message, stats=None):
+            if fraction is not None:
+                job.progress = fraction
+            job.message = message
+            job.stats = stats
+            job.updated_at = time.time()
+            self._notify(job)
+
+        items = None
+        job.attempts += 1
+        self.limiter.acquire(job.engine)
+        try:
+            if job.stop.is_set():
+                raise InterruptedError("Stopped before it started")
+            if self.transfers is not None:
+                started = time.monotonic()
+                items = self.downloader.resolve(job.url, job.engine, job.output_dir, progress=progress)
+                if items is not None:
+                    self.metrics.phase("resolve", time.monotonic() - started, engine=job.engine)
+                    job.partial += [item.path for item in items]
+            if items is None:
+                started = time.monotonic()
+                files = self.downloader.download(job.url, job.engine, job.output_dir, progress=progress,
+                                                 cancel=job.stop) or []
+                self.metrics.phase("engine", time.monotonic() - started, engine=job.engine)
+        except Exception as e:
+            failure, retry_after = classify_error(e)
+            if failure == RATE_LIMITED:
+                self.logger.warning(f"{job.engine} is rate limited, slowing down")
+                self.limiter.throttle(job.engine, retry_after)
+            self._release_engine(job)
+            self._finish(job, [], e)
+            return
+
+        self.limiter.success(job.engine)
+
+        # The engine slot is free as soon as the post is resolved
+        self._release_engine(job)
+        if items is None:
+            self._finish(job, files, None)
+        else:
+            progress(None, f"Waiting to fetch {len(items)} file(s)...")
+            started = time.monotonic()
+
+            def on_done(files, error, hashes):
+                # Runs on a transfer thread, so the time goes into the job's timings directly
+                with self.metrics.trace(job.timings):
+                    self.metrics.phase("transfer", time.monotonic() - started, engine=job.engine)
+                self._finish(job, files, error, hashes)
+
+            try:
+                self.transfers.submit(items, on_done, progress, cancel=job.stop)
+            except Exception as e:
+                self._finish(job, [], e)
+
+    def _release_engine(self, job):
+        with self._cond:
+            self._running[job.engine] -= 1
+            self._cond.notify_all()
+
+    def _finish(self, job, files, error, hashes=None):
+        """Record the outcome of a job, on whichever thread completed it"""
+        if error is not None and not job.stop.is_set() and is_disk_full(error):
+            # Pauses this job too, it continues from its partial files later
+            self._pause_for_space(job.output_dir)
+        if error is not None and job.stop.is_set():
+            self._stopped(job, error)
+            return
+        if error is None and files and self.postprocessor is not None and not job.processed:
+            self._postprocess(job, files, hashes)
+            return
+        state = FAILED
+        job.files = files
+        if error is None:
+            try:
+                ledger = open_ledger(job.output_dir)
+                # Posts of a collection stay where the engines put them: the next sync of
+                # the profile stops at the first one it finds on disk (instaloader's
+                # --fast-update, gallery-dl's skip: abort), so moving them re-fetches it all
+                moved = job.key and job.source is None
+                if moved and self.layout == CONTENT_ADDRESSED:
+                    job.files, hashes = open_store(job.output_dir).store_files(job.key, job.files, hashes)
+                elif moved and self.layout == SHARDED:
+                    job.files, hashes = shard_files(job.output_dir, job.key, job.files, hashes, self.shard_levels)
+                # Files fetched here were flushed when renamed; flush what the engines wrote
+                # before the ledger lists it as complete
+                self.writer.commit([path for path in job.files if path not in (hashes or {})])
+                if job.key:
+                    ledger.record(job.key, job.url, job.engine, job.files, hashes)
+                ledger.remove_job(job.record_id)
+                job.bytes = sum(_file_size(path, hashes) for path in job.files)
+                state = DONE
+                job.error = None
+                job.progress = 1.0
+                job.message = "Download completed successfully!"
+            except Exception as e:
+                error = e
+
+        if error is not None and self._retry(job, error):
+            self._record_attempt(job, "retry", error)
+            return
+
+        if error is not None:
+            self.logger.error(f"Download failed for {job.url}: {str(error)}")
+            job.error = error
+            job.message = "Download failed!"
+            self._persist(job, lambda ledger: ledger.update_job(job.record_id, FAILED, error=str(error)[:1000]))
+        self._record_attempt(job, state, error)
+
+        job.finished_at = time.time()
+        with self._cond:
+            job.state = state
+            self._taken.pop(job.id, None)
+            self._active -= 1
+            self._counts[RUNNING] -= 1
+            self._counts[state] += 1
+            self._cond.notify_all()
+        self._notify(job)
+
+    def _postprocess(self, job, files, hashes):
+        """Hand a job's files to the post-processing stage, which finishes the job"""
+        job.processed = True
+        job.message = f"Processing {len(files)} file(s)..."
+        self._notify(job)
+        started = time.monotonic()
+
+        def on_done(processed, processed_hashes):
+            # Runs on the post-processing thread
+            with self.metrics.trace(job.timings):
+                self.metrics.phase("postprocess", time.monotonic() - started, engine=job.engine)
+            merged = {path: value for path, value in (hashes or {}).items() if path in processed}
+            merged.update(processed_hashes)
+            self._finish(job, processed, None, merged)
+
+        try:
+            self.postprocessor.submit(files, on_done)
+        except Exception as e:
+            self.logger.warning(f"Cannot post-process {job.url}: {str(e)}")
+            self._finish(job, files, None, hashes)
+
+    def _retry(self, job, error):
+        """Put a failed job back in the queue after a backoff, if it is worth it"""
+        job.failure, retry_after = classify_error(error)
+        if job.failure == PERMANENT or job.attempts > self.max_retries:
+            return False
+
+        delay = backoff_delay(job.attempts, self.retry_base_delay, self.retry_max_delay, retry_after)
+        self.logger.warning(f"Retrying {job.url} in {delay:.0f}s after {job.failure} error: {str(error)}")
+        job.error = error
+        job.message = f"Retrying in {delay:.0f}s (attempt {job.attempts + 1} of {self.max_retries + 1})"
+        self._persist(job, lambda ledger: ledger.update_job(job.record_id, QUEUED, error=str(error)[:1000]))
+        with self._cond:
+            job.state = QUEUED
+            self._taken.pop(job.id, None)
+            self._active -= 1
+            self._counts[RUNNING] -= 1
+            self._counts[QUEUED] += 1
+            heapq.heappush(self._delayed, (time.monotonic() + delay, job.id, job))
+            self._cond.notify_all()
+        self._notify(job)
+        return True
+
+    def _pause_for_space(self, output_dir):
+        """Pause the queue until the drive holding output_dir has room again"""
+        if not self._pause_all(output_dir):
+            self.logger.warning(f"Only {format_bytes(free_bytes(output_dir))} free for {output_dir}, pausing "
+                                f"downloads until {format_bytes(self.writer.min_free_bytes * RESUME_FACTOR)} "
+                                f"are free")
+            threading.Thread(target=self._watch_space, name="hikari-space-watch", daemon=True).start()
+
+    def _watch_space(self):
+        """Resume the queue once there is space again, unless it was resumed or closed meanwhile"""
+        while True:
+            time.sleep(SPACE_CHECK_INTERVAL)
+            with self._cond:
+                output_dir = self._low_space
+            if output_dir is None:
+                return
+            if self.writer.has_room(output_dir, RESUME_FACTOR):
+                self.logger.info(f"{format_bytes(free_bytes(output_dir))} free for {output_dir} again, "
+                                 f"resuming downloads")
+                self.resume_all()
+                return
+
+    def _stop(self, job, reason):
+        """Pause or cancel a job, see pause() and cancel()"""
+        with self._cond:
+            if job.finished or (job.state == PAUSED and reason == PAUSED):
+                return False
+            job.stop_reason = reason
+            job.stop.set()
+            if job.state == RUNNING:
+                # The worker or transfer thread sees the event and calls _stopped()
+                self._cond.notify_all()
+                return True
+            if job.state == PAUSED:
+                del self._paused[job.id]
+            else:
+                self._unqueue(job)
+            self._counts[job.state] -= 1
+            self._counts[reason] += 1
+            job.state = reason
+            job.message = "Paused" if reason == PAUSED else "Cancelled"
+            if reason == PAUSED:
+                self._paused[job.id] = job
+            else:
+                job.finished_at = time.time()
+            self._cond.notify_all()
+
+        if reason == CANCELLED:
+            remove_partial_files(job.partial)
+            self._persist(job, lambda ledger: ledger.remove_job(job.record_id))
+        self._notify(job)
+        return True
+
+    def _unqueue(self, job):
+        """Take a queued job out of its engine's line or the retry heap, holding the lock"""
+        try:
+            self._pending.get(job.requested, deque()).remove(job)
+            self._pending_count -= 1
+        except ValueError:
+            self._delayed = [entry for entry in self._delayed if entry[2] is not job]
+            heapq.heapify(self._delayed)
+
+    def _stopped(self, job, error):
+        """Finish an attempt that ended because the job was paused or cancelled"""
+        reason = job.stop_reason
+        # Engines report what they were writing, transfers know it from the start
+        job.partial = list(dict.fromkeys(job.partial + list(getattr(error, "files", None) or [])))
+        if reason == CANCELLED:
+            remove_partial_files(job.partial)
+            self._persist(job, lambda ledger: ledger.remove_job(job.record_id))
+            job.message = "Cancelled"
+        else:
+            # Queued in the ledger, so the next session offers to resume it
+            self._persist(job, lambda ledger: ledger.update_job(job.record_id, QUEUED))
+            job.message = "Paused"
+        self._record_attempt(job, reason)
+
+        with self._cond:
+            job.state = reason
+            self._taken.pop(job.id, None)
+            self._active -= 1
+            self._counts[RUNNING] -= 1
+            self._counts[reason] += 1
+            if reason == PAUSED:
+                self._paused[job.id] = job
+            else:
+                job.finished_at = time.time()
+            self._cond.notify_all()
+        self._notify(job)
+
+    def _record_attempt(self, job, outcome, error=None):
+        """Count a finished attempt and emit its structured job event"""
+        elapsed = time.monotonic() - job.attempt_started
+        self.metrics.observe("job", elapsed, engine=job.engine)
+        if error is not None:
+            self.metrics.inc("failures", engine=job.engine, failure=job.failure)
+        if outcome == "retry":
+            self.metrics.inc("retries", engine=job.engine, failure=job.failure)
+        else:
+            self.metrics.inc("jobs", engine=job.engine, state=outcome)
+        if job.bytes:
+            fetch = "native" if "transfer" in job.timings else "engine"
+            self.metrics.inc("bytes", job.bytes, engine=job.engine, fetch=fetch)
+        self.metrics.event(
+            "job", id=job.id, url=job.url, engine=job.engine, outcome=outcome, attempt=job.attempts,
+            seconds=round(elapsed, 3), timings={name: round(value, 3) for name, value in job.timings.items()},
+            files=len(job.files), bytes=job.bytes, failure=job.failure if error is not None else None,
+            error=str(error)[:300] if error is not None else None
+        )
+
+    def _persist(self, job, update):
+        """Apply update to the job's ledger without letting errors kill the worker"""
+        try:
+            update(open_ledger(job.output_dir))
+        except Exception as e:
+            self.logger.error(f"Could not save job state for {job.url}: {str(e)}")
+
+    def _notify(self, job):
+        if self.on_update is None:
+            return
+        try:
+            self.on_update(job)
+        except Exception as e:
+            self.logger.error(f"Job update callback failed: {str(e)}")
+
+
+def _file_size(path, hashes):
+    if hashes and path in hashes:
+        return hashes[path][0]
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
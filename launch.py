@@ -22,31 +22,30 @@ Checks dependencies and launches the application
 import sys
 import os
 import subprocess
-import importlib
+import importlib.util
 
 def check_dependency(package_name, import_name=None, install_command=None):
-    """Check if a dependency is available"""
+    """Check if a dependency is installed, without importing it"""
     if import_name is None:
         import_name = package_name
     
-    try:
-        importlib.import_module(import_name)
+    if importlib.util.find_spec(import_name) is not None:
         return True
-    except ImportError:
-        if install_command:
-            print(f"❌ {package_name} not found")
-            response = input(f"Install {package_name}? (y/n): ").lower().strip()
-            if response in ['y', 'yes']:
-                try:
-                    subprocess.check_call([sys.executable, "-m", "pip", "install", install_command])
-                    print(f"✅ {package_name} installed successfully")
-                    return True
-                except subprocess.CalledProcessError:
-                    print(f"❌ Failed to install {package_name}")
-                    return False
-            else:
+    
+    if install_command:
+        print(f"❌ {package_name} not found")
+        response = input(f"Install {package_name}? (y/n): ").lower().strip()
+        if response in ['y', 'yes']:
+            try:
+                subprocess.check_call([sys.executable, "-m", "pip", "install", install_command])
+                print(f"✅ {package_name} installed successfully")
+                return True
+            except subprocess.CalledProcessError:
+                print(f"❌ Failed to install {package_name}")
                 return False
-        return False
+        else:
+            return False
+    return False
 
 def main():
     print("🚀 Hikari Insta Downloader - Smart Launcher")
@@ -79,28 +78,9 @@ def main():
         print("Please install them manually or run: python install.py")
         return False
     
-    # Check download engines (optional but recommended)
-    print("\n🔧 Checking download engines...")
-    engines = ["yt-dlp", "instaloader", "gallery-dl"]
-    available_engines = []
-    
-    for engine in engines:
-        try:
-            subprocess.run([engine, "--version"], 
-                          capture_output=True, 
-                          check=True, 
-                          timeout=3)
-            print(f"✅ {engine} - Available")
-            available_engines.append(engine)
-        except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
-            print(f"⚠️  {engine} - Not available")
-    
-    if not available_engines:
-        print("\n⚠️  No download engines found!")
-        print("Install at least one: pip install yt-dlp instaloader gallery-dl")
-        response = input("Continue anyway? (y/n): ").lower().strip()
-        if response not in ['y', 'yes']:
-            return False
+    # Download engines are probed in the background once the window is up;
+    # the status line says so if none is installed
+    print("\n🔧 Download engines will be checked once the window is open")
     
     # Create Downloads folder
     downloads_folder = os.path.join(os.getcwd(), "Downloads")
@@ -114,13 +94,13 @@ def main():
     
     try:
         # Import and run the main application
-        from main import HikariDownloader
+        from gui import HikariDownloader
         app = HikariDownloader()
         app.run()
         return True
     except ImportError as e:
         print(f"❌ Failed to import main application: {e}")
-        print("Make sure main.py is in the same directory")
+        print("Make sure gui.py is in the same directory")
         return False
     except Exception as e:
         print(f"❌ Application error: {e}")
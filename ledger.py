@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Hikari Insta Downloader - Download Ledger
+Copyright (C) 2025 Gary19gts
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+Records what has been downloaded into an output folder so it is not fetched
+again, and which jobs are still pending so an interrupted run can resume
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from url_classifier import parse_instagram_url
+
+LEDGER_FILENAME = ".hikari_ledger.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS downloads (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    engine TEXT NOT NULL,
+    downloaded_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    key TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER,
+    sha256 TEXT,
+    PRIMARY KEY (key, path)
+);
+CREATE INDEX IF NOT EXISTS files_sha256 ON files (sha256);
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL,
+    engine TEXT NOT NULL,
+    source TEXT,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+def content_key(url):
+    """Return the canonical ledger key for an Instagram URL, or None
+
+    Profiles, hashtags and other collections have no key: they keep getting
+    new posts, so only their posts are recorded.
+    """
+    parsed = parse_instagram_url(url)
+    return parsed.key if parsed and not parsed.is_collection else None
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """Hash a file in chunks so large videos are never read into memory at once"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DownloadLedger:
+    """SQLite ledger of downloaded items, stored inside the output folder
+
+    All keys are loaded into memory when the ledger is opened, so checking
+    whether an item was already downloaded is a set lookup.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        if "source" not in {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}:
+            # Ledgers written before jobs remembered the collection they came from
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN source TEXT")
+        self._keys = {row[0] for row in self._conn.execute("SELECT key FROM downloads")}
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __len__(self):
+        return len(self._keys)
+
+    def record(self, key, url, engine, files=(), hashes=None):
+        """Store a finished download together with the size and hash of its files
+
+        hashes maps path to (size, sha256) for files already hashed while
+        they were written; the others are read once here.
+        """
+        hashes = hashes or {}
+        rows = []
+        for path in files:
+            try:
+                size, sha256 = hashes.get(path) or (os.path.getsize(path), file_sha256(path))
+            except OSError:
+                continue
+            rows.append((key, path, size, sha256))
+
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO downloads (key, url, engine, downloaded_at) VALUES (?, ?, ?, ?)",
+                    (key, url, engine, time.time())
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO files (key, path, size, sha256) VALUES (?, ?, ?, ?)",
+                    rows
+                )
+            self._keys.add(key)
+
+    def forget(self, key):
+        """Remove an item so it is downloaded again next time"""
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM files WHERE key = ?", (key,))
+                self._conn.execute("DELETE FROM downloads WHERE key = ?", (key,))
+            self._keys.discard(key)
+
+    def files(self, key):
+        """Return [(path, size, sha256)] recorded for key"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT path, size, sha256 FROM files WHERE key = ?", (key,)
+            ).fetchall()
+
+    def find_hash(self, sha256):
+        """Return [(key, path)] of every recorded file with this content"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT key, path FROM files WHERE sha256 = ? ORDER BY key", (sha256,)
+            ).fetchall()
+
+    def duplicates(self):
+        """Return [(sha256, size, paths)] for content recorded more than once"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT sha256, size, group_concat(path, '\n') FROM files WHERE sha256 IS NOT NULL "
+                "GROUP BY sha256 HAVING count(*) > 1 ORDER BY size DESC"
+            ).fetchall()
+        return [(sha256, size, paths.split("\n")) for sha256, size, paths in rows]
+
+    def add_job(self, url, engine, state, source=None):
+        """Persist a queued job and return its id
+
+        source is the collection URL a post was queued from, if any.
+        """
+        with self._lock:
+            with self._conn:
+                cursor = self._conn.execute(
+                    "INSERT INTO jobs (url, engine, source, state, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    (url, engine, source, state, time.time())
+                )
+            return cursor.lastrowid
+
+    def update_job(self, job_id, state, error=None, attempt=False):
+        """Store a job's new state; attempt=True counts another start"""
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "UPDATE jobs SET state = ?, error = ?, attempts = attempts + ?, updated_at = ? WHERE id = ?",
+                    (state, error, 1 if attempt else 0, time.time(), job_id)
+                )
+
+    def remove_job(self, job_id):
+        """Forget a job once its download is in the ledger"""
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def unfinished_jobs(self, states):
+        """Return [(id, url, engine, attempts, source)] for jobs left in one of states"""
+        placeholders = ", ".join("?" for _ in states)
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT id, url, engine, attempts, source FROM jobs WHERE state IN ({placeholders}) ORDER BY id",
+                tuple(states)
+            ).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_ledgers = {}
+_ledgers_lock = threading.Lock()
+
+
+def open_ledger(output_dir):
+    """Return the shared ledger for an output folder, opening it on first use"""
+    path = os.path.join(os.path.abspath(output_dir), LEDGER_FILENAME)
+    with _ledgers_lock:
+        ledger = _ledgers.get(path)
+        if ledger is None:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            ledger = _ledgers[path] = DownloadLedger(path)
+        return ledger
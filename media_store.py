@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Hikari Insta Downloader - Media Store
+Copyright (C) 2025 Gary19gts
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+Content-addressed storage: every distinct file is kept once and linked into
+readable per-post folders
+"""
+
+import glob
+import hashlib
+import os
+import shutil
+import sys
+import threading
+
+from ledger import file_sha256
+from output_writer import default_writer
+
+STORE_DIRNAME = ".hikari_store"
+
+# Output layouts, chosen with "storage": {"layout": ...} in config.json
+FLAT = "flat"
+CONTENT_ADDRESSED = "content_addressed"
+# Files spread over <output>/<ab>/<cd>/ by a hash of their post
+SHARDED = "sharded"
+
+DEFAULT_SHARD_LEVELS = 2
+
+_FICLONE = 0x40049409
+
+
+def _reflink(src, dst):
+    """Copy-on-write clone of src at dst (Btrfs, XFS), raising OSError if unsupported"""
+    if not sys.platform.startswith("linux"):
+        raise OSError("reflinks are only supported on Linux")
+    import fcntl
+    with open(src, 'rb') as source, open(dst, 'wb') as target:
+        try:
+            fcntl.ioctl(target.fileno(), _FICLONE, source.fileno())
+        except OSError:
+            target.close()
+            os.remove(dst)
+            raise
+
+
+def link_or_copy(src, dst):
+    """Make dst share src's data: a hardlink, else a reflink, else a plain copy
+
+    Returns "hardlink", "reflink" or "copy".
+    """
+    try:
+        os.link(src, dst)
+        return "hardlink"
+    except OSError:
+        pass
+    try:
+        _reflink(src, dst)
+        return "reflink"
+    except OSError:
+        shutil.copy2(src, dst)
+        return "copy"
+
+
+def post_folder(key):
+    """Readable folder name for a ledger key: the shortcode, or story_<id>"""
+    kind, _, ident = key.partition(":")
+    return ident if kind == "post" else f"{kind}_{ident}"
+
+
+def shard_folder(output_dir, key, levels=DEFAULT_SHARD_LEVELS):
+    """Folder of a ledger key in the sharded layout, e.g. <output>/3f/a2
+
+    Each level adds 256 folders, so two levels keep every folder at a few
+    dozen entries even with millions of files.
+    """
+    digest = hashlib.sha1(key.encode()).hexdigest()
+    return os.path.join(output_dir, *(digest[2 * i:2 * i + 2] for i in range(levels)))
+
+
+def shard_files(output_dir, key, files, hashes=None, levels=DEFAULT_SHARD_LEVELS):
+    """Move a job's files into its shard folder, see shard_folder()
+
+    Files next to them with the same name and another extension, such as
+    the .info.json and thumbnail yt-dlp writes, move along. Returns (paths,
+    hashes) for the files' new places.
+    """
+    hashes = hashes or {}
+    folder = shard_folder(output_dir, key, levels)
+    os.makedirs(folder, exist_ok=True)
+    moved_paths = []
+    moved_hashes = {}
+    for path in files:
+        dest = os.path.join(folder, os.path.basename(path))
+        if os.path.dirname(os.path.abspath(path)) != os.path.abspath(folder):
+            companions = glob.glob(glob.escape(os.path.splitext(path)[0]) + ".*")
+            for companion in companions:
+                if companion not in files and os.path.isfile(companion):
+                    default_writer.finalize(companion, os.path.join(folder, os.path.basename(companion)))
+            default_writer.finalize(path, dest)
+        moved_paths.append(dest)
+        if path in hashes:
+            moved_hashes[dest] = hashes[path]
+    return moved_paths, moved_hashes
+
+
+class MediaStore:
+    """Objects named by their sha256 inside <output>/.hikari_store
+
+    Files are moved into the store and hardlinked back into one folder per
+    post, so the same photo downloaded by two engines, or reposted by
+    another account, takes disk space once. The ledger's files table,
+    indexed by sha256, is the hash index.
+    """
+
+    def __init__(self, output_dir):
+        self.output_dir = os.path.abspath(output_dir)
+        self.objects_dir = os.path.join(self.output_dir, STORE_DIRNAME, "objects")
+        self._lock = threading.Lock()
+
+    def object_path(self, sha256, extension=""):
+        return os.path.join(self.objects_dir, sha256[:2], sha256 + extension.lower())
+
+    def add(self, path, sha256, dest):
+        """Store path under its hash and link it at dest; returns True if it was a duplicate"""
+        obj = self.object_path(sha256, os.path.splitext(path)[1])
+        os.makedirs(os.path.dirname(obj), exist_ok=True)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        with self._lock:
+            duplicate = os.path.exists(obj)
+            if not duplicate:
+                default_writer.finalize(path, obj)
+            if not (os.path.exists(dest) and os.path.samefile(dest, obj)):
+                temp = dest + ".link"
+                if os.path.exists(temp):
+                    os.remove(temp)
+                link_or_copy(obj, temp)
+                default_writer.finalize(temp, dest)
+            if os.path.exists(path) and os.path.abspath(path) != os.path.abspath(dest):
+                os.remove(path)
+        return duplicate
+
+    def store_files(self, key, files, hashes=None):
+        """Move a job's files into the store
+
+        hashes maps path to (size, sha256) for files hashed while they were
+        written; the others are hashed here. Returns (paths, hashes) for the
+        files' new places in the post folder.
+        """
+        hashes = hashes or {}
+        folder = os.path.join(self.output_dir, post_folder(key))
+        stored_paths = []
+        stored_hashes = {}
+        for path in files:
+            size, sha256 = hashes.get(path) or (os.path.getsize(path), file_sha256(path))
+            dest = os.path.join(folder, os.path.basename(path))
+            self.add(path, sha256, dest)
+            stored_paths.append(dest)
+            stored_hashes[dest] = (size, sha256)
+        return stored_paths, stored_hashes
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def open_store(output_dir):
+    """Return the shared MediaStore for an output folder"""
+    path = os.path.abspath(output_dir)
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = MediaStore(path)
+        return store
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Hikari Insta Downloader - Job Metrics
+Copyright (C) 2025 Gary19gts
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+Per-job timings as JSON events, plus counters and histograms that can be
+read in the diagnostics window, scraped as Prometheus text or written to a
+snapshot file
+"""
+
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds in seconds; the last bucket catches everything above
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+# Phases of a job attempt, in the order they happen
+PHASES = ("queue_wait", "engine_startup", "resolve", "engine", "transfer", "postprocess")
+
+_PHASE_HELP = {
+    "queue_wait": "Time a job waited in the queue before a worker took it",
+    "engine_startup": "Time until a download engine process answered or an engine object was built",
+    "resolve": "Time spent resolving a post into media URLs",
+    "engine": "Time a download engine spent downloading a post itself",
+    "transfer": "Time spent fetching resolved media files",
+    "postprocess": "Time finished files waited for and spent in post-processing",
+    "job": "Time from taking a job to its final outcome, per attempt",
+}
+
+_COUNTER_HELP = {
+    "jobs": "Finished jobs by final state",
+    "retries": "Job attempts that failed and were scheduled again",
+    "failures": "Failed job attempts by failure class",
+    "bytes": "Bytes of media written",
+    "engine_attempts": "Download attempts per engine by outcome, including fallbacks and races",
+}
+
+
+class Histogram:
+    """Fixed-bucket histogram of observed values"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Estimate a quantile as the upper bound of the bucket it falls in"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return self.buckets[index] if index < len(self.buckets) else float("inf")
+        return float("inf")
+
+
+class Metrics:
+    """Thread-safe counters and histograms keyed by name and labels
+
+    Workers call observe() and inc() directly. phase() also adds the time to
+    the trace of the job the calling thread is working on, see trace().
+    """
+
+    def __init__(self, logger=None):
+        self.logger = logger or logging.getLogger("hikari.metrics")
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._local = threading.local()
+        self._events_path = None
+        self._events = None
+        self._server = None
+        self._snapshot_thread = None
+
+    def configure(self, config, directory="."):
+        """Apply the "metrics" section of config.json
+
+        Opens the events file and starts the Prometheus endpoint and the
+        snapshot writer if configured. Calling it again only changes the
+        events file.
+        """
+        settings = config.get("metrics", {})
+        events_file = settings.get("events_file", "hikari_events.jsonl")
+        with self._lock:
+            self._events_path = os.path.join(directory, events_file) if events_file else None
+            if self._events is not None:
+                self._events.close()
+                self._events = None
+
+        port = settings.get("prometheus_port", 0)
+        if port and self._server is None:
+            try:
+                self.serve_prometheus(port, settings.get("prometheus_host", "127.0.0.1"))
+            except OSError as e:
+                self.logger.error(f"Cannot serve metrics on port {port}: {str(e)}")
+
+        snapshot_file = settings.get("snapshot_file")
+        if snapshot_file and self._snapshot_thread is None:
+            self.write_snapshots(os.path.join(directory, snapshot_file), settings.get("snapshot_interval", 30))
+        return self
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def trace(self, timings):
+        """Collect phase() calls made on this thread into the timings dict"""
+        previous = getattr(self._local, "timings", None)
+        self._local.timings = timings
+        try:
+            yield timings
+        finally:
+            self._local.timings = previous
+
+    def phase(self, name, seconds, **labels):
+        """Record how long a phase of the current job took"""
+        self.observe(name, seconds, **labels)
+        timings = getattr(self._local, "timings", None)
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + seconds
+
+    def event(self, kind, **fields):
+        """Write one structured event as a JSON line"""
+        record = {"event": kind, "ts": round(time.time(), 3)}
+        record.update(fields)
+        line = json.dumps(record, default=str)
+        self.logger.debug(line)
+        with self._lock:
+            if self._events_path is None:
+                return
+            try:
+                if self._events is None:
+                    self._events = open(self._events_path, "a", encoding="utf-8", buffering=1)
+                self._events.write(line + "\n")
+            except OSError as e:
+                self._events_path = None
+                self.logger.error(f"Cannot write metrics events: {str(e)}")
+
+    def counter(self, name, **labels):
+        """Sum of a counter over every label set matching labels"""
+        wanted = set(labels.items())
+        with self._lock:
+            return sum(value for (counter, key), value in self._counters.items()
+                       if counter == name and wanted <= set(key))
+
+    def histogram(self, name, **labels):
+        """Merge the histograms of name whose labels match into one"""
+        wanted = set(labels.items())
+        merged = Histogram()
+        with self._lock:
+            for (histogram_name, key), histogram in self._histograms.items():
+                if histogram_name == name and wanted <= set(key):
+                    merged.counts = [a + b for a, b in zip(merged.counts, histogram.counts)]
+                    merged.count += histogram.count
+                    merged.sum += histogram.sum
+        return merged
+
+    def snapshot(self):
+        """Return every counter and histogram as plain data"""
+        with self._lock:
+            counters = [{"name": name, "labels": dict(key), "value": value}
+                        for (name, key), value in sorted(self._counters.items())]
+            histograms = [{"name": name, "labels": dict(key), "count": h.count, "sum": h.sum,
+                           "buckets": dict(zip([str(b) for b in h.buckets] + ["+Inf"], h.counts))}
+                          for (name, key), h in sorted(self._histograms.items())]
+        return {"ts": round(time.time(), 3), "counters": counters, "histograms": histograms}
+
+    def prometheus_text(self):
+        """Render the metrics in the Prometheus text exposition format"""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, h.buckets, list(h.counts), h.count, h.sum)
+                                for key, h in self._histograms.items())
+
+        lines = []
+        described = set()
+        for (name, labels), value in counters:
+            metric = f"hikari_{name}_total"
+            if metric not in described:
+                described.add(metric)
+                lines.append(f"# HELP {metric} {_COUNTER_HELP.get(name, name)}")
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{_labels(labels)} {value}")
+        for (name, labels), buckets, counts, count, total in histograms:
+            metric = f"hikari_{name}_seconds"
+            if metric not in described:
+                described.add(metric)
+                lines.append(f"# HELP {metric} {_PHASE_HELP.get(name, name)}")
+                lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, bucket_count in zip(list(buckets) + ["+Inf"], counts):
+                cumulative += bucket_count
+                lines.append(f"{metric}_bucket{_labels(labels + (('le', str(bound)),))} {cumulative}")
+            lines.append(f"{metric}_sum{_labels(labels)} {total}")
+            lines.append(f"{metric}_count{_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def summary_lines(self):
+        """Human readable aggregates for the diagnostics window and the CLI"""
+        from progress import format_bytes
+
+        lines = [
+            f"Jobs: {self.counter('jobs', state='done')} done, {self.counter('jobs', state='failed')} failed, "
+            f"{self.counter('jobs', state='skipped')} skipped, {self.counter('retries')} retried",
+            f"Downloaded: {format_bytes(self.counter('bytes'))}",
+        ]
+        for name in PHASES + ("job",):
+            histogram = self.histogram(name)
+            if histogram.count:
+                lines.append(f"{name.replace('_', ' ').capitalize():<15} "
+                             f"p50 ≤ {_seconds(histogram.quantile(0.5))}  "
+                             f"p95 ≤ {_seconds(histogram.quantile(0.95))}  "
+                             f"avg {_seconds(histogram.sum / histogram.count)}  (n={histogram.count})")
+        with self._lock:
+            failures = {}
+            for (name, labels), value in self._counters.items():
+                if name == "failures":
+                    failure = dict(labels).get("failure", "unknown")
+                    failures[failure] = failures.get(failure, 0) + value
+        if failures:
+            lines.append("Failures: " + ", ".join(f"{name} {count}" for name, count in sorted(failures.items())))
+        return lines
+
+    def serve_prometheus(self, port, host="127.0.0.1"):
+        """Serve prometheus_text() at /metrics on a daemon thread"""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="hikari-metrics", daemon=True).start()
+        self.logger.info(f"Serving metrics on http://{host}:{self._server.server_address[1]}/metrics")
+        return self._server
+
+    def write_snapshots(self, path, interval=30):
+        """Rewrite a JSON snapshot file every interval seconds on a daemon thread"""
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.write_snapshot(path)
+                except OSError as e:
+                    self.logger.error(f"Cannot write metrics snapshot: {str(e)}")
+
+        self._snapshot_thread = threading.Thread(target=run, name="hikari-metrics-snapshot", daemon=True)
+        self._snapshot_thread.start()
+        return self._snapshot_thread
+
+    def write_snapshot(self, path):
+        temp = path + ".tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2)
+        os.replace(temp, path)
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _seconds(value):
+    if value is None:
+        return "-"
+    if value == float("inf"):
+        return f">{DEFAULT_BUCKETS[-1]}s"
+    return f"{value * 1000:.0f}ms" if value < 1 else f"{value:.1f}s"
+
+
+# Shared metrics for the whole process
+default_metrics = Metrics()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Hikari Insta Downloader - Output Writer
+Copyright (C) 2025 Gary19gts
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+How finished files reach their place in the output folder: atomic renames
+from temporary files, fsync policies and free space checks
+"""
+
+import errno
+import os
+import shutil
+
+# fsync policies, chosen with "storage": {"fsync": ...} in config.json
+FSYNC_NONE = "none"
+# Flush each file to disk before it is renamed to its final name
+FSYNC_FILES = "files"
+# Also flush the directory, so the rename itself survives a power cut
+FSYNC_FULL = "full"
+
+DEFAULT_MIN_FREE_BYTES = 1024 ** 3
+# A queue paused for lack of space resumes once this much more is free
+RESUME_FACTOR = 1.5
+
+# Windows ERROR_HANDLE_DISK_FULL and ERROR_DISK_FULL
+_WINERROR_DISK_FULL = (39, 112)
+_DISK_FULL_MESSAGES = ("no space left on device", "not enough space on the disk", "disk quota exceeded")
+
+
+def sync_file(path):
+    """Flush a file's data to disk"""
+    with open(path, 'rb+') as f:
+        os.fsync(f.fileno())
+
+
+def sync_directory(path):
+    """Flush a directory entry, e.g. after a rename; a no-op where unsupported"""
+    if os.name == "nt":
+        # Windows cannot open directories, NTFS journals renames itself
+        return
+    fd = os.open(path or ".", os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def finalize(temp, dest, fsync=FSYNC_NONE):
+    """Atomically rename a finished temporary file to dest, flushing it as fsync says"""
+    if fsync != FSYNC_NONE:
+        sync_file(temp)
+    os.replace(temp, dest)
+    if fsync == FSYNC_FULL:
+        sync_directory(os.path.dirname(dest))
+    return dest
+
+
+def free_bytes(directory):
+    """Free space on the drive holding directory, which need not exist yet"""
+    directory = os.path.abspath(directory)
+    while not os.path.exists(directory):
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            break
+        directory = parent
+    return shutil.disk_usage(directory).free
+
+
+def is_disk_full(error):
+    """True if error, or an error it was raised from, means the disk is full"""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, OSError) and (error.errno in (errno.ENOSPC, getattr(errno, "EDQUOT", None))
+                                           or getattr(error, "winerror", None) in _WINERROR_DISK_FULL):
+            return True
+        if any(message in str(error).lower() for message in _DISK_FULL_MESSAGES):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+class OutputWriter:
+    """Durability and free space rules for everything written to the output folder
+
+    Files fetched by the app are written to temporary names and renamed with
+    finalize(). Engines write part files themselves; commit() flushes what
+    they reported before the ledger records it. has_room() is the admission
+    check the download queue makes before starting a job.
+    """
+
+    def __init__(self, fsync=FSYNC_NONE, min_free_bytes=DEFAULT_MIN_FREE_BYTES):
+        self.fsync = fsync
+        self.min_free_bytes = min_free_bytes
+
+    def configure(self, config):
+        """Apply the "storage" section of config.json"""
+        storage = config.get("storage", {})
+        self.fsync = storage.get("fsync", FSYNC_NONE)
+        self.min_free_bytes = int(storage.get("min_free_mb", DEFAULT_MIN_FREE_BYTES // 1024 ** 2) * 1024 ** 2)
+        return self
+
+    def finalize(self, temp, dest):
+        return finalize(temp, dest, self.fsync)
+
+    def commit(self, paths):
+        """Flush files written by an engine, as the fsync policy says"""
+        if self.fsync == FSYNC_NONE:
+            return
+        directories = set()
+        for path in paths:
+            try:
+                sync_file(path)
+            except OSError:
+                continue
+            directories.add(os.path.dirname(path))
+        if self.fsync == FSYNC_FULL:
+            for directory in directories:
+                sync_directory(directory)
+
+    def has_room(self, directory, factor=1.0):
+        """True if the drive holding directory has at least factor * min_free_bytes free"""
+        if self.min_free_bytes <= 0:
+            return True
+        try:
+            return free_bytes(directory) >= self.min_free_bytes * factor
+        except OSError:
+            # Unknown free space never blocks downloads
+            return True
+
+
+# Shared writer for the whole process, configured by the Downloader
+default_writer = OutputWriter()
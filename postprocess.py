@@ -0,0 +1,495 @@
+#!/usr/bin/env python3
+"""
+Hikari Insta Downloader - Post-Processing
+Copyright (C) 2025 Gary19gts
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+Converts, cleans up and remuxes downloaded files in a pool of worker
+processes, after the download threads are done with them
+"""
+
+import hashlib
+import json
+import logging
+import lzma
+import os
+import shutil
+import subprocess
+import threading
+from collections import deque, namedtuple
+
+from output_writer import FSYNC_NONE, finalize
+
+# What happens to metadata files next to the media, see consolidate_sidecars()
+KEEP = "keep"
+CONSOLIDATE = "consolidate"
+DELETE = "delete"
+
+# Video modes: copy the streams into a new container, or re-encode them
+REMUX = "remux"
+TRANSCODE = "transcode"
+
+# Image format name -> (Pillow format, file extension)
+IMAGE_FORMATS = {
+    "jpeg": ("JPEG", ".jpg"),
+    "webp": ("WEBP", ".webp"),
+    "avif": ("AVIF", ".avif"),
+    "png": ("PNG", ".png"),
+}
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".avif")
+VIDEO_EXTENSIONS = (".mp4", ".m4v", ".mov", ".mkv", ".webm")
+# Longest first, so "x.info.json" is not taken for a plain ".json"
+SIDECAR_SUFFIXES = (".info.json", ".json.xz", ".json", ".txt")
+METADATA_SUFFIX = ".meta.json"
+
+# ffmpeg muxer per output container
+CONTAINERS = {"mp4": "mp4", "m4v": "mp4", "mov": "mov", "mkv": "matroska", "webm": "webm"}
+
+# Metadata segments dropped from JPEGs: APP1 (EXIF, XMP), APP13 (IPTC), comments
+_JPEG_METADATA_MARKERS = (0xE1, 0xED, 0xFE)
+
+ProcessingOptions = namedtuple(
+    "ProcessingOptions",
+    "image_format image_quality strip_metadata video container video_codec audio_codec video_crf sidecars ffmpeg "
+    "fsync"
+)
+ProcessingOptions.__new__.__defaults__ = ("", 85, False, "", "mp4", "libx264", "aac", 23, KEEP, None, FSYNC_NONE)
+
+
+def _lower_priority():
+    """Pool initializer: let downloads and the UI win over CPU-heavy conversions"""
+    if hasattr(os, "nice"):
+        try:
+            os.nice(10)
+        except OSError:
+            pass
+
+
+def _hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return os.path.getsize(path), digest.hexdigest()
+
+
+def _finalize(temp, path, dest, fsync):
+    """Move the finished temp file to dest and drop path if it was renamed"""
+    finalize(temp, dest, fsync)
+    if os.path.abspath(dest) != os.path.abspath(path):
+        os.remove(path)
+    return dest
+
+
+def strip_jpeg_metadata(data):
+    """Return the JPEG bytes without EXIF, XMP, IPTC and comments, without re-encoding"""
+    if data[:2] != b"\xff\xd8":
+        raise ValueError("Not a JPEG file")
+    parts = [data[:2]]
+    i = 2
+    while i < len(data):
+        if data[i] != 0xFF:
+            raise ValueError("Corrupt JPEG segment")
+        marker = data[i + 1]
+        if marker == 0xFF:
+            # Fill byte before a marker
+            i += 1
+            continue
+        if marker == 0xDA:
+            # Start of scan: the compressed image follows up to the end
+            parts.append(data[i:])
+            break
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            parts.append(data[i:i + 2])
+            i += 2
+            continue
+        length = int.from_bytes(data[i + 2:i + 4], "big")
+        if marker not in _JPEG_METADATA_MARKERS:
+            parts.append(data[i:i + 2 + length])
+        i += 2 + length
+    return b"".join(parts)
+
+
+def process_image(path, options):
+    """Convert an image to options.image_format and/or strip its metadata
+
+    Returns the path of the result. Runs in a worker process.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    image_format, target = IMAGE_FORMATS.get(options.image_format, (None, None))
+    if target is None or target == extension or (target == ".jpg" and extension == ".jpeg"):
+        if not options.strip_metadata:
+            return path
+        if extension in (".jpg", ".jpeg"):
+            # JPEGs are stripped losslessly
+            with open(path, 'rb') as f:
+                data = strip_jpeg_metadata(f.read())
+            temp = path + ".tmp"
+            with open(temp, 'wb') as f:
+                f.write(data)
+            return _finalize(temp, path, path, options.fsync)
+        image_format, target = {".png": ("PNG", ".png"), ".webp": ("WEBP", ".webp"),
+                                ".avif": ("AVIF", ".avif")}[extension]
+
+    from PIL import Image
+
+    dest = os.path.splitext(path)[0] + target
+    temp = dest + ".tmp"
+    with Image.open(path) as image:
+        image.load()
+        exif = image.info.get("exif")
+        if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        save_options = {"quality": options.image_quality}
+        if exif and not options.strip_metadata:
+            save_options["exif"] = exif
+        try:
+            image.save(temp, image_format, **save_options)
+        except Exception:
+            if os.path.exists(temp):
+                os.remove(temp)
+            raise
+    return _finalize(temp, path, dest, options.fsync)
+
+
+def process_video(path, options):
+    """Remux or transcode a video with ffmpeg, or only strip its metadata
+
+    Returns the path of the result. Runs in a worker process.
+    """
+    container = options.container if options.video else os.path.splitext(path)[1][1:].lower()
+    dest = f"{os.path.splitext(path)[0]}.{container}"
+    temp = dest + ".tmp"
+    cmd = [options.ffmpeg, "-y", "-nostdin", "-loglevel", "error", "-i", path, "-map", "0"]
+    if options.video == TRANSCODE:
+        cmd += ["-c:v", options.video_codec, "-crf", str(options.video_crf), "-c:a", options.audio_codec]
+    else:
+        cmd += ["-c", "copy"]
+    if options.strip_metadata:
+        cmd += ["-map_metadata", "-1"]
+    if CONTAINERS.get(container) in ("mp4", "mov"):
+        # Index up front, so players can start before the whole file is read
+        cmd += ["-movflags", "+faststart"]
+    cmd += ["-f", CONTAINERS.get(container, container), temp]
+    result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        if os.path.exists(temp):
+            os.remove(temp)
+        error = result.stderr.decode(errors="replace").strip().splitlines()
+        raise RuntimeError(f"ffmpeg failed: {error[-1] if error else result.returncode}")
+    return _finalize(temp, path, dest, options.fsync)
+
+
+def process_file(path, options):
+    """Process one media file; returns (path, size, sha256) of the result"""
+    if path.lower().endswith(VIDEO_EXTENSIONS):
+        path = process_video(path, options)
+    else:
+        path = process_image(path, options)
+    size, sha256 = _hash(path)
+    return path, size, sha256
+
+
+def _read_sidecar(path):
+    if path.endswith(".json.xz"):
+        with lzma.open(path, 'rt', encoding="utf-8") as f:
+            return json.load(f)
+    with open(path, 'r', encoding="utf-8", errors="replace") as f:
+        if path.endswith(".json"):
+            return json.load(f)
+        return f.read()
+
+
+def consolidate_sidecars(media, sidecars, mode, fsync=FSYNC_NONE):
+    """Merge or delete the metadata files of one post
+
+    With CONSOLIDATE every JSON and caption file is collected into one
+    <first media file>.meta.json; with DELETE they are removed. Returns the
+    files that remain, including the new metadata file. Runs in a worker
+    process.
+    """
+    remaining = []
+    if mode == CONSOLIDATE and media:
+        metadata = {}
+        merged = []
+        for path in sidecars:
+            if not path.lower().endswith(SIDECAR_SUFFIXES):
+                # Thumbnails stay next to their video
+                remaining.append(path)
+                continue
+            try:
+                metadata[os.path.basename(path)] = _read_sidecar(path)
+                merged.append(path)
+            except (OSError, ValueError, lzma.LZMAError):
+                remaining.append(path)
+        dest = os.path.splitext(media[0])[0] + METADATA_SUFFIX
+        temp = dest + ".tmp"
+        with open(temp, 'w', encoding="utf-8") as f:
+            json.dump({"files": [os.path.basename(path) for path in media], "metadata": metadata},
+                      f, indent=2, ensure_ascii=False)
+        finalize(temp, dest, fsync)
+        for path in merged:
+            os.remove(path)
+        return remaining + [dest]
+    if mode == DELETE:
+        for path in sidecars:
+            os.remove(path)
+        return []
+    return list(sidecars)
+
+
+def split_files(files):
+    """Sort a job's files into (media, sidecars, other)
+
+    Sidecars are metadata files and the thumbnails yt-dlp writes next to a
+    video; they are picked up from disk even when the engine did not report
+    them.
+    """
+    media, sidecars, other = [], [], []
+    for path in files:
+        lower = path.lower()
+        if lower.endswith(METADATA_SUFFIX):
+            # Written by an earlier run, left alone
+            other.append(path)
+        elif lower.endswith(SIDECAR_SUFFIXES):
+            sidecars.append(path)
+        elif lower.endswith(IMAGE_EXTENSIONS + VIDEO_EXTENSIONS):
+            media.append(path)
+        else:
+            other.append(path)
+    for path in media:
+        stem = os.path.splitext(path)[0]
+        candidates = [stem + suffix for suffix in SIDECAR_SUFFIXES]
+        if path.lower().endswith(VIDEO_EXTENSIONS):
+            candidates += [stem + extension for extension in IMAGE_EXTENSIONS]
+        for candidate in candidates:
+            if candidate not in files and candidate not in sidecars and os.path.exists(candidate):
+                sidecars.append(candidate)
+    return media, sidecars, other
+
+
+class _ProcessingBatch:
+    """The files of one job going through the post-processing stage"""
+
+    def __init__(self, media, sidecars, other, on_done):
+        self.media = list(media)
+        self.sidecars = sidecars
+        self.other = other
+        self.on_done = on_done
+        self.remaining = len(self.media)
+        self.hashes = {}
+
+
+class PostProcessor:
+    """Third pipeline stage: CPU-heavy work on finished downloads
+
+    Each media file becomes a task for a ProcessPoolExecutor, so conversions
+    use every core without holding the GIL the download threads need. Tasks
+    wait in the stage's own queue and a dispatcher thread keeps at most
+    max_in_flight of them in the pool; submit() never blocks, so a long
+    transcode never holds up a download worker. The worker processes run at
+    a lower priority. A file that fails to process is kept as downloaded.
+    """
+
+    def __init__(self, options, workers=0, enabled=True, logger=None):
+        self.logger = logger or logging.getLogger(__name__)
+        self.workers = int(workers) or os.cpu_count() or 1
+        self.max_in_flight = self.workers * 2
+        ffmpeg = None
+        if options.video or options.strip_metadata:
+            ffmpeg = shutil.which(options.ffmpeg or "ffmpeg")
+            if ffmpeg is None and options.video:
+                self.logger.warning("ffmpeg was not found, videos will not be remuxed or transcoded")
+        self.options = options._replace(ffmpeg=ffmpeg)
+        self.enabled = enabled and bool(options.image_format or options.strip_metadata or options.video
+                                        or options.sidecars != KEEP)
+        self._pool = None
+        self._tasks = deque()
+        self._in_flight = 0
+        # Jobs submitted and not completed yet
+        self._batches = 0
+        self._accepting = True
+        self._closed = False
+        self._cond = threading.Condition()
+        self._dispatcher = None
+
+    @classmethod
+    def from_config(cls, config, logger=None):
+        """Build the stage using the "postprocess" section of config.json"""
+        settings = config.get("postprocess", {})
+        defaults = ProcessingOptions()
+        options = ProcessingOptions(**{field: settings.get(field, getattr(defaults, field))
+                                       for field in ProcessingOptions._fields})
+        # Converted files follow the same fsync policy as downloads
+        options = options._replace(fsync=config.get("storage", {}).get("fsync", FSYNC_NONE))
+        return cls(options, workers=settings.get("workers", 0), enabled=settings.get("enabled", False),
+                   logger=logger)
+
+    def wants(self, path):
+        """True if a media file has work to do under the configured options"""
+        if path.lower().endswith(VIDEO_EXTENSIONS):
+            return self.options.ffmpeg is not None and bool(self.options.video or self.options.strip_metadata)
+        return bool(self.options.image_format or self.options.strip_metadata)
+
+    def submit(self, files, on_done):
+        """Queue the files of one finished job
+
+        on_done(files, hashes) is called on the dispatcher thread once every
+        file is processed, with the job's new file list; hashes maps the
+        files written now to (size, sha256).
+        """
+        media, sidecars, other = split_files(files)
+        batch = _ProcessingBatch(media, sidecars, other, on_done)
+        with self._cond:
+            if not self._accepting:
+                raise RuntimeError("Post-processing has been shut down")
+            self._batches += 1
+            for index, path in enumerate(media):
+                if self.wants(path):
+                    self._tasks.append((batch, index, process_file, (path, self.options)))
+                else:
+                    batch.remaining -= 1
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(target=self._dispatch_loop, name="hikari-postprocess",
+                                                    daemon=True)
+                self._dispatcher.start()
+            self._cond.notify_all()
+        if not batch.remaining:
+            self._media_done(batch)
+
+    def shutdown(self, wait=True):
+        """Stop accepting files and stop the worker processes
+
+        With wait, the files already submitted are processed first;
+        otherwise the ones still waiting are kept as downloaded.
+        """
+        with self._cond:
+            self._accepting = False
+            while wait and self._batches:
+                self._cond.wait()
+            self._closed = True
+            tasks, self._tasks = self._tasks, deque()
+            self._cond.notify_all()
+            pool, self._pool = self._pool, None
+        for task in tasks:
+            self._task_done(task, None, RuntimeError("post-processing stopped"))
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
+
+    def _executor(self):
+        """The process pool, created with the first task
+
+        multiprocessing is imported here rather than at module load, so
+        starting the app does not pay for it unless post-processing is used.
+        """
+        if self._pool is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            # Forked children would inherit the locks of the download threads
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=context, initializer=_lower_priority)
+        return self._pool
+
+    def _dispatch_loop(self):
+        while True:
+            with self._cond:
+                while not self._closed and (not self._tasks or self._in_flight >= self.max_in_flight):
+                    self._cond.wait()
+                if self._closed:
+                    return
+                task = self._tasks.popleft()
+                self._in_flight += 1
+                try:
+                    pool = self._executor()
+                    future = pool.submit(task[2], *task[3])
+                except Exception as e:
+                    self._pool = None
+                    self._in_flight -= 1
+                    error = e
+                else:
+                    error = None
+            if error is not None:
+                self._task_done(task, None, error)
+                continue
+            future.add_done_callback(lambda future, task=task, pool=pool: self._collect(task, future, pool))
+
+    def _collect(self, task, future, pool):
+        from concurrent.futures.process import BrokenProcessPool
+
+        try:
+            result, error = future.result(), None
+        except Exception as e:
+            result, error = None, e
+        with self._cond:
+            self._in_flight -= 1
+            if isinstance(error, BrokenProcessPool) and self._pool is pool:
+                # A worker died; the next task gets a new pool
+                self._pool = None
+                pool.shutdown(wait=False)
+            self._cond.notify_all()
+        self._task_done(task, result, error)
+
+    def _task_done(self, task, result, error):
+        batch, index = task[0], task[1]
+        if task[2] is consolidate_sidecars:
+            if error is not None:
+                self.logger.warning(f"Could not tidy up metadata files: {str(error)}")
+                result = batch.sidecars
+            batch.other += result
+            self._complete(batch)
+            return
+
+        if error is not None:
+            self.logger.warning(f"Post-processing failed for {batch.media[index]}, keeping it as is: {str(error)}")
+        else:
+            path, size, sha256 = result
+            batch.media[index] = path
+            batch.hashes[path] = (size, sha256)
+        with self._cond:
+            batch.remaining -= 1
+            last = batch.remaining == 0
+        if last:
+            self._media_done(batch)
+
+    def _media_done(self, batch):
+        """Tidy up the sidecars once the media files have their final names"""
+        if not batch.sidecars or self.options.sidecars == KEEP:
+            batch.other += batch.sidecars
+            self._complete(batch)
+            return
+        with self._cond:
+            if self._closed:
+                batch.other += batch.sidecars
+                closed = True
+            else:
+                closed = False
+                # Ahead of other jobs' media, so this job can finish
+                self._tasks.appendleft((batch, None, consolidate_sidecars,
+                                        (list(batch.media), batch.sidecars, self.options.sidecars,
+                                         self.options.fsync)))
+                self._cond.notify_all()
+        if closed:
+            self._complete(batch)
+
+    def _complete(self, batch):
+        with self._cond:
+            self._batches -= 1
+            self._cond.notify_all()
+        try:
+            batch.on_done(batch.media + batch.other, batch.hashes)
+        except Exception as e:
+            self.logger.error(f"Post-processing callback failed: {str(e)}")
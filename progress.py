@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Hikari Insta Downloader - Download Progress
+Copyright (C) 2025 Gary19gts
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+Streams engine output line by line and turns it into transfer statistics
+"""
+
+import atexit
+import os
+import re
+import signal
+import subprocess
+import threading
+import time
+from collections import deque, namedtuple
+
+# Bytes done, total bytes (None if unknown), bytes per second and seconds left
+TransferStats = namedtuple("TransferStats", "downloaded total speed eta")
+
+# Share of the progress bar covered by the transfer itself
+TRANSFER_START = 0.2
+TRANSFER_END = 0.9
+
+_UNIT_POWERS = {"": 0, "K": 1, "M": 2, "G": 3, "T": 4}
+
+# Seconds an engine process gets to exit after SIGTERM before it is killed
+TERMINATE_GRACE = 5.0
+
+DEFAULT_STARTUP_TIMEOUT = 120.0
+DEFAULT_STALL_TIMEOUT = 60.0
+# Slowest transfer rate still worth waiting for, in bytes per second
+DEFAULT_MIN_SPEED = 32 * 1024
+DEFAULT_MAX_TIMEOUT = 6 * 3600.0
+
+# Temporary files the engines and transfers write next to the final file
+PARTIAL_SUFFIXES = (".part", ".part.validator", ".ytdl", ".temp")
+
+# [download]  42.3% of ~  10.52MiB at    1.23MiB/s ETA 00:07
+_YTDLP_PROGRESS = re.compile(
+    r'\[download\]\s+(?P<percent>[\d.]+)%\s+of\s+~?\s*(?P<total>[\d.]+)(?P<unit>[KMGT]?)i?B'
+    r'(?:\s+at\s+(?P<speed>[\d.]+)(?P<speed_unit>[KMGT]?)i?B/s)?'
+    r'(?:\s+ETA\s+(?P<eta>[\d:]+))?'
+)
+
+# gallery-dl progress: " 42%     4MB  1230kB/s " (percent missing if size unknown)
+_GALLERYDL_PROGRESS = re.compile(
+    r'(?:(?P<percent>\d+)%\s+)?(?P<done>[\d.]+)(?P<unit>[kKMGT]?)B\s+'
+    r'(?P<speed>[\d.]+)(?P<speed_unit>[kKMGT]?)B/s'
+)
+
+
+def _to_bytes(number, unit, base=1024):
+    return int(float(number) * base ** _UNIT_POWERS[unit.upper()])
+
+
+def _parse_eta(text):
+    seconds = 0
+    for part in text.split(":"):
+        seconds = seconds * 60 + int(part)
+    return seconds
+
+
+def parse_ytdlp_line(line):
+    """Return TransferStats for a yt-dlp --newline progress line, else None"""
+    match = _YTDLP_PROGRESS.search(line)
+    if not match:
+        return None
+    total = _to_bytes(match.group("total"), match.group("unit"))
+    downloaded = int(total * float(match.group("percent")) / 100)
+    speed = None
+    if match.group("speed"):
+        speed = _to_bytes(match.group("speed"), match.group("speed_unit"))
+    eta = _parse_eta(match.group("eta")) if match.group("eta") else None
+    return TransferStats(downloaded, total, speed, eta)
+
+
+def parse_gallerydl_line(line):
+    """Return TransferStats for a gallery-dl progress line, else None"""
+    match = _GALLERYDL_PROGRESS.search(line)
+    if not match:
+        return None
+    # gallery-dl uses decimal units
+    downloaded = _to_bytes(match.group("done"), match.group("unit"), 1000)
+    speed = _to_bytes(match.group("speed"), match.group("speed_unit"), 1000)
+    total = None
+    eta = None
+    if match.group("percent"):
+        percent = int(match.group("percent"))
+        if percent:
+            total = int(downloaded * 100 / percent)
+            if speed:
+                eta = int((total - downloaded) / speed)
+    return TransferStats(downloaded, total, speed, eta)
+
+
+def stats_from_counts(downloaded, total=None, speed=None, eta=None):
+    """Build TransferStats from an engine hook, estimating ETA when missing"""
+    if eta is None and total and speed:
+        eta = int(max(total - downloaded, 0) / speed)
+    return TransferStats(int(downloaded or 0), int(total) if total else None,
+                         int(speed) if speed else None, int(eta) if eta is not None else None)
+
+
+def fraction_for(stats):
+    """Map transfer stats onto the overall progress bar range"""
+    if not stats.total:
+        return None
+    done = min(stats.downloaded / stats.total, 1.0)
+    return TRANSFER_START + (TRANSFER_END - TRANSFER_START) * done
+
+
+def format_bytes(size):
+    """Format a byte count like 4.2 MiB"""
+    size = float(size)
+    for unit in ["B", "KiB", "MiB", "GiB"]:
+        if size < 1024 or unit == "GiB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def format_stats(engine, stats):
+    """Human readable progress message for the status line"""
+    message = f"Downloading with {engine}: {format_bytes(stats.downloaded)}"
+    if stats.total:
+        message += f" of {format_bytes(stats.total)}"
+    if stats.speed:
+        message += f" at {format_bytes(stats.speed)}/s"
+    if stats.eta is not None:
+        minutes, seconds = divmod(stats.eta, 60)
+        message += f", ETA {minutes}:{seconds:02d}"
+    return message
+
+
+def find_output_path(line, output_dir):
+    """Return an existing file inside output_dir mentioned in line, or None"""
+    start = line.find(output_dir)
+    if start < 0:
+        return None
+    candidate = line[start:].strip().strip('"\'')
+    # Paths may contain spaces, so drop trailing words until a file matches
+    while candidate:
+        if os.path.isfile(candidate):
+            return candidate
+        cut = candidate.rfind(" ")
+        if cut < 0:
+            return None
+        candidate = candidate[:cut].rstrip().strip('"\'')
+    return None
+
+
+def announced_path(line, output_dir):
+    """Return the path inside output_dir that a line of engine output names, or None
+
+    Unlike find_output_path the file does not need to exist yet.
+    """
+    start = line.find(output_dir)
+    if start < 0:
+        return None
+    return line[start:].strip().strip('"\'')
+
+
+def remove_partial_files(paths):
+    """Delete the temporary files left by interrupted downloads of paths
+
+    Only the partial files are removed, complete files stay. Returns the
+    number of files deleted.
+    """
+    removed = 0
+    for path in dict.fromkeys(paths):
+        for suffix in PARTIAL_SUFFIXES:
+            for candidate in (path + suffix, os.path.splitext(path)[0] + suffix):
+                try:
+                    os.remove(candidate)
+                    removed += 1
+                except OSError:
+                    pass
+    return removed
+
+
+class OutputTail:
+    """Keeps only the last lines of engine output for error reports"""
+
+    def __init__(self, max_lines=50, max_line_length=500):
+        self.lines = deque(maxlen=max_lines)
+        self.max_line_length = max_line_length
+
+    def append(self, line):
+        self.lines.append(line[:self.max_line_length])
+
+    def text(self):
+        return "\n".join(self.lines)
+
+
+class TimeoutPolicy:
+    """Settings for AdaptiveTimeout, from the "timeouts" section of config.json"""
+
+    def __init__(self, startup=DEFAULT_STARTUP_TIMEOUT, stall=DEFAULT_STALL_TIMEOUT,
+                 min_speed=DEFAULT_MIN_SPEED, maximum=DEFAULT_MAX_TIMEOUT):
+        self.startup = startup
+        self.stall = stall
+        self.min_speed = min_speed
+        self.maximum = maximum
+
+    @classmethod
+    def from_config(cls, config):
+        settings = config.get("timeouts", {})
+        return cls(
+            startup=settings.get("startup", DEFAULT_STARTUP_TIMEOUT),
+            stall=settings.get("stall", DEFAULT_STALL_TIMEOUT),
+            min_speed=settings.get("min_speed", DEFAULT_MIN_SPEED),
+            maximum=settings.get("max", DEFAULT_MAX_TIMEOUT)
+        )
+
+    def start(self):
+        return AdaptiveTimeout(self)
+
+
+class AdaptiveTimeout:
+    """Decides when an engine run is stuck, from what it reports
+
+    Until the first output the engine gets policy.startup seconds; after
+    that it must report something at least every policy.stall seconds.
+    Once a transfer reports its total size, the run may take as long as
+    moving the rest at policy.min_speed, so big videos get more time than
+    small images instead of one fixed limit for everything.
+    """
+
+    def __init__(self, policy=None):
+        self.policy = policy or TimeoutPolicy()
+        self.started = time.monotonic()
+        self.last_activity = None
+        self.deadline = None
+        self.reason = None
+
+    def activity(self, stats=None):
+        """Note output from the engine, with its TransferStats if any"""
+        now = time.monotonic()
+        self.last_activity = now
+        if stats is not None and stats.total:
+            remaining = max(stats.total - (stats.downloaded or 0), 0)
+            deadline = now + remaining / self.policy.min_speed + self.policy.stall
+            # A new file of a carousel starts a new estimate
+            if self.deadline is None or deadline > self.deadline or stats.downloaded == 0:
+                self.deadline = deadline
+
+    def expired(self):
+        """Return why the run should be stopped, or None while it is fine"""
+        now = time.monotonic()
+        policy = self.policy
+        if policy.maximum and now - self.started > policy.maximum:
+            self.reason = f"ran longer than {policy.maximum:.0f} seconds"
+        elif self.last_activity is None:
+            if policy.startup and now - self.started > policy.startup:
+                self.reason = f"did not start within {policy.startup:.0f} seconds"
+        elif policy.stall and now - self.last_activity > policy.stall:
+            self.reason = f"made no progress for {policy.stall:.0f} seconds"
+        elif self.deadline is not None and now > self.deadline:
+            self.reason = f"transfer slower than {format_bytes(policy.min_speed)}/s"
+        return self.reason
+
+
+_processes = set()
+_processes_lock = threading.Lock()
+
+
+def terminate_process(process, grace=TERMINATE_GRACE):
+    """Ask an engine process and its children to exit, killing them after grace seconds"""
+    if process.poll() is not None:
+        return
+    # Engines run in their own process group, so helpers such as ffmpeg stop too
+    try:
+        if os.name == "posix":
+            os.killpg(process.pid, signal.SIGTERM)
+        else:
+            process.terminate()
+    except OSError:
+        pass
+    try:
+        process.wait(grace)
+    except subprocess.TimeoutExpired:
+        try:
+            if os.name == "posix":
+                os.killpg(process.pid, signal.SIGKILL)
+            else:
+                process.kill()
+        except OSError:
+            pass
+
+
+@atexit.register
+def terminate_all():
+    """Stop every engine process still running, so none outlives the app"""
+    with _processes_lock:
+        processes = list(_processes)
+    for process in processes:
+        terminate_process(process, grace=1.0)
+
+
+def stream_command(cmd, on_line, timeout=300, tail=None, cancel=None, deadline=None):
+    """Run cmd, calling on_line for every line of combined stdout/stderr
+
+    on_line returns True for lines it consumed as progress; the others are
+    kept in the returned tail. Returns (returncode, tail). Carriage-return progress updates count as
+    separate lines. The process is stopped and subprocess.TimeoutExpired is
+    raised if it runs longer than timeout seconds, or once the
+    AdaptiveTimeout deadline expires. When the threading.Event cancel is set
+    the process is stopped as well and returns its exit code.
+    """
+    tail = tail or OutputTail()
+    if os.name == "posix":
+        group = {"start_new_session": True}
+    else:
+        group = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    process = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        stdin=subprocess.DEVNULL,
+        text=True,
+        errors="replace",
+        bufsize=1,
+        **group
+    )
+    with _processes_lock:
+        _processes.add(process)
+    timed_out = threading.Event()
+    finished = threading.Event()
+    started = time.monotonic()
+
+    def watch():
+        while not finished.wait(0.2):
+            if cancel is not None and cancel.is_set():
+                terminate_process(process)
+                return
+            if (timeout and time.monotonic() - started > timeout) or (deadline and deadline.expired()):
+                timed_out.set()
+                terminate_process(process)
+                return
+
+    threading.Thread(target=watch, name="hikari-engine-watch", daemon=True).start()
+    try:
+        for line in process.stdout:
+            if deadline is not None:
+                deadline.activity()
+            line = line.rstrip()
+            if not line:
+                continue
+            # Progress lines are noise in error reports, keep everything else
+            if not on_line(line):
+                tail.append(line)
+        returncode = process.wait()
+    finally:
+        finished.set()
+        terminate_process(process)
+        process.stdout.close()
+        with _processes_lock:
+            _processes.discard(process)
+
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(cmd, timeout, output=tail.text())
+    return returncode, tail
+
+
+class ProgressThrottle:
+    """Limits how often byte-level progress is forwarded to a callback"""
+
+    def __init__(self, interval=0.25):
+        self.interval = interval
+        self._last = 0.0
+
+    def ready(self, final=False):
+        now = time.monotonic()
+        if final or now - self._last >= self.interval:
+            self._last = now
+            return True
+        return False
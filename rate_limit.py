@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Hikari Insta Downloader - Rate Limiting
+Copyright (C) 2025 Gary19gts
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+Adaptive request pacing per engine and host, failure classification and
+retry backoff
+"""
+
+import random
+import re
+import threading
+import time
+
+RATE_LIMITED = "rate_limited"
+TRANSIENT = "transient"
+PERMANENT = "permanent"
+
+# Instagram answers throttled clients with 429, and often with 401 plus
+# "Please wait a few minutes before you try again"
+_RATE_LIMIT_TEXT = re.compile(
+    r'\b429\b|too many requests|please wait a few minutes|rate.?limit|\b401\b|unauthorized',
+    re.IGNORECASE
+)
+_TRANSIENT_TEXT = re.compile(
+    r'timed? ?out|interrupted|connection|temporar|incomplete|\b50[0234]\b|reset by peer',
+    re.IGNORECASE
+)
+
+
+def classify_error(error):
+    """Return (failure class, retry_after seconds or None) for a download error
+
+    Looks at the HTTP status and Retry-After carried by TransferError and at
+    the messages of the whole exception chain, since engines only report
+    rate limits as text.
+    """
+    retry_after = None
+    texts = []
+    current = error
+    while current is not None:
+        status = getattr(current, "status", None)
+        retry_after = retry_after or getattr(current, "retry_after", None)
+        if status in (401, 429):
+            return RATE_LIMITED, retry_after
+        texts.append(str(current))
+        current = current.__cause__
+
+    text = "\n".join(texts)
+    if _RATE_LIMIT_TEXT.search(text):
+        return RATE_LIMITED, retry_after
+    if _TRANSIENT_TEXT.search(text):
+        return TRANSIENT, retry_after
+    return PERMANENT, retry_after
+
+
+def parse_retry_after(value):
+    """Seconds from a Retry-After header given in seconds, None otherwise"""
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, base=5.0, maximum=600.0, retry_after=None):
+    """Seconds to wait before retry number attempt (1 for the first retry)
+
+    Exponential with jitter so jobs that failed together do not all retry
+    at the same moment. A server-supplied Retry-After wins when larger.
+    """
+    delay = min(maximum, base * 2 ** (attempt - 1))
+    delay = random.uniform(delay / 2, delay)
+    if retry_after:
+        delay = max(delay, min(retry_after, maximum))
+    return delay
+
+
+class TokenBucket:
+    """Token bucket whose refill rate adapts to how the server responds
+
+    Every throttle() halves the rate and blocks the bucket for the server's
+    Retry-After; every success() raises it again by a small step, up to
+    max_rate. The rate settles just below what the server tolerates.
+    """
+
+    def __init__(self, rate, burst=1, min_rate=None, max_rate=None):
+        self.max_rate = float(max_rate or rate)
+        self.min_rate = float(min_rate or self.max_rate / 50)
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Wait until a request may be sent"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                wait = self._blocked_until - now
+                if wait <= 0:
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def throttle(self, retry_after=None):
+        """The server pushed back: slow down and pause"""
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = 0.0
+            pause = retry_after if retry_after else 1 / self.rate
+            self._blocked_until = max(self._blocked_until, time.monotonic() + pause)
+
+    def success(self):
+        """A request went through: speed up a little"""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+class RateLimiter:
+    """A TokenBucket per key, such as an engine name or a host name"""
+
+    def __init__(self, rate, burst=1, min_rate=None):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config, prefix):
+        """Build a limiter from config.json's "rate_limits", e.g. prefix "engine" """
+        limits = config.get("rate_limits", {})
+        return cls(limits.get(f"{prefix}_rate", 1.0), limits.get(f"{prefix}_burst", 1),
+                   limits.get(f"{prefix}_min_rate"))
+
+    def bucket(self, key):
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.burst, self.min_rate)
+            return bucket
+
+    def acquire(self, key):
+        self.bucket(key).acquire()
+
+    def throttle(self, key, retry_after=None):
+        self.bucket(key).throttle(retry_after)
+
+    def success(self, key):
+        self.bucket(key).success()
+
+    def rates(self):
+        """Return {key: current requests per second}"""
+        with self._lock:
+            return {key: bucket.rate for key, bucket in self._buckets.items()}
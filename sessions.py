@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Hikari Insta Downloader - Session Manager
+Copyright (C) 2025 Gary19gts
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+Keeps one Instagram login and hands it to every download engine
+"""
+
+import http.cookiejar
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+
+SESSION_FILENAME = ".hikari_session.json"
+COOKIES_FILENAME = ".hikari_cookies.txt"
+INSTALOADER_FILENAME = ".hikari_session.instaloader"
+
+COOKIE_DOMAIN = ".instagram.com"
+
+
+def _write_private(path, data, binary=False):
+    """Atomically write a file that only the current user may read"""
+    temp = path + ".tmp"
+    fd = os.open(temp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'wb' if binary else 'w', **({} if binary else {"encoding": "utf-8"})) as f:
+        f.write(data)
+    os.replace(temp, path)
+
+
+class SessionManager:
+    """One authenticated Instagram session shared by all engines and workers
+
+    The cookies live in .hikari_session.json. Engines get them in the form
+    they understand: a dict for in-process instaloader and gallery-dl, a
+    cookies.txt for yt-dlp and the command line programs, and an instaloader
+    session file for the instaloader program. version increases whenever
+    the login itself changes, so per-thread engine instances know to reload;
+    cookies an engine merely refreshes are stored without bumping it.
+    """
+
+    def __init__(self, directory=".", logger=None):
+        self.directory = os.path.abspath(directory)
+        self.path = os.path.join(self.directory, SESSION_FILENAME)
+        self.logger = logger or logging.getLogger(__name__)
+        self.username = None
+        self.version = 0
+        self._revision = 0
+        self._cookies = {}
+        self._exported = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    @classmethod
+    def from_config(cls, config, directory=".", logger=None):
+        """Build the manager, importing the "session" cookies_file if it changed
+
+        directory is the folder of config.json; the session is stored there
+        and a relative cookies_file is read from there.
+        """
+        session_config = config.get("session", {})
+        manager = cls(directory, logger)
+        cookies_file = session_config.get("cookies_file")
+        if cookies_file:
+            cookies_file = os.path.join(manager.directory, os.path.expanduser(cookies_file))
+        if cookies_file and os.path.exists(cookies_file):
+            if os.path.getmtime(cookies_file) > manager.updated_at:
+                try:
+                    manager.import_cookies_file(cookies_file, session_config.get("username") or None)
+                except (OSError, http.cookiejar.LoadError) as e:
+                    manager.logger.error(f"Could not import cookies from {cookies_file}: {str(e)}")
+        return manager
+
+    @property
+    def logged_in(self):
+        return "sessionid" in self._cookies
+
+    @property
+    def updated_at(self):
+        try:
+            return os.path.getmtime(self.path)
+        except OSError:
+            return 0.0
+
+    def load(self):
+        """Read the stored session, if any"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            self.logger.error(f"Could not read {self.path}: {str(e)}")
+            return
+        with self._lock:
+            self.username = data.get("username")
+            self._cookies = dict(data.get("cookies", {}))
+            self.version += 1
+            self._revision += 1
+
+    def cookies(self):
+        """Return a copy of the session cookies"""
+        with self._lock:
+            return dict(self._cookies)
+
+    def update(self, cookies, username=None):
+        """Merge refreshed cookies into the session and store them if anything changed"""
+        with self._lock:
+            merged = dict(self._cookies)
+            merged.update({name: value for name, value in cookies.items() if value is not None})
+            username = username or self.username
+            if merged == self._cookies and username == self.username:
+                return False
+            changed_login = merged.get("sessionid") != self._cookies.get("sessionid") or username != self.username
+            if changed_login:
+                self.version += 1
+            self._cookies = merged
+            self.username = username
+            self._revision += 1
+            _write_private(self.path, json.dumps({
+                "username": self.username,
+                "cookies": self._cookies,
+                "saved_at": time.time()
+            }, indent=2))
+        if changed_login:
+            self.logger.info(f"Saved Instagram session{' for ' + username if username else ''}")
+        return True
+
+    def clear(self):
+        """Log out: forget the cookies and remove every exported copy"""
+        with self._lock:
+            self._cookies = {}
+            self.username = None
+            self.version += 1
+            self._revision += 1
+            self._exported.clear()
+        for name in (SESSION_FILENAME, COOKIES_FILENAME, INSTALOADER_FILENAME):
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    def import_cookies_file(self, path, username=None):
+        """Import Instagram cookies from a Netscape cookies.txt, e.g. exported from a browser"""
+        jar = http.cookiejar.MozillaCookieJar(path)
+        jar.load(ignore_discard=True, ignore_expires=True)
+        cookies = {cookie.name: cookie.value for cookie in jar
+                   if cookie.domain.lstrip(".").endswith("instagram.com")}
+        if "sessionid" not in cookies:
+            raise http.cookiejar.LoadError(f"{path} holds no Instagram login (sessionid cookie)")
+        self.update(cookies, username)
+
+    def cookies_txt(self):
+        """Return the path of a cookies.txt with the current session"""
+        def render(cookies):
+            expires = int(time.time()) + 365 * 24 * 3600
+            lines = ["# Netscape HTTP Cookie File"]
+            for name, value in cookies.items():
+                lines.append("\t".join([COOKIE_DOMAIN, "TRUE", "/", "TRUE", str(expires), name, value]))
+            return "\n".join(lines) + "\n"
+
+        return self._export(COOKIES_FILENAME, render)
+
+    def instaloader_session_file(self):
+        """Return the path of an instaloader --sessionfile with the current session"""
+        # Same format as instaloader's save_session_to_file: a pickled cookie dict
+        return self._export(INSTALOADER_FILENAME, pickle.dumps, binary=True)
+
+    def _export(self, filename, render, binary=False):
+        path = os.path.join(self.directory, filename)
+        with self._lock:
+            if self._exported.get(filename) != self._revision or not os.path.exists(path):
+                _write_private(path, render(dict(self._cookies)), binary)
+                self._exported[filename] = self._revision
+        return path
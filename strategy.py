@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Hikari Insta Downloader - Engine Strategy
+Copyright (C) 2025 Gary19gts
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+Decides which engines to try for a URL and in which order, and learns from
+how each engine did on earlier downloads
+"""
+
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+
+from engine_registry import default_registry
+from url_classifier import COLLECTIONS, HASHTAG, HIGHLIGHT, POST, PROFILE, REEL, STORY, TAGGED
+
+# Engine name that lets the strategy pick the engine per URL
+AUTO = "auto"
+
+SINGLE = "single"
+FALLBACK = "fallback"
+
+STATS_FILENAME = ".hikari_engine_stats.json"
+# Seconds between writes of the statistics file, the rest is written at exit
+SAVE_INTERVAL = 30
+
+# Reels go to yt-dlp first and photos to instaloader first, as described in
+# the "engines" section of config.json
+DEFAULT_ROUTES = {
+    REEL: ["yt-dlp", "gallery-dl", "instaloader"],
+    POST: ["instaloader", "gallery-dl", "yt-dlp"],
+    STORY: ["instaloader", "gallery-dl", "yt-dlp"],
+    PROFILE: ["instaloader", "gallery-dl"],
+    TAGGED: ["instaloader", "gallery-dl"],
+    HASHTAG: ["instaloader", "gallery-dl"],
+    HIGHLIGHT: ["gallery-dl"],
+}
+
+# Outcomes needed before an engine's record may reorder the plan
+MIN_SAMPLES = 5
+# Weight of the newest outcome in the moving averages
+SMOOTHING = 0.2
+
+
+class EngineStats:
+    """Moving averages of success rate and latency per engine and content kind
+
+    Stored as JSON next to config.json so the learning survives restarts.
+    The file is written at most every save_interval seconds, and at exit.
+    """
+
+    def __init__(self, directory=".", logger=None, save_interval=SAVE_INTERVAL):
+        self.path = os.path.join(directory, STATS_FILENAME)
+        self.logger = logger or logging.getLogger(__name__)
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        try:
+            with open(self.path, 'r') as f:
+                self._stats = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            self.logger.error(f"Could not read engine statistics: {str(e)}")
+        atexit.register(self.flush)
+
+    def record(self, engine, kind, success, seconds):
+        """Fold one finished attempt into the averages, saving them now and then"""
+        with self._lock:
+            entry = self._stats.setdefault(f"{engine}:{kind}", {"samples": 0, "success": 1.0, "latency": None})
+            entry["samples"] += 1
+            entry["success"] += SMOOTHING * ((1.0 if success else 0.0) - entry["success"])
+            if success:
+                latency = entry["latency"]
+                entry["latency"] = seconds if latency is None else latency + SMOOTHING * (seconds - latency)
+            self._dirty = True
+            if time.monotonic() - self._saved_at >= self.save_interval:
+                self._save()
+
+    def cost(self, engine, kind):
+        """Expected seconds until a successful download, or None without enough data"""
+        with self._lock:
+            entry = self._stats.get(f"{engine}:{kind}")
+            if not entry or entry["samples"] < MIN_SAMPLES:
+                return None
+            # An engine that never succeeded gets a large finite cost
+            latency = entry["latency"] if entry["latency"] is not None else 600.0
+            return latency / max(entry["success"], 0.05)
+
+    def summary(self):
+        """Return {"engine:kind": {"samples", "success", "latency"}}"""
+        with self._lock:
+            return {key: dict(value) for key, value in self._stats.items()}
+
+    def flush(self):
+        """Write the outcomes recorded since the last save"""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def _save(self):
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        temp = self.path + ".tmp"
+        try:
+            with open(temp, 'w') as f:
+                json.dump(self._stats, f, indent=2)
+            os.replace(temp, self.path)
+        except OSError as e:
+            self.logger.error(f"Could not save engine statistics: {str(e)}")
+
+
+class EngineStrategy:
+    """Turns the chosen engine and a URL into an ordered list of engines to try
+
+    With mode "fallback" the other engines that support the content are
+    tried after the chosen one fails; "single" only uses the chosen engine.
+    The engine "auto" picks per content kind using routes. When learn is on,
+    engines with enough recorded outcomes are reordered by expected time to
+    success; an engine picked by the user always stays first.
+    """
+
+    def __init__(self, adapters, mode=FALLBACK, routes=None, race=False, learn=True, stats=None):
+        self.adapters = adapters
+        self.mode = mode
+        self.routes = dict(DEFAULT_ROUTES)
+        self.routes.update(routes or {})
+        self.race = race
+        self.learn = learn
+        self.stats = stats or EngineStats()
+
+    @classmethod
+    def from_config(cls, adapters, config, logger=None, directory="."):
+        """Build a strategy using the "strategy" section of config.json
+
+        directory is the folder of config.json, where the statistics are kept.
+        """
+        settings = config.get("strategy", {})
+        return cls(
+            adapters,
+            mode=settings.get("mode", FALLBACK),
+            routes=settings.get("routes"),
+            race=settings.get("race", False),
+            learn=settings.get("learn", True),
+            stats=EngineStats(directory, logger=logger)
+        )
+
+    def plan(self, kind, engine):
+        """Return the engines to try for content of this kind, best first
+
+        The list is empty when no engine in reach supports the content.
+        """
+        route = [name for name in self.routes.get(kind, list(self.adapters))
+                 if name in self.adapters and self.supports(name, kind)]
+        if engine == AUTO:
+            available = [name for name in route if default_registry.get(name).available]
+            engines = self._reorder(available or route, kind)
+            return engines if self.mode == FALLBACK else engines[:1]
+
+        first = [engine] if self.supports(engine, kind) else []
+        if self.mode != FALLBACK:
+            return first
+        rest = [name for name in route if name != engine and default_registry.get(name).available]
+        return first + self._reorder(rest, kind)
+
+    def supports(self, engine, kind):
+        """True unless kind is a collection the engine cannot page through"""
+        return kind not in COLLECTIONS or kind in self.adapters[engine].collections
+
+    def record(self, engine, kind, success, seconds):
+        if self.learn:
+            self.stats.record(engine, kind, success, seconds)
+
+    def _reorder(self, engines, kind):
+        """Sort the engines with a known record by cost, leaving the others in place"""
+        if not self.learn:
+            return list(engines)
+        costs = {name: self.stats.cost(name, kind) for name in engines}
+        measured = sorted((name for name in engines if costs[name] is not None), key=costs.get)
+        ordered = []
+        for name in engines:
+            ordered.append(measured.pop(0) if costs[name] is not None else name)
+        return ordered
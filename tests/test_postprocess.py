@@ -0,0 +1,114 @@
+"""
+Hikari Insta Downloader - Post-Processing Tests
+Copyright (C) 2025 Gary19gts
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import io
+import json
+import os
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from conftest import REPO_ROOT
+
+PIL = pytest.importorskip("PIL.Image")
+
+
+def jpeg_bytes():
+    buffer = io.BytesIO()
+    PIL.new("RGB", (64, 48), "red").save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+class PostServer(ThreadingHTTPServer):
+    """Serves one post with a single JPEG in the format stub_engine.py reads"""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), PostHandler)
+        self.image = jpeg_bytes()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class PostHandler(BaseHTTPRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.startswith("/api/posts/"):
+            body = json.dumps({"owner": "user", "media": [
+                {"kind": "image", "url": f"{self.server.base_url}/media/0.jpg", "size": len(self.server.image)}
+            ]}).encode()
+        else:
+            body = self.server.image
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def post_server():
+    server = PostServer()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.skipif(os.name == "nt", reason="stub engines are shell scripts")
+def test_batch_mode_runs_pool_without_gui_packages(tmp_path, post_server):
+    """Pool workers re-import main.py; they must not need customtkinter"""
+    from bench_downloads import install_stub_engines
+    from stub_engine import SERVER_ENV
+
+    bin_dir = tmp_path / "bin"
+    install_stub_engines(str(bin_dir))
+    # A headless machine: the GUI package cannot be imported
+    no_gui = tmp_path / "no_gui"
+    no_gui.mkdir()
+    (no_gui / "customtkinter.py").write_text("raise ImportError('no display')\n")
+
+    config = {
+        "default_settings": {"in_process_engines": False},
+        "network": {"native_fetch": False},
+        "postprocess": {"enabled": True, "workers": 1, "image_format": "png"},
+        "metrics": {"events_file": ""}
+    }
+    (tmp_path / "config.json").write_text(json.dumps(config))
+    (tmp_path / "urls.txt").write_text("https://www.instagram.com/p/PPTEST1/\n")
+    output_dir = tmp_path / "out"
+
+    env = dict(os.environ)
+    env["PATH"] = str(bin_dir) + os.pathsep + env.get("PATH", "")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(no_gui), env.get("PYTHONPATH")]))
+    env[SERVER_ENV] = post_server.base_url
+    result = subprocess.run(
+        [sys.executable, os.path.join(REPO_ROOT, "main.py"), "--batch", "urls.txt", "--engine", "instaloader",
+         "--output", str(output_dir), "--config", "config.json"],
+        cwd=tmp_path, env=env, capture_output=True, text=True, timeout=120
+    )
+
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "terminated abruptly" not in result.stderr
+    assert sorted(name for name in os.listdir(output_dir) if not name.startswith(".")) == ["user_PPTEST1_0.png"]
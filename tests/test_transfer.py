@@ -0,0 +1,119 @@
+"""
+Hikari Insta Downloader - Media Transfer Tests
+Copyright (C) 2025 Gary19gts
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import hashlib
+import os
+
+import pytest
+
+pytest.importorskip("requests")
+
+from fake_instagram import FakeInstagram, FakeInstagramServer, media_bytes
+from transfer import VALIDATOR_SUFFIX, MediaSession, TransferCorrupt
+
+SIZE = 300 * 1024
+
+
+@pytest.fixture
+def server():
+    server = FakeInstagramServer(FakeInstagram(image_size=SIZE, video_ratio=0.0)).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def session():
+    session = MediaSession()
+    yield session
+    session.close()
+
+
+def media_url(server):
+    return f"{server.base_url}/media/ABC_0.jpg"
+
+
+def test_resume_with_corrupted_partial_file_fetches_again(tmp_path, server, session):
+    body = media_bytes("ABC_0", SIZE)
+    dest = str(tmp_path / "ABC_0.jpg")
+    with open(dest + ".part", "wb") as f:
+        f.write(b"\0" * (SIZE // 2))
+
+    size, sha256 = session.fetch(media_url(server), dest, expected_sha256=hashlib.sha256(body).hexdigest())
+
+    assert (size, sha256) == (SIZE, hashlib.sha256(body).hexdigest())
+    with open(dest, "rb") as f:
+        assert f.read() == body
+    assert not os.path.exists(dest + ".part")
+
+
+def test_partial_file_longer_than_served_fetches_again(tmp_path, server, session):
+    body = media_bytes("ABC_0", SIZE)
+    dest = str(tmp_path / "ABC_0.jpg")
+    with open(dest + ".part", "wb") as f:
+        f.write(body + b"garbage")
+
+    size, sha256 = session.fetch(media_url(server), dest)
+
+    assert (size, sha256) == (SIZE, hashlib.sha256(body).hexdigest())
+    with open(dest, "rb") as f:
+        assert f.read() == body
+
+
+def etag(body):
+    return f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+
+
+def write_partial(dest, data, validator):
+    with open(dest + ".part", "wb") as f:
+        f.write(data)
+    with open(dest + ".part" + VALIDATOR_SUFFIX, "w") as f:
+        f.write(validator)
+
+
+def test_resume_continues_unchanged_file(tmp_path, server, session):
+    body = media_bytes("ABC_0", SIZE)
+    dest = str(tmp_path / "ABC_0.jpg")
+    write_partial(dest, body[:SIZE // 3], etag(body))
+
+    size, sha256 = session.fetch(media_url(server), dest)
+
+    assert (size, sha256) == (SIZE, hashlib.sha256(body).hexdigest())
+    assert not os.path.exists(dest + ".part" + VALIDATOR_SUFFIX)
+
+
+def test_resume_after_file_changed_starts_over(tmp_path, server, session):
+    body = media_bytes("ABC_0", SIZE)
+    dest = str(tmp_path / "ABC_0.jpg")
+    # Same length as the served prefix, only If-Range tells the bytes apart
+    write_partial(dest, b"\0" * (SIZE // 3), '"stale"')
+
+    size, sha256 = session.fetch(media_url(server), dest)
+
+    assert (size, sha256) == (SIZE, hashlib.sha256(body).hexdigest())
+    with open(dest, "rb") as f:
+        assert f.read() == body
+
+
+def test_checksum_mismatch_without_partial_file_fails(tmp_path, server, session):
+    dest = str(tmp_path / "ABC_0.jpg")
+
+    with pytest.raises(TransferCorrupt):
+        session.fetch(media_url(server), dest, expected_sha256="0" * 64)
+
+    assert not os.path.exists(dest)
+    assert not os.path.exists(dest + ".part")
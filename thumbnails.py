@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Hikari Insta Downloader - Thumbnail Previews
+Copyright (C) 2025 Gary19gts
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+Fetches, decodes and caches the preview images shown in the detection strip.
+Everything slow happens on worker threads; the Tk thread only ever receives
+small, already downscaled images.
+"""
+
+import io
+import logging
+import os
+import threading
+import urllib.error
+import urllib.request
+from collections import OrderedDict, deque
+from urllib.parse import urlsplit
+
+from ledger import LEDGER_FILENAME, open_ledger
+
+CACHE_DIRNAME = ".hikari_thumbnails"
+
+# Longest side of a cached preview in pixels
+DEFAULT_SIZE = 320
+DEFAULT_MEMORY_BYTES = 16 * 1024 * 1024
+DEFAULT_DISK_BYTES = 64 * 1024 * 1024
+DEFAULT_WORKERS = 2
+# Requests beyond this many waiting are dropped, oldest first
+MAX_PENDING = 16
+# Larger sources are not decoded for a preview
+MAX_SOURCE_BYTES = 32 * 1024 * 1024
+FETCH_TIMEOUT = 15
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+USER_AGENT = "Mozilla/5.0"
+
+
+def thumbnail_url(parsed):
+    """Instagram's own medium sized preview of a post or reel, or None"""
+    if not parsed or not parsed.shortcode:
+        return None
+    return f"https://www.instagram.com/p/{parsed.shortcode}/media/?size=m"
+
+
+def local_source(parsed, output_dir):
+    """Path of an already downloaded image of the post, or None
+
+    Uses the download ledger of output_dir, so browsing earlier downloads
+    needs no network at all. Videos are previewed through the thumbnail
+    yt-dlp writes next to them.
+    """
+    if not parsed or not output_dir or not os.path.exists(os.path.join(output_dir, LEDGER_FILENAME)):
+        return None
+    paths = [row[0] for row in open_ledger(output_dir).files(parsed.key)]
+    for path in paths:
+        if path.lower().endswith(IMAGE_EXTENSIONS) and os.path.exists(path):
+            return path
+    for path in paths:
+        stem = os.path.splitext(path)[0]
+        for extension in IMAGE_EXTENSIONS:
+            if os.path.exists(stem + extension):
+                return stem + extension
+    return None
+
+
+class ThumbnailCache:
+    """Previews keyed by shortcode, in memory and on disk
+
+    Each preview is decoded and downscaled once, then kept in a memory LRU
+    bounded by memory_bytes of pixel data and saved as a small JPEG under
+    directory, which is trimmed to disk_bytes by last use. A miss is filled
+    from the downloaded files of the post when the ledger has them, and from
+    Instagram otherwise.
+    """
+
+    def __init__(self, directory=CACHE_DIRNAME, size=DEFAULT_SIZE, memory_bytes=DEFAULT_MEMORY_BYTES,
+                 disk_bytes=DEFAULT_DISK_BYTES, workers=DEFAULT_WORKERS, session=None, logger=None):
+        self.directory = directory
+        self.size = size
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.workers = max(1, int(workers))
+        self.session = session
+        self.logger = logger or logging.getLogger(__name__)
+        self._memory = OrderedDict()
+        self._memory_used = 0
+        self._memory_lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._pending = deque()
+        self._loading = set()
+        self._cond = threading.Condition()
+        self._threads = []
+        self._closed = False
+
+    @classmethod
+    def from_config(cls, config, session=None, logger=None):
+        """Build a cache using the "preview" section of config.json"""
+        settings = config.get("preview", {})
+        return cls(
+            directory=settings.get("cache_dir", CACHE_DIRNAME),
+            size=settings.get("size", DEFAULT_SIZE),
+            memory_bytes=settings.get("memory_mb", DEFAULT_MEMORY_BYTES // 1024 ** 2) * 1024 ** 2,
+            disk_bytes=settings.get("disk_mb", DEFAULT_DISK_BYTES // 1024 ** 2) * 1024 ** 2,
+            workers=settings.get("workers", DEFAULT_WORKERS),
+            session=session,
+            logger=logger
+        )
+
+    def cached(self, shortcode):
+        """The preview if it is in memory, else None; cheap enough for the Tk thread"""
+        with self._memory_lock:
+            image = self._memory.get(shortcode)
+            if image is not None:
+                self._memory.move_to_end(shortcode)
+            return image
+
+    def request(self, parsed, output_dir, callback):
+        """Load the preview of parsed on a worker thread
+
+        callback(shortcode, image) is called from the worker, with image None
+        when there is no preview. The newest request is served first, so
+        scrolling through URLs does not queue up stale fetches.
+        """
+        with self._cond:
+            if self._closed:
+                return
+            self._pending.appendleft((parsed, output_dir, callback))
+            while len(self._pending) > MAX_PENDING:
+                self._pending.pop()
+            if len(self._threads) < self.workers:
+                worker = threading.Thread(target=self._worker_loop,
+                                          name=f"hikari-preview-{len(self._threads) + 1}", daemon=True)
+                self._threads.append(worker)
+                worker.start()
+            self._cond.notify()
+
+    def load(self, parsed, output_dir=None):
+        """Return the preview of parsed, filling the caches on a miss; blocks"""
+        shortcode = parsed.shortcode
+        image = self.cached(shortcode)
+        if image is None:
+            image = self._from_disk(shortcode)
+        if image is None:
+            source = local_source(parsed, output_dir)
+            if source is None:
+                url = thumbnail_url(parsed)
+                source = io.BytesIO(self._fetch(url)) if url else None
+            if source is None:
+                return None
+            image = self._decode(source)
+            self._save(shortcode, image)
+        self._remember(shortcode, image)
+        return image
+
+    def shutdown(self):
+        """Drop waiting requests; running ones finish on their daemon threads"""
+        with self._cond:
+            self._closed = True
+            self._pending.clear()
+            self._cond.notify_all()
+
+    def _worker_loop(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                parsed, output_dir, callback = self._pending.popleft()
+                if parsed.shortcode in self._loading:
+                    # Another worker is on it; ask again once it is cached
+                    self._pending.append((parsed, output_dir, callback))
+                    self._cond.wait(0.05)
+                    continue
+                self._loading.add(parsed.shortcode)
+            try:
+                image = self.load(parsed, output_dir)
+            except Exception as e:
+                self.logger.warning(f"No preview for {parsed.shortcode}: {str(e)}")
+                image = None
+            finally:
+                with self._cond:
+                    self._loading.discard(parsed.shortcode)
+            callback(parsed.shortcode, image)
+
+    def _decode(self, source):
+        """Decode source (a path or file object) straight to preview size"""
+        from PIL import Image
+
+        with Image.open(source) as image:
+            # JPEGs are decoded at a reduced scale instead of full resolution
+            image.draft("RGB", (self.size, self.size))
+            image = image.convert("RGB")
+        image.thumbnail((self.size, self.size))
+        return image
+
+    def _fetch(self, url):
+        """Download a preview image into memory"""
+        if self.session is not None:
+            from requests import RequestException
+
+            host = urlsplit(url).hostname
+            self.session.limiter.acquire(host)
+            try:
+                with self.session.session.get(url, stream=True, timeout=FETCH_TIMEOUT) as response:
+                    if response.status_code == 429:
+                        self.session.limiter.throttle(host)
+                    response.raise_for_status()
+                    data = response.raw.read(MAX_SOURCE_BYTES + 1, decode_content=True)
+            except RequestException as e:
+                raise OSError(f"Cannot fetch preview: {e}") from e
+        else:
+            request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+            try:
+                with urllib.request.urlopen(request, timeout=FETCH_TIMEOUT) as response:
+                    data = response.read(MAX_SOURCE_BYTES + 1)
+            except urllib.error.URLError as e:
+                raise OSError(f"Cannot fetch preview: {getattr(e, 'reason', e)}") from e
+        if len(data) > MAX_SOURCE_BYTES:
+            raise OSError("Preview image is too large")
+        return data
+
+    def _path(self, shortcode):
+        return os.path.join(self.directory, f"{shortcode}.jpg")
+
+    def _from_disk(self, shortcode):
+        from PIL import Image
+
+        path = self._path(shortcode)
+        try:
+            with Image.open(path) as image:
+                image.load()
+            # The modification time doubles as the last use for trimming
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return image
+
+    def _save(self, shortcode, image):
+        path = self._path(shortcode)
+        temp = f"{path}.{threading.get_ident()}.tmp"
+        with self._disk_lock:
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                image.save(temp, "JPEG", quality=85)
+                os.replace(temp, path)
+            except OSError as e:
+                self.logger.error(f"Could not cache preview: {str(e)}")
+                return
+            self._trim_disk()
+
+    def _trim_disk(self):
+        """Delete the least recently used previews above disk_bytes"""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".jpg"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        used = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if used <= self.disk_bytes:
+                break
+            try:
+                os.remove(path)
+                used -= size
+            except OSError:
+                pass
+
+    def _remember(self, shortcode, image):
+        cost = image.width * image.height * len(image.getbands())
+        with self._memory_lock:
+            previous = self._memory.pop(shortcode, None)
+            if previous is not None:
+                self._memory_used -= previous.width * previous.height * len(previous.getbands())
+            self._memory[shortcode] = image
+            self._memory_used += cost
+            while self._memory_used > self.memory_bytes and len(self._memory) > 1:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_used -= evicted.width * evicted.height * len(evicted.getbands())
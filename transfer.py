@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+Hikari Insta Downloader - Media Transfer
+Copyright (C) 2025 Gary19gts
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+Pooled HTTP session and resumable transfer of media files.
+The engines resolve posts into media URLs; the bytes are fetched here over
+connections that are kept alive and shared by every download job.
+"""
+
+import hashlib
+import heapq
+import itertools
+import logging
+import os
+import re
+import threading
+import time
+from collections import namedtuple
+from urllib.parse import urlsplit
+
+from output_writer import default_writer
+from progress import TRANSFER_START, TRANSFER_END, ProgressThrottle, format_bytes, stats_from_counts
+from rate_limit import RateLimiter, parse_retry_after
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+CHUNK_SIZE = 256 * 1024
+
+DEFAULT_MAX_PER_HOST = 6
+DEFAULT_TIMEOUT = 30
+DEFAULT_TRANSFER_WORKERS = 6
+DEFAULT_MAX_PENDING_TRANSFERS = 64
+
+# A media file an engine resolved: where to fetch it, where to store it, any
+# request headers the CDN expects, "image" or "video", and the exact byte size,
+# pixel dimensions and sha256 when the engine knows them
+MediaItem = namedtuple("MediaItem", "url path headers kind size width height sha256")
+MediaItem.__new__.__defaults__ = (None, "image", None, None, None, None)
+
+_CONTENT_RANGE = re.compile(r'bytes (\d+)-(\d+)/(\d+|\*)')
+# Sent with 416 when the requested range starts past the end of the file
+_UNSATISFIED_RANGE = re.compile(r'bytes \*/(\d+)')
+
+# Stored next to a .part file: the ETag or Last-Modified of the bytes in it
+VALIDATOR_SUFFIX = ".validator"
+
+
+class TransferError(Exception):
+    """Raised when a media file cannot be fetched completely
+
+    status is the HTTP status when the server refused the request, and
+    retry_after the seconds it asked us to wait, if any.
+    """
+
+    def __init__(self, message, status=None, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class TransferCancelled(TransferError):
+    """Raised when a transfer is stopped through its cancel event; the .part file is kept"""
+
+
+class TransferCorrupt(TransferError):
+    """Raised when a fetched file fails its size or checksum check; the .part file is removed"""
+
+
+def _hash_existing(path, digest):
+    """Feed the bytes already on disk into digest"""
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+
+
+def _response_validator(response):
+    """Return the strong ETag, or else the Last-Modified date, of a response"""
+    etag = response.headers.get("ETag")
+    # Weak ETags cannot be sent in If-Range
+    if etag and not etag.startswith("W/"):
+        return etag
+    return response.headers.get("Last-Modified")
+
+
+def _read_validator(part):
+    try:
+        with open(part + VALIDATOR_SUFFIX, encoding="utf-8") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def _save_validator(part, validator):
+    if validator:
+        with open(part + VALIDATOR_SUFFIX, "w", encoding="utf-8") as f:
+            f.write(validator)
+    else:
+        _remove_part(part + VALIDATOR_SUFFIX)
+
+
+def _remove_part(part):
+    """Delete a .part file and its validator, if they exist"""
+    for path in (part, part + VALIDATOR_SUFFIX):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+class MediaSession:
+    """One pooled requests.Session shared by all download jobs
+
+    Connections to the Instagram CDN stay open between files and jobs, so a
+    carousel or a batch of small images pays for the TLS handshake once per
+    connection instead of once per file. Each host gets at most
+    max_per_host connections; further requests wait for a free one. Requests
+    are paced per host by limiter, which slows down when a host answers 429.
+    """
+
+    def __init__(self, max_per_host=DEFAULT_MAX_PER_HOST, timeout=DEFAULT_TIMEOUT, limiter=None):
+        self.timeout = timeout
+        self.limiter = limiter or RateLimiter(20.0, 20)
+        self.max_per_host = max_per_host
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self):
+        """The pooled requests.Session, created on first use
+
+        requests is imported here rather than at module load, so starting the
+        app or the command line does not pay for it until something is fetched.
+        """
+        with self._session_lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                session.headers["User-Agent"] = USER_AGENT
+                adapter = HTTPAdapter(pool_connections=16, pool_maxsize=self.max_per_host, pool_block=True)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._session = session
+            return self._session
+
+    @classmethod
+    def from_config(cls, config):
+        """Build a session using the "network" section of config.json"""
+        network = config.get("network", {})
+        return cls(
+            max_per_host=network.get("max_connections_per_host", DEFAULT_MAX_PER_HOST),
+            timeout=network.get("timeout", DEFAULT_TIMEOUT),
+            limiter=RateLimiter.from_config(config, "host")
+        )
+
+    def fetch(self, url, dest, headers=None, expected_size=None, expected_sha256=None, progress=None,
+              cancel=None):
+        """Download url to dest, resuming from dest + ".part" if a previous attempt stopped
+
+        Sends a Range request for the missing bytes, checks the final size
+        against expected_size or what the server reported, and the sha256
+        when given, and only then renames the .part file to dest. A resumed
+        file that fails the check is fetched again from the start, once.
+        Resuming sends the ETag or Last-Modified of the first response as
+        If-Range, so bytes of a file that changed since are never appended;
+        a .part file without one is fetched again from the start.
+        Returns (size, sha256). progress is called with TransferStats.
+        Setting the threading.Event cancel stops after the current chunk
+        with TransferCancelled.
+        """
+        part = dest + ".part"
+        resumed = os.path.exists(part) and os.path.getsize(part) > 0
+        try:
+            size, sha256 = self._fetch_part(url, part, headers, expected_size, expected_sha256, progress, cancel)
+        except TransferCorrupt:
+            if not resumed:
+                raise
+            # The bytes kept from an earlier attempt were damaged, or the file changed since
+            size, sha256 = self._fetch_part(url, part, headers, expected_size, expected_sha256, progress, cancel)
+        default_writer.finalize(part, dest)
+        _remove_part(part + VALIDATOR_SUFFIX)
+        return size, sha256
+
+    def _fetch_part(self, url, part, headers, expected_size, expected_sha256, progress, cancel):
+        offset = os.path.getsize(part) if os.path.exists(part) else 0
+        validator = _read_validator(part) if offset else None
+        if validator is None:
+            # Nothing tells whether the file changed since, so its bytes cannot be continued
+            offset = 0
+        digest = hashlib.sha256()
+
+        request_headers = dict(headers or {})
+        if offset:
+            request_headers["Range"] = f"bytes={offset}-"
+            request_headers["If-Range"] = validator
+
+        total = expected_size
+        host = urlsplit(url).hostname
+        session = self.session
+        from requests import RequestException
+
+        self.limiter.acquire(host)
+        try:
+            with session.get(url, headers=request_headers, stream=True, timeout=self.timeout) as response:
+                if response.status_code in (401, 429):
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    self.limiter.throttle(host, retry_after)
+                    raise TransferError(f"HTTP {response.status_code} while fetching {url}",
+                                        response.status_code, retry_after)
+                if response.status_code == 416 and offset:
+                    # Nothing left to fetch, the partial file is complete unless it is too long
+                    unsatisfied = _UNSATISFIED_RANGE.match(response.headers.get("Content-Range", ""))
+                    if unsatisfied:
+                        total = total or int(unsatisfied.group(1))
+                    _hash_existing(part, digest)
+                else:
+                    if response.status_code >= 400:
+                        raise TransferError(f"HTTP {response.status_code} while fetching {url}",
+                                            response.status_code)
+                    self.limiter.success(host)
+                    if offset and response.status_code != 206:
+                        # The file changed since, or the server ignored the range: start over
+                        offset = 0
+                    if offset and _response_validator(response) not in (None, validator):
+                        _remove_part(part)
+                        raise TransferCorrupt(f"{url} changed since the partial download")
+                    if not offset:
+                        _save_validator(part, _response_validator(response))
+                    total = total or self._total_size(response, offset)
+                    self._write(response, part, offset, total, digest, progress, cancel)
+        except RequestException as e:
+            # Keep the .part file, the next attempt continues from here
+            raise TransferError(f"Transfer of {url} interrupted: {e}") from e
+        except OSError as e:
+            raise TransferError(f"Cannot write {part}: {e}") from e
+
+        size = os.path.getsize(part)
+        if total is not None and size > total:
+            _remove_part(part)
+            raise TransferCorrupt(f"Download of {url} is larger than expected: {size} of {total} bytes")
+        if total is not None and size < total:
+            # Cut short, the next attempt continues from here
+            raise TransferError(f"Incomplete download of {url}: {size} of {total} bytes")
+
+        sha256 = digest.hexdigest()
+        if expected_sha256 and sha256 != expected_sha256:
+            _remove_part(part)
+            raise TransferCorrupt(f"Checksum mismatch for {url}")
+        return size, sha256
+
+    def close(self):
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    def _total_size(self, response, offset):
+        content_range = _CONTENT_RANGE.match(response.headers.get("Content-Range", ""))
+        if content_range and content_range.group(3) != "*":
+            return int(content_range.group(3))
+        if response.headers.get("Content-Length") and "Content-Encoding" not in response.headers:
+            return offset + int(response.headers["Content-Length"])
+        return None
+
+    def _write(self, response, part, offset, total, digest, progress, cancel=None):
+        if offset:
+            _hash_existing(part, digest)
+        done = offset
+        started = time.monotonic()
+        with open(part, 'ab' if offset else 'wb') as f:
+            for chunk in response.iter_content(CHUNK_SIZE):
+                if cancel is not None and cancel.is_set():
+                    raise TransferCancelled(f"Transfer to {part} cancelled")
+                f.write(chunk)
+                digest.update(chunk)
+                done += len(chunk)
+                if progress:
+                    elapsed = time.monotonic() - started
+                    progress(stats_from_counts(done, total, (done - offset) / elapsed if elapsed else None))
+
+
+
+def transfer_priority(item):
+    """Sort key for the transfer queue: images before videos, smaller first"""
+    return (0 if item.kind == "image" else 1, item.size or 0)
+
+
+class _TransferBatch:
+    """The media of one post, finished when its last file is fetched"""
+
+    def __init__(self, items, on_done, progress, cancel=None):
+        self.items = items
+        self.on_done = on_done
+        self.progress = progress
+        self.cancel = cancel
+        self.throttle = ProgressThrottle()
+        self.remaining = len(items)
+        self.completed = 0
+        self.files = []
+        # path -> (size, sha256), computed while the bytes were written
+        self.hashes = {}
+        self.error = None
+
+
+class TransferScheduler:
+    """Second pipeline stage: fetches resolved media on its own worker pool
+
+    Resolving posts and moving bytes are limited independently. Pending
+    files wait in a priority queue so small images are not stuck behind
+    large videos, and submit() blocks while max_pending files are waiting,
+    which keeps the resolve stage from running arbitrarily far ahead.
+    """
+
+    def __init__(self, session, max_workers=DEFAULT_TRANSFER_WORKERS,
+                 max_pending=DEFAULT_MAX_PENDING_TRANSFERS, logger=None):
+        self.session = session
+        self.max_workers = max(1, int(max_workers))
+        self.max_pending = max_pending
+        self.logger = logger or logging.getLogger(__name__)
+        self._heap = []
+        self._order = itertools.count()
+        self._closed = False
+        self._cond = threading.Condition()
+        self._workers = []
+
+    def start(self):
+        """Start the transfer threads"""
+        with self._cond:
+            if self._workers:
+                return
+            for i in range(self.max_workers):
+                worker = threading.Thread(target=self._worker_loop, name=f"hikari-transfer-{i + 1}", daemon=True)
+                self._workers.append(worker)
+                worker.start()
+
+    def submit(self, items, on_done, progress=None, cancel=None):
+        """Queue the MediaItems of one post
+
+        on_done(files, error, hashes) is called on a transfer thread once
+        every item is fetched, or after the first failure; hashes maps the
+        files fetched now to (size, sha256). progress, if given, is called
+        as progress(fraction, message, stats) like an engine download.
+        Once the threading.Event cancel is set, the post's remaining files
+        are skipped and on_done gets a TransferCancelled error.
+        """
+        batch = _TransferBatch(list(items), on_done, progress, cancel)
+        if not batch.items:
+            on_done([], None, {})
+            return
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Transfer scheduler has been shut down")
+            while self.max_pending and len(self._heap) >= self.max_pending:
+                self._cond.wait()
+            for item in batch.items:
+                heapq.heappush(self._heap, (transfer_priority(item), next(self._order), item, batch))
+            self._cond.notify_all()
+
+    def shutdown(self, wait=True):
+        """Stop accepting media and let the threads exit once the queue drains"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+    def _worker_loop(self):
+        while True:
+            with self._cond:
+                while not self._heap and not self._closed:
+                    self._cond.wait()
+                if not self._heap:
+                    return
+                _, _, item, batch = heapq.heappop(self._heap)
+                self._cond.notify_all()
+            self._fetch(item, batch)
+
+    def _fetch(self, item, batch):
+        error = batch.error
+        fetched = None
+        if error is None and batch.cancel is not None and batch.cancel.is_set():
+            error = TransferCancelled(f"Transfer of {item.url} cancelled")
+        # Once a file of the post failed, the rest is not worth fetching
+        if error is None:
+            try:
+                if not os.path.exists(item.path):
+                    fetched = self.session.fetch(item.url, item.path, headers=item.headers,
+                                                 expected_size=item.size, expected_sha256=item.sha256,
+                                                 progress=lambda stats: self._report(batch, stats),
+                                                 cancel=batch.cancel)
+            except TransferCancelled as e:
+                error = e
+            except Exception as e:
+                self.logger.error(f"Transfer failed for {item.url}: {str(e)}")
+                error = e
+
+        with self._cond:
+            if error is None:
+                batch.files.append(item.path)
+                if fetched is not None:
+                    batch.hashes[item.path] = fetched
+                batch.completed += 1
+            elif batch.error is None:
+                batch.error = error
+            batch.remaining -= 1
+            finished = batch.remaining == 0
+        if finished:
+            batch.on_done(batch.files, batch.error, batch.hashes)
+        elif error is None:
+            self._report(batch, None, final=True)
+
+    def _report(self, batch, stats, final=False):
+        if batch.progress is None or not batch.throttle.ready(final):
+            return
+        count = len(batch.items)
+        done = batch.completed
+        if stats is not None and stats.total:
+            done += min(stats.downloaded / stats.total, 1.0)
+        fraction = TRANSFER_START + (TRANSFER_END - TRANSFER_START) * done / count
+        message = f"Fetching file {min(batch.completed + 1, count)} of {count}"
+        if stats is not None and stats.speed:
+            message += f" at {format_bytes(stats.speed)}/s"
+        batch.progress(fraction, message + "...", stats)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Hikari Insta Downloader - UI Event Queue
+Copyright (C) 2025 Gary19gts
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+Hands widget updates from worker threads to the Tk main loop
+"""
+
+import logging
+import threading
+from collections import OrderedDict, deque
+
+
+class UIEventQueue:
+    """Mailbox between worker threads and the Tk main loop
+
+    Worker threads never touch widgets. They either post() an update under a
+    key, where only the latest update per key survives until the next drain,
+    or call() something that must run exactly once, in order. The main loop
+    calls drain() on a fixed after() tick, which caps redraws at the tick rate
+    no matter how many jobs are reporting progress.
+    """
+
+    def __init__(self, logger=None):
+        self.logger = logger or logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._latest = OrderedDict()
+        self._calls = deque()
+
+    def post(self, key, callback, *args, **kwargs):
+        """Schedule callback(*args), replacing any pending update with the same key"""
+        with self._lock:
+            self._latest.pop(key, None)
+            self._latest[key] = (callback, args, kwargs)
+
+    def call(self, callback, *args, **kwargs):
+        """Schedule callback(*args) to run once on the main loop"""
+        with self._lock:
+            self._calls.append((callback, args, kwargs))
+
+    def drain(self):
+        """Run every pending update; must be called from the Tk main loop"""
+        with self._lock:
+            calls, self._calls = self._calls, deque()
+            latest, self._latest = self._latest, OrderedDict()
+
+        for callback, args, kwargs in list(calls) + list(latest.values()):
+            try:
+                callback(*args, **kwargs)
+            except Exception as e:
+                self.logger.error(f"UI update failed: {str(e)}")
+
+    def attach(self, root, interval_ms=50):
+        """Drain the queue every interval_ms on root's event loop"""
+        def tick():
+            self.drain()
+            root.after(interval_ms, tick)
+
+        root.after(interval_ms, tick)
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Hikari Insta Downloader - URL Classifier
+Copyright (C) 2025 Gary19gts
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+Parses Instagram URLs into a typed result with a single precompiled regex
+"""
+
+import re
+from collections import namedtuple
+
+POST = "post"
+REEL = "reel"
+STORY = "story"
+PROFILE = "profile"
+TAGGED = "tagged"
+HASHTAG = "hashtag"
+HIGHLIGHT = "highlight"
+
+# Kinds that stand for many posts rather than one
+COLLECTIONS = frozenset((PROFILE, TAGGED, HASHTAG, HIGHLIGHT))
+
+# One pass: optional scheme and host prefix, then a highlight, story,
+# hashtag, post (with an optional owner segment: instagram.com/<user>/p/<code>/)
+# or profile path. Query strings, fragments and trailing segments such as
+# /embed/ are accepted and dropped.
+_INSTAGRAM_URL = re.compile(
+    r'(?:https?://)?(?:www\.|m\.)?instagram\.com/'
+    r'(?:'
+    r'stories/highlights/(?P<highlight>\d+)'
+    r'|stories/(?P<username>[A-Za-z0-9._]+)/(?P<story_id>\d+)'
+    r'|explore/tags/(?P<hashtag>[^/?#\s]+)'
+    r'|(?:(?P<owner>[A-Za-z0-9._]+)/)?(?P<kind>p|tv|reels?)/(?P<shortcode>[A-Za-z0-9_-]+)'
+    r'|(?!(?:p|tv|reels?|stories|explore|accounts|direct)(?:[/?#]|$))'
+    r'(?P<profile>[A-Za-z0-9._]+)(?P<tagged>/tagged)?'
+    r')'
+    r'(?:[/?#]\S*)?$',
+    re.IGNORECASE
+)
+
+_KINDS = {"p": POST, "tv": POST, "reel": REEL, "reels": REEL}
+
+_LABELS = {
+    POST: ("Instagram Post", "photo/video"),
+    REEL: ("Instagram Reel", "video"),
+    STORY: ("Instagram Story", "photo/video"),
+    PROFILE: ("Instagram Profile", "all posts"),
+    TAGGED: ("Tagged Posts", "all posts"),
+    HASHTAG: ("Instagram Hashtag", "all posts"),
+    HIGHLIGHT: ("Instagram Highlight", "stories"),
+}
+
+
+class InstagramURL(namedtuple("InstagramURL", "kind shortcode username story_id canonical")):
+    """A classified Instagram URL
+
+    For collections, username holds the profile or the hashtag name and
+    story_id the highlight id.
+    """
+
+    __slots__ = ()
+
+    @property
+    def key(self):
+        """Canonical identity used for de-duplication and the download ledger"""
+        if self.kind == STORY:
+            return f"story:{self.story_id}"
+        if self.kind == HIGHLIGHT:
+            return f"highlight:{self.story_id}"
+        if self.kind in COLLECTIONS:
+            return f"{self.kind}:{self.username.lower()}"
+        return f"post:{self.shortcode}"
+
+    @property
+    def label(self):
+        """Display name such as "Instagram Reel" """
+        return _LABELS[self.kind][0]
+
+    @property
+    def content(self):
+        """Expected media: "video" or "photo/video" """
+        return _LABELS[self.kind][1]
+
+    @property
+    def is_collection(self):
+        """True for profiles, tagged feeds, hashtags and highlights"""
+        return self.kind in COLLECTIONS
+
+
+_match = _INSTAGRAM_URL.match
+_new = tuple.__new__
+
+
+def parse_instagram_url(url):
+    """Classify an Instagram URL, returning an InstagramURL or None"""
+    match = _match(url.strip())
+    if match is None:
+        return None
+
+    highlight, username, story_id, hashtag, owner, kind, shortcode, profile, tagged = match.groups()
+    if shortcode:
+        kind = _KINDS[kind.lower()]
+        path = "reel" if kind == REEL else "p"
+        return _new(InstagramURL, (kind, shortcode, owner, None,
+                                   f"https://www.instagram.com/{path}/{shortcode}/"))
+
+    if story_id:
+        return _new(InstagramURL, (STORY, None, username, story_id,
+                                   f"https://www.instagram.com/stories/{username}/{story_id}/"))
+
+    if profile:
+        if tagged:
+            return _new(InstagramURL, (TAGGED, None, profile, None,
+                                       f"https://www.instagram.com/{profile}/tagged/"))
+        return _new(InstagramURL, (PROFILE, None, profile, None, f"https://www.instagram.com/{profile}/"))
+
+    if hashtag:
+        return _new(InstagramURL, (HASHTAG, None, hashtag, None,
+                                   f"https://www.instagram.com/explore/tags/{hashtag}/"))
+
+    return _new(InstagramURL, (HIGHLIGHT, None, None, highlight,
+                               f"https://www.instagram.com/stories/highlights/{highlight}/"))
+
+
+def unique_urls(urls):
+    """Yield (url, parsed) for every URL, with parsed None for invalid ones
+
+    URLs that point to an item seen earlier in the input are dropped, so an
+    input file is validated and de-duplicated in one streaming pass.
+    """
+    seen = set()
+    for url in urls:
+        parsed = parse_instagram_url(url)
+        if parsed is not None:
+            key = parsed.key
+            if key in seen:
+                continue
+            seen.add(key)
+        yield url, parsed
+
+
+URLSummary = namedtuple("URLSummary", "items invalid duplicates")
+
+
+def summarize_urls(text):
+    """Split pasted text into URLs and classify them
+
+    Returns a URLSummary whose items is a tuple of (url, InstagramURL) for
+    every unique valid URL, plus the number of invalid and repeated entries.
+    """
+    items = []
+    invalid = 0
+    seen = set()
+    duplicates = 0
+    for url in text.split():
+        parsed = parse_instagram_url(url)
+        if parsed is None:
+            invalid += 1
+        elif parsed.key in seen:
+            duplicates += 1
+        else:
+            seen.add(parsed.key)
+            items.append((url, parsed))
+    return URLSummary(tuple(items), invalid, duplicates)